@@ -1,83 +1,250 @@
+from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-
-from app.api.auth import RequireAnalyticsAccess, UserInfo
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth import RequireAdmin, RequireAnalyticsAccess, UserInfo
+from app.core.database import async_session_maker, get_db
+from app.core.logging_config import get_logger
+from app.core.periods import PERIODS, parse_day, previous_range, resolve_range
+from app.schemas.analytics import (
+    ChecksAnalytics,
+    DynamicsAnalytics,
+    EmployeesAnalytics,
+    MonthAnalytics,
+    PlatesAnalytics,
+    SummaryAnalytics,
+    TodayAnalytics,
+)
+from app.services.analytics_service import (
+    EMPLOYEE_KINDS,
+    check_histogram,
+    dynamics,
+    employee_stats,
+    export_query,
+    period_block,
+    period_starts,
+    rebuild_daily_rollup,
+)
+from app.services.export_service import EXPORT_FORMATS, MEDIA_TYPES, export_chunks, stream_rows, until_disconnected
+from app.services import plates_analytics_service
+from app.services.plates_analytics_service import build_plates_analytics, plates_days
+
+logger = get_logger(__name__)
 
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
-def _analytics_disabled() -> None:
-    """
-    Общий helper для всех эндпоинтов аналитики.
+def _range(period: str, date_from: Optional[str], date_to: Optional[str]):
+    """(start, end, явный ли диапазон) по query; ошибки формата — 400."""
+    try:
+        return resolve_range(period, date_from, date_to, datetime.utcnow().date())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    Временно отключает функциональность и сообщает,
-    что раздел находится в разработке.
-    """
-
-    raise HTTPException(
-        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-        detail="Аналитика временно отключена (функция в разработке).",
-    )
 
-
-@router.get("/today")
+@router.get("/today", response_model=TodayAnalytics)
 async def analytics_today(
     date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequireAnalyticsAccess),
 ):
-    _analytics_disabled()
+    """Сводка за сегодня (или за date_from–date_to)."""
+    start, end, _ = _range("day", date_from, date_to)
+    block = await period_block(db, start, end)
+    return TodayAnalytics(**block.model_dump())
 
 
-@router.get("/month")
+@router.get("/month", response_model=MonthAnalytics)
 async def analytics_month(
     date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequireAnalyticsAccess),
 ):
-    _analytics_disabled()
+    """Сводка за текущий месяц (или за date_from–date_to)."""
+    start, end, _ = _range("month", date_from, date_to)
+    block = await period_block(db, start, end)
+    return MonthAnalytics(**block.model_dump())
 
 
-@router.get("/employees")
+@router.get("/employees", response_model=EmployeesAnalytics)
 async def analytics_employees(
     period: str = Query("day", description="day | week | month"),
     date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
     kind: str = Query("all", description="all | docs | plates"),
+    db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequireAnalyticsAccess),
 ):
-    _analytics_disabled()
+    """Учёт по сотрудникам: заказы, сумма, средний чек и доля в выручке за период (docs — павильон 1, plates — номера)."""
+    if kind not in EMPLOYEE_KINDS:
+        raise HTTPException(status_code=400, detail="kind: all, docs или plates")
+    start, end, _ = _range(period, date_from, date_to)
+    total, employees = await employee_stats(
+        db,
+        kind,
+        datetime.combine(start, datetime.min.time()),
+        datetime.combine(end + timedelta(days=1), datetime.min.time()),
+    )
+    return EmployeesAnalytics(period=period, total_revenue=total, employees=employees)
 
 
-@router.get("/summary")
+@router.get("/summary", response_model=SummaryAnalytics)
 async def analytics_summary(
     period: str = Query("day", description="day | week | month"),
     date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequireAnalyticsAccess),
 ):
-    _analytics_disabled()
+    """
+    Текущий период и предыдущий для сравнения: прошлый день/неделя/месяц целиком,
+    а для явного date_from–date_to — такой же по длине отрезок перед ним.
+    """
+    start, end, explicit = _range(period, date_from, date_to)
+    prev_start, prev_end = previous_range(period, start, end, explicit)
+    return SummaryAnalytics(
+        period=period,
+        current=await period_block(db, start, end),
+        previous=await period_block(db, prev_start, prev_end),
+    )
+
+
+@router.get("/checks", response_model=ChecksAnalytics)
+async def analytics_checks(
+    period: str = Query("month", description="day | week | month"),
+    date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    bins: int = Query(10, ge=1, le=50, description="Число интервалов"),
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequireAnalyticsAccess),
+):
+    """Распределение чеков за период: сумма платежей заказа за период по интервалам от 0 до максимального чека."""
+    start, end, _ = _range(period, date_from, date_to)
+    result = await check_histogram(
+        db,
+        datetime.combine(start, datetime.min.time()),
+        datetime.combine(end + timedelta(days=1), datetime.min.time()),
+        bins,
+    )
+    return ChecksAnalytics(period=period, orders_count=sum(b.orders_count for b in result), bins=result)
 
 
-@router.get("/dynamics")
+# Диапазон динамики по умолчанию (дней назад от сегодня) и предел числа точек
+_DYNAMICS_DEFAULT_DAYS = {"day": 29, "week": 7 * 11, "month": 365}
+_DYNAMICS_MAX_POINTS = 1000
+
+
+@router.get("/dynamics", response_model=DynamicsAnalytics)
 async def analytics_dynamics(
     group_by: str = Query("day", description="day | week | month"),
     date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequireAnalyticsAccess),
 ):
-    _analytics_disabled()
+    """
+    Динамика по дням/неделям/месяцам; периоды без платежей — нули. Точки — целые периоды
+    (date_from/date_to выравниваются по началу дня/недели/месяца). По умолчанию — 30 дней,
+    12 недель или 12 месяцев до сегодня.
+    """
+    if group_by not in PERIODS:
+        raise HTTPException(status_code=400, detail="group_by: day, week или month")
+    today = datetime.utcnow().date()
+    try:
+        d_from = parse_day(date_from, "date_from")
+        d_to = parse_day(date_to, "date_to") or today
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    d_from = d_from or d_to - timedelta(days=_DYNAMICS_DEFAULT_DAYS[group_by])
+    if d_from > d_to:
+        raise HTTPException(status_code=400, detail="Начало периода позже конца")
+    if len(period_starts(group_by, d_from, d_to)) > _DYNAMICS_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Слишком много точек (больше {_DYNAMICS_MAX_POINTS}), укрупните group_by")
+    points = await dynamics(db, group_by, d_from, d_to, today)
+    return DynamicsAnalytics(group_by=group_by, points=points)
+
+
+@router.get("/plates", response_model=PlatesAnalytics)
+async def analytics_plates(
+    period: str = Query("month", description="day | week | month"),
+    date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequireAnalyticsAccess),
+):
+    """
+    Павильон 2 по дням: выдано номеров (переход в COMPLETED), медиана срока PAID → COMPLETED
+    в часах, брак и его доля от выданных, выручка INCOME_PAVILION2. По умолчанию — текущий месяц.
+    """
+    start, end, _ = _range(period, date_from, date_to)
+    if (end - start).days + 1 > _DYNAMICS_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Слишком длинный период (больше {_DYNAMICS_MAX_POINTS} дней)")
+    days = await plates_days(db, start, end, datetime.utcnow().date())
+    return build_plates_analytics(days)
 
 
 @router.get("/export")
 async def analytics_export(
-    format: str = Query("csv", description="csv"),
+    request: Request,
+    format: str = Query("csv", description="csv | xlsx"),
     period: str = Query("day", description="day | month | employees"),
     date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
     _user: UserInfo = Depends(RequireAnalyticsAccess),
 ):
-    _analytics_disabled()
+    """
+    Выгрузка итогов по дням, месяцам или дням × сотрудникам (дни без платежей не выводятся).
+    Потоком из серверного курсора; при отключении клиента выгрузка прерывается.
+    По умолчанию — текущий месяц (для month — текущий год).
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Формат выгрузки: csv или xlsx")
+    if period not in ("day", "month", "employees"):
+        raise HTTPException(status_code=400, detail="period: day, month или employees")
+    today = datetime.utcnow().date()
+    try:
+        start = parse_day(date_from, "date_from")
+        end = parse_day(date_to, "date_to") or today
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if start is None:
+        start = end.replace(month=1, day=1) if period == "month" else end.replace(day=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="Начало периода позже конца")
+    stmt, header = export_query(period, start, end)
+    filename = f"analytics_{period}_{start.isoformat()}_{end.isoformat()}.{format}"
+    return StreamingResponse(
+        until_disconnected(
+            request,
+            export_chunks(format, header, stream_rows(async_session_maker, stmt), sheet_name="Аналитика"),
+        ),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
+
+@router.post("/rollup/rebuild")
+async def analytics_rollup_rebuild(
+    date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
+    user: UserInfo = Depends(RequireAdmin),
+):
+    """Пересобрать дневные итоги аналитики из payments (разовая операция, например после ручных правок БД)."""
+    try:
+        d_from = parse_day(date_from, "date_from")
+        d_to = parse_day(date_to, "date_to")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = await rebuild_daily_rollup(db, d_from, d_to)
+    # Кеш дней павильона 2 читает выручку из daily_rollup: сбросить после коммита, чтобы не закешировать старые итоги
+    await db.commit()
+    plates_analytics_service.invalidate()
+    logger.info("Итоги аналитики пересобраны: строк=%s, период %s — %s, пользователь id=%s", rows, d_from, d_to, user.id)
+    return {"rows": rows}
@@ -7,14 +7,17 @@ from pydantic import BaseModel
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import async_session_maker, get_db
 from app.core.logging_config import get_logger
 from app.core.permissions import allowed_pavilions, get_menu_items
 from app.models import Employee
 from app.models.employee import EmployeeRole
+from app.services import employee_cache
 from app.services.auth_service import (
     create_access_token,
     decode_token,
+    hash_password,
+    needs_rehash,
     verify_password,
 )
 
@@ -66,6 +69,15 @@ def require_roles(allowed_roles: List[EmployeeRole]):
                 detail="Требуется авторизация",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        # Активность и текущая роль — из кеша сотрудников, а не из токена (токен живёт 7 дней)
+        emp = await employee_cache.get_employee(async_session_maker, current_user.id)
+        if emp is None or not emp.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Сотрудник деактивирован",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        current_user = current_user.model_copy(update={"name": emp.name, "role": emp.role})
         try:
             role_enum = EmployeeRole(current_user.role)
         except ValueError:
@@ -110,11 +122,14 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный логин или пароль",
         )
-    if not verify_password(form.password, emp.password_hash):
+    if not await verify_password(form.password, emp.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный логин или пароль",
         )
+    if needs_rehash(emp.password_hash):
+        # Пароль известен только сейчас: пересчитать хеш с текущей стоимостью (сохранится при коммите запроса)
+        emp.password_hash = await hash_password(form.password)
     token = create_access_token(
         subject=emp.id,
         role=emp.role.value,
@@ -182,16 +197,15 @@ async def change_password(
     db: AsyncSession = Depends(get_db),
 ):
     """Смена пароля текущего пользователя (требуется старый пароль)."""
-    from app.services.auth_service import hash_password
     if not body.new_password or len(body.new_password) < 4:
         raise HTTPException(status_code=400, detail="Новый пароль должен быть не менее 4 символов")
     result = await db.execute(select(Employee).where(Employee.id == current_user.id))
     emp = result.scalar_one_or_none()
     if not emp or not emp.password_hash:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
-    if not verify_password(body.old_password, emp.password_hash):
+    if not await verify_password(body.old_password, emp.password_hash):
         raise HTTPException(status_code=400, detail="Неверный текущий пароль")
-    emp.password_hash = hash_password(body.new_password)
+    emp.password_hash = await hash_password(body.new_password)
     db.add(emp)
     await db.flush()
     return {"ok": True}
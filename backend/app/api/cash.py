@@ -1,48 +1,60 @@
 """API касс и смен: открытие/закрытие смены по павильонам; касса номеров (plate-rows)."""
 from decimal import Decimal
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_, update, insert, case, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import async_session_maker, get_db
 from app.core.logging_config import get_logger
+from app.core.periods import decode_cursor, encode_cursor, period_bounds
 from app.api.auth import RequireCashAccess, RequirePlateAccess, UserInfo
-from app.models import CashShift, ShiftStatus, Payment, CashRow, PlateCashRow, PlatePayout
+from app.models import CashShift, ShiftStatus, ShiftReport, CashRow, PlateCashRow, PlatePayout
 from app.models.employee import EmployeeRole
 from app.schemas.cash import (
     ShiftOpen, ShiftClose, ShiftResponse, ShiftCurrentResponse,
-    CashRowCreate, CashRowUpdate, CashRowResponse,
+    CashRowCreate, CashRowUpdate, CashRowResponse, CashRowBatchItem, PlatePayoutSettle,
+)
+from app.services.employee_cache import employee_names
+from app.services.export_service import EXPORT_FORMATS, MEDIA_TYPES, export_chunks, stream_rows, until_disconnected
+from app.services.plate_cash_service import balance_at, lock_ledger, recompute_balances
+from app.services.shift_service import (
+    CASH_COLUMNS,
+    build_shift_report,
+    current_shift_id,
+    get_open_shift,
+    shift_report_to_dict,
+    shift_totals_to_dict,
 )
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/cash", tags=["cash"])
 
 
-def _shift_to_response(shift: CashShift) -> dict:
+def _shift_to_response(shift: CashShift, names: dict[int, str]) -> dict:
+    """names — имена сотрудников по id (employee_names по opened_by_id / closed_by_id)."""
     return {
         "id": shift.id,
         "pavilion": shift.pavilion,
         "opened_by_id": shift.opened_by_id,
+        "opened_by_name": names.get(shift.opened_by_id),
         "opened_at": shift.opened_at.isoformat() if shift.opened_at else "",
         "closed_at": shift.closed_at.isoformat() if shift.closed_at else None,
         "closed_by_id": shift.closed_by_id,
+        "closed_by_name": names.get(shift.closed_by_id),
         "opening_balance": float(shift.opening_balance),
         "closing_balance": float(shift.closing_balance) if shift.closing_balance is not None else None,
         "status": shift.status.value,
     }
 
 
-async def _get_current_shift(db: AsyncSession, pavilion: int) -> Optional[CashShift]:
-    q = select(CashShift).where(
-        CashShift.pavilion == pavilion,
-        CashShift.status == ShiftStatus.OPEN,
-    ).order_by(CashShift.opened_at.desc()).limit(1)
-    r = await db.execute(q)
-    return r.scalar_one_or_none()
+async def _shift_names(db: AsyncSession, shifts) -> dict[int, str]:
+    """Имена открывших и закрывших смены — из справочника сотрудников, без запроса на каждую смену."""
+    return await employee_names(db, [i for s in shifts for i in (s.opened_by_id, s.closed_by_id)])
 
 
 def _can_manage_pavilion(user: UserInfo, pavilion: int) -> bool:
@@ -64,7 +76,7 @@ async def open_shift(
     """Открыть смену по павильону. Павильон 1 — оператор/менеджер/админ, павильон 2 — оператор изготовления/менеджер/админ."""
     if not _can_manage_pavilion(user, body.pavilion):
         raise HTTPException(status_code=403, detail="Нет доступа к кассе этого павильона")
-    current = await _get_current_shift(db, body.pavilion)
+    current = await get_open_shift(db, body.pavilion)
     if current:
         raise HTTPException(
             status_code=400,
@@ -88,18 +100,16 @@ async def get_current_shift(
     db: AsyncSession = Depends(get_db),
     user: UserInfo = Depends(RequireCashAccess),
 ):
-    """Текущая открытая смена по павильону и сумма по ней."""
+    """Текущая открытая смена по павильону и сумма по ней (накопительные суммы со строки смены)."""
     if not _can_manage_pavilion(user, pavilion):
         raise HTTPException(status_code=403, detail="Нет доступа к кассе этого павильона")
-    shift = await _get_current_shift(db, pavilion)
+    shift = await get_open_shift(db, pavilion)
     if not shift:
-        return {"shift": None, "total_in_shift": 0}
-    q = select(func.coalesce(func.sum(Payment.amount), 0)).where(Payment.shift_id == shift.id)
-    r = await db.execute(q)
-    total = r.scalar_one() or Decimal("0")
+        return {"shift": None, "total_in_shift": 0, "totals_by_type": {}}
     return {
-        "shift": _shift_to_response(shift),
-        "total_in_shift": float(total),
+        "shift": _shift_to_response(shift, await _shift_names(db, [shift])),
+        "total_in_shift": float(shift.total_payments),
+        "totals_by_type": shift_totals_to_dict(shift),
     }
 
 
@@ -122,7 +132,8 @@ async def list_shifts(
             pass
     r = await db.execute(q)
     shifts = r.scalars().all()
-    return [_shift_to_response(s) for s in shifts]
+    names = await _shift_names(db, shifts)
+    return [_shift_to_response(s, names) for s in shifts]
 
 
 @router.patch("/shifts/{shift_id}/close", response_model=dict)
@@ -133,7 +144,10 @@ async def close_shift(
   user: UserInfo = Depends(RequireCashAccess),
 ):
     """Закрыть смену (указать посчитанную наличность)."""
-    r = await db.execute(select(CashShift).where(CashShift.id == shift_id))
+    # Строка смены блокируется: второе параллельное закрытие дождётся коммита и получит 400, а не дубль Z-отчёта
+    r = await db.execute(
+        select(CashShift).where(CashShift.id == shift_id).with_for_update().execution_options(populate_existing=True)
+    )
     shift = r.scalar_one_or_none()
     if not shift:
         raise HTTPException(status_code=404, detail="Смена не найдена")
@@ -141,15 +155,35 @@ async def close_shift(
         raise HTTPException(status_code=400, detail="Смена уже закрыта")
     if not _can_manage_pavilion(user, shift.pavilion):
         raise HTTPException(status_code=403, detail="Нет доступа к кассе этого павильона")
-    from datetime import datetime
     shift.closed_at = datetime.utcnow()
     shift.closed_by_id = user.id
     shift.closing_balance = body.closing_balance
     shift.status = ShiftStatus.CLOSED
     db.add(shift)
     await db.flush()
-    logger.info("Закрыта смена id=%s павильон=%s", shift.id, shift.pavilion)
-    return _shift_to_response(shift)
+    report = await build_shift_report(db, shift)
+    logger.info(
+        "Закрыта смена id=%s павильон=%s, расхождение=%s", shift.id, shift.pavilion, report.discrepancy
+    )
+    out = _shift_to_response(shift, await _shift_names(db, [shift]))
+    out["report"] = shift_report_to_dict(report)
+    return out
+
+
+@router.get("/shifts/{shift_id}/report")
+async def get_shift_report(
+    shift_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: UserInfo = Depends(RequireCashAccess),
+):
+    """Z-отчёт закрытой смены: итоги по графам, платежи по типам, ожидаемый и заявленный остаток."""
+    r = await db.execute(select(ShiftReport).where(ShiftReport.shift_id == shift_id))
+    report = r.scalar_one_or_none()
+    if not report:
+        raise HTTPException(status_code=404, detail="Отчёт по смене не найден (смена не закрыта?)")
+    if not _can_manage_pavilion(user, report.pavilion):
+        raise HTTPException(status_code=403, detail="Нет доступа к кассе этого павильона")
+    return shift_report_to_dict(report)
 
 
 # --- Таблица кассы (редактируемые строки: ФИО, заявление, госпошлина, ДКП, страховка, номера, итого) ---
@@ -168,17 +202,115 @@ def _cash_row_to_dict(row: CashRow) -> dict:
     }
 
 
-@router.get("/rows", response_model=list)
+def _page_query(model, date_from: Optional[str], date_to: Optional[str], cursor: Optional[str]):
+    """
+    Условия выборки страницы: период по created_at и keyset-курсор (created_at, id) по убыванию.
+    Возвращает (условия периода, условие курсора или None). Неверные даты/курсор — 400.
+    """
+    try:
+        start, end = period_bounds(date_from, date_to)
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    period = []
+    if start is not None:
+        period.append(model.created_at >= start)
+    if end is not None:
+        period.append(model.created_at < end)
+    keyset = tuple_(model.created_at, model.id) < after if after else None
+    return period, keyset
+
+
+async def _fetch_page(db: AsyncSession, model, period: list, keyset, limit: int):
+    """Строки страницы (последние сверху) и курсор следующей страницы."""
+    q = select(model).where(*period)
+    if keyset is not None:
+        q = q.where(keyset)
+    q = q.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    rows = (await db.execute(q)).scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def _export_response(request: Request, model, columns: list, header: list, name: str, fmt: str,
+                     date_from: Optional[str], date_to: Optional[str]) -> StreamingResponse:
+    """Потоковая выгрузка строк кассы за период (по возрастанию created_at, id)."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Формат выгрузки: csv или xlsx")
+    period, _ = _page_query(model, date_from, date_to, None)
+    stmt = select(*columns).where(*period).order_by(model.created_at, model.id)
+    filename = "_".join(p for p in (name, date_from, date_to) if p) + "." + fmt
+    return StreamingResponse(
+        until_disconnected(request, export_chunks(fmt, header, stream_rows(async_session_maker, stmt), sheet_name=name)),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/rows/export")
+async def export_cash_rows(
+    request: Request,
+    format: str = Query("csv", description="csv | xlsx"),
+    date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    user: UserInfo = Depends(RequireCashAccess),
+):
+    """Выгрузка таблицы кассы за период для бухгалтерии (CSV / XLSX, потоком из серверного курсора)."""
+    return _export_response(
+        request,
+        CashRow,
+        [CashRow.created_at, CashRow.client_name, *(getattr(CashRow, c) for c in CASH_COLUMNS)],
+        ["Дата", "ФИО", "Заявление", "Госпошлина", "ДКП", "Страховка", "Номера", "Итого"],
+        "cash_rows", format, date_from, date_to,
+    )
+
+
+@router.get("/plate-rows/export")
+async def export_plate_cash_rows(
+    request: Request,
+    format: str = Query("csv", description="csv | xlsx"),
+    date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    user: UserInfo = Depends(RequirePlateAccess),
+):
+    """Выгрузка кассы номеров за период (CSV / XLSX, потоком из серверного курсора)."""
+    return _export_response(
+        request,
+        PlateCashRow,
+        [PlateCashRow.created_at, PlateCashRow.client_name, PlateCashRow.amount, PlateCashRow.balance],
+        ["Дата", "Фамилия", "Сумма", "Остаток"],
+        "plate_cash_rows", format, date_from, date_to,
+    )
+
+
+@router.get("/rows")
 async def list_cash_rows(
+    date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
     limit: int = Query(500, ge=1, le=2000),
     db: AsyncSession = Depends(get_db),
     user: UserInfo = Depends(RequireCashAccess),
 ):
-    """Список строк таблицы кассы (последние сверху)."""
-    q = select(CashRow).order_by(CashRow.created_at.desc()).limit(limit)
-    r = await db.execute(q)
-    rows = r.scalars().all()
-    return [_cash_row_to_dict(row) for row in rows]
+    """
+    Строки таблицы кассы за период (последние сверху), постранично по курсору.
+    totals — суммы по графам за весь период (одним SUM), отдаются на первой странице.
+    """
+    period, keyset = _page_query(CashRow, date_from, date_to, cursor)
+    rows, next_cursor = await _fetch_page(db, CashRow, period, keyset, limit)
+    totals = None
+    if cursor is None:
+        q = select(*(func.coalesce(func.sum(getattr(CashRow, c)), 0) for c in CASH_COLUMNS)).where(*period)
+        sums = (await db.execute(q)).one()
+        totals = {c: float(v) for c, v in zip(CASH_COLUMNS, sums)}
+    return {
+        "rows": [_cash_row_to_dict(row) for row in rows],
+        "totals": totals,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.post("/rows", response_model=dict)
@@ -196,12 +328,60 @@ async def create_cash_row(
         insurance=body.insurance,
         plates=body.plates,
         total=body.total,
+        shift_id=await current_shift_id(db, 1),
     )
     db.add(row)
     await db.flush()
     return _cash_row_to_dict(row)
 
 
+# Не больше строк за один пакетный PATCH
+_BATCH_MAX = 500
+
+
+@router.patch("/rows:batch", response_model=list)
+async def update_cash_rows_batch(
+    changes: List[CashRowBatchItem],
+    db: AsyncSession = Depends(get_db),
+    user: UserInfo = Depends(RequireCashAccess),
+):
+    """
+    Пакетное обновление ячеек: [{id, fields}] применяется одним UPDATE ... CASE id в одной транзакции.
+    Возвращает обновлённые строки. Если какой-то строки нет — 404, ничего не меняется.
+    """
+    if not changes:
+        return []
+    if len(changes) > _BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Не больше {_BATCH_MAX} строк за раз")
+    by_id: dict = {}
+    for item in changes:
+        by_id.setdefault(item.id, {}).update(item.fields.model_dump(exclude_none=True))
+    values = {}
+    for column in ("client_name",) + CASH_COLUMNS:
+        col = getattr(CashRow, column)
+        whens = {row_id: literal(fields[column], col.type) for row_id, fields in by_id.items() if column in fields}
+        if whens:
+            values[column] = case(whens, value=CashRow.id, else_=col)
+    ids = list(by_id)
+    if not values:
+        r = await db.execute(select(CashRow).where(CashRow.id.in_(ids)))
+        rows = r.scalars().all()
+    else:
+        stmt = (
+            update(CashRow)
+            .where(CashRow.id.in_(ids))
+            .values(**values)
+            .returning(CashRow)
+            .execution_options(synchronize_session=False)
+        )
+        rows = (await db.execute(stmt)).scalars().all()
+    if len(rows) != len(ids):
+        missing = sorted(set(ids) - {row.id for row in rows})
+        raise HTTPException(status_code=404, detail=f"Строки не найдены: {missing}")
+    order = {row_id: i for i, row_id in enumerate(ids)}
+    return [_cash_row_to_dict(row) for row in sorted(rows, key=lambda row: order[row.id])]
+
+
 @router.patch("/rows/{row_id}", response_model=dict)
 async def update_cash_row(
     row_id: int,
@@ -266,21 +446,41 @@ def _plate_row_to_dict(row: PlateCashRow) -> dict:
         "created_at": row.created_at.isoformat() if row.created_at else None,
         "client_name": row.client_name or "",
         "amount": float(row.amount),
+        "balance": float(row.balance) if row.balance is not None else None,
     }
 
 
 @router.get("/plate-rows")
 async def list_plate_cash_rows(
+    date_from: Optional[str] = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Конец периода (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
     limit: int = Query(500, ge=1, le=2000),
     db: AsyncSession = Depends(get_db),
     user: UserInfo = Depends(RequirePlateAccess),
 ):
-    """Список строк кассы номеров (последние сверху)."""
-    q = select(PlateCashRow).order_by(PlateCashRow.created_at.desc()).limit(limit)
-    r = await db.execute(q)
-    rows = r.scalars().all()
-    total = sum(float(row.amount) for row in rows)
-    return {"rows": [_plate_row_to_dict(row) for row in rows], "total": total}
+    """Строки кассы номеров за период (последние сверху). total — сумма за весь период, на первой странице."""
+    period, keyset = _page_query(PlateCashRow, date_from, date_to, cursor)
+    rows, next_cursor = await _fetch_page(db, PlateCashRow, period, keyset, limit)
+    total = None
+    if cursor is None:
+        q = select(func.coalesce(func.sum(PlateCashRow.amount), 0)).where(*period)
+        total = float((await db.execute(q)).scalar_one())
+    return {"rows": [_plate_row_to_dict(row) for row in rows], "total": total, "next_cursor": next_cursor}
+
+
+@router.get("/plate-rows/balance")
+async def get_plate_cash_balance(
+    at: Optional[datetime] = Query(None, description="Момент времени (ISO 8601, UTC); по умолчанию — сейчас"),
+    db: AsyncSession = Depends(get_db),
+    user: UserInfo = Depends(RequirePlateAccess),
+):
+    """Остаток кассы номеров на момент времени — одна строка по индексу (created_at, id)."""
+    at = at or datetime.utcnow()
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    balance = await balance_at(db, at)
+    return {"at": at.isoformat(), "balance": float(balance)}
 
 
 @router.post("/plate-rows")
@@ -290,12 +490,16 @@ async def create_plate_cash_row(
     user: UserInfo = Depends(RequirePlateAccess),
 ):
     """Добавить строку в кассу номеров (сумма может быть отрицательной)."""
+    await lock_ledger(db)
     row = PlateCashRow(
         client_name=(body.client_name or "").strip(),
         amount=Decimal(str(body.amount)),
+        shift_id=await current_shift_id(db, 2),
     )
     db.add(row)
     await db.flush()
+    await recompute_balances(db, row.created_at, row.id)
+    await db.refresh(row, ["balance"])
     return _plate_row_to_dict(row)
 
 
@@ -313,10 +517,15 @@ async def update_plate_cash_row(
         raise HTTPException(status_code=404, detail="Строка не найдена")
     if body.client_name is not None:
         row.client_name = body.client_name.strip()
-    if body.amount is not None:
+    amount_changed = body.amount is not None and Decimal(str(body.amount)) != row.amount
+    if amount_changed:
+        await lock_ledger(db)
         row.amount = Decimal(str(body.amount))
     db.add(row)
     await db.flush()
+    if amount_changed:
+        await recompute_balances(db, row.created_at, row.id)
+        await db.refresh(row, ["balance"])
     return _plate_row_to_dict(row)
 
 
@@ -327,18 +536,21 @@ async def delete_plate_cash_row(
     user: UserInfo = Depends(RequirePlateAccess),
 ):
     """Удалить строку кассы номеров."""
+    await lock_ledger(db)
     r = await db.execute(select(PlateCashRow).where(PlateCashRow.id == row_id))
     row = r.scalar_one_or_none()
     if not row:
         raise HTTPException(status_code=404, detail="Строка не найдена")
+    position = (row.created_at, row.id)
     await db.delete(row)
     await db.flush()
+    await recompute_balances(db, *position)
 
 
 # --- Реестр выдачи денег за номера (пав.1 -> пав.2) ---
 
 
-def _payout_to_dict(row: PlatePayout) -> dict:
+def _payout_to_dict(row: PlatePayout, names: dict[int, str]) -> dict:
     return {
         "id": row.id,
         "created_at": row.created_at.isoformat() if row.created_at else None,
@@ -346,6 +558,7 @@ def _payout_to_dict(row: PlatePayout) -> dict:
         "amount": float(row.amount),
         "paid_at": row.paid_at.isoformat() if row.paid_at else None,
         "paid_by_id": row.paid_by_id,
+        "paid_by_name": names.get(row.paid_by_id),
     }
 
 
@@ -359,60 +572,86 @@ async def list_plate_payouts(
     r = await db.execute(q)
     rows = r.scalars().all()
     total = sum((row.amount for row in rows), Decimal("0"))
+    names = await employee_names(db, [row.paid_by_id for row in rows])
     return {
-        "rows": [_payout_to_dict(row) for row in rows],
+        "rows": [_payout_to_dict(row, names) for row in rows],
         "total": float(total),
     }
 
 
 @router.post("/plate-payouts/pay")
 async def pay_plate_payouts(
+    body: Optional[PlatePayoutSettle] = None,
     db: AsyncSession = Depends(get_db),
     user: UserInfo = Depends(RequireCashAccess),
 ):
     """
-    Выдать деньги оператору номеров:
-    - уменьшить кассу документов на сумму всех невыплаченных номеров;
-    - добавить по каждой записи строку в кассу номеров;
-    - пометить записи как выплаченные.
+    Выдать деньги оператору номеров (без тела — все невыплаченные; ids / date_from / date_to — часть):
+    - пометить записи как выплаченные (UPDATE ... WHERE paid_at IS NULL RETURNING);
+    - добавить по каждой записи строку в кассу номеров (INSERT ... SELECT);
+    - уменьшить кассу документов на выданную сумму.
     """
+    conditions = [PlatePayout.paid_at.is_(None)]
+    if body is not None:
+        if body.ids is not None:
+            if not body.ids:
+                raise HTTPException(status_code=400, detail="Не выбраны записи к выдаче")
+            conditions.append(PlatePayout.id.in_(body.ids))
+        try:
+            start, end = period_bounds(body.date_from, body.date_to)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if start:
+            conditions.append(PlatePayout.created_at >= start)
+        if end:
+            conditions.append(PlatePayout.created_at < end)
+
+    now = datetime.utcnow()
     r = await db.execute(
-        select(PlatePayout).where(PlatePayout.paid_at.is_(None)).order_by(PlatePayout.created_at)
+        update(PlatePayout)
+        .where(*conditions)
+        .values(paid_at=now, paid_by_id=user.id)
+        .returning(PlatePayout.id, PlatePayout.amount)
+        .execution_options(synchronize_session=False)
     )
-    payouts = r.scalars().all()
-    if not payouts:
+    settled = r.all()
+    if not settled:
         raise HTTPException(status_code=400, detail="Нет номеров к выдаче")
-
-    total: Decimal = sum((p.amount for p in payouts), Decimal("0"))
+    total: Decimal = sum((amount for _, amount in settled), Decimal("0"))
     if total <= 0:
         raise HTTPException(status_code=400, detail="Сумма к выдаче нулевая")
 
-    # Строка в кассе документов: Номера — выдача (отрицательная сумма)
-    cash_row = CashRow(
-        client_name="Номера — выдача",
-        application=Decimal("0"),
-        state_duty=Decimal("0"),
-        dkp=Decimal("0"),
-        insurance=Decimal("0"),
-        plates=-total,
-        total=-total,
+    # В кассу номеров — по человеку отдельная строка, одним INSERT ... SELECT; затем остатки новых строк
+    shift_2 = await current_shift_id(db, 2)
+    await lock_ledger(db)
+    r = await db.execute(
+        insert(PlateCashRow).from_select(
+            ["created_at", "client_name", "amount", "shift_id"],
+            select(
+                literal(now, PlateCashRow.created_at.type),
+                PlatePayout.client_name,
+                PlatePayout.amount,
+                literal(shift_2, PlateCashRow.shift_id.type),
+            )
+            .where(PlatePayout.id.in_([payout_id for payout_id, _ in settled]))
+            .order_by(PlatePayout.created_at, PlatePayout.id),
+        ).returning(PlateCashRow.id)
     )
-    db.add(cash_row)
-
-    now = datetime.utcnow()
+    await recompute_balances(db, now, min(r.scalars().all()))
 
-    # В кассу номеров — по человеку отдельная строка
-    for p in payouts:
-        db.add(
-            PlateCashRow(
-                client_name=p.client_name,
-                amount=p.amount,
-            )
+    # Строка в кассе документов: Номера — выдача (отрицательная сумма)
+    db.add(
+        CashRow(
+            client_name="Номера — выдача",
+            application=Decimal("0"),
+            state_duty=Decimal("0"),
+            dkp=Decimal("0"),
+            insurance=Decimal("0"),
+            plates=-total,
+            total=-total,
+            shift_id=await current_shift_id(db, 1),
         )
-        p.paid_at = now
-        p.paid_by_id = user.id
-        db.add(p)
-
+    )
     await db.flush()
-    logger.info("Выдача денег за номера: строк=%s сумма=%s", len(payouts), total)
-    return {"count": len(payouts), "total": float(total)}
+    logger.info("Выдача денег за номера: строк=%s сумма=%s", len(settled), total)
+    return {"count": len(settled), "total": float(total)}
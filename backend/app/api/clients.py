@@ -0,0 +1,26 @@
+"""Подсказки клиентов для формы: ФИО, паспорт, адрес и телефон из прошлых заказов."""
+from fastapi import APIRouter, Depends, Query
+
+from app.api.auth import RequireFormAccess, UserInfo
+from app.services import client_index
+
+router = APIRouter(prefix="/clients", tags=["clients"])
+
+
+@router.get("/suggest")
+async def suggest_clients(
+    q: str = Query(..., min_length=1, max_length=100, description="Начало ФИО или номера паспорта"),
+    limit: int = Query(8, ge=1, le=20),
+    _user: UserInfo = Depends(RequireFormAccess),
+):
+    """Клиенты и продавцы из прошлых заказов с последними известными данными (индекс в памяти, без запроса к БД)."""
+    return [
+        {
+            "fio": r.fio,
+            "passport": r.passport,
+            "address": r.address,
+            "phone": r.phone,
+            "order_id": r.order_id,
+        }
+        for r in client_index.suggest(q, limit)
+    ]
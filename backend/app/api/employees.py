@@ -9,6 +9,7 @@ from app.core.database import get_db
 from app.models import Employee
 from app.models.employee import EmployeeRole
 from app.schemas.employee import EmployeeCreate, EmployeeResponse, EmployeeUpdate
+from app.services import employee_cache
 from app.services.auth_service import hash_password
 
 router = APIRouter(prefix="/employees", tags=["employees"])
@@ -56,11 +57,13 @@ async def create_employee(
         role=data.role,
         telegram_id=data.telegram_id,
         login=data.login,
-        password_hash=hash_password(data.password) if data.password else None,
+        password_hash=await hash_password(data.password) if data.password else None,
         is_active=True,
     )
     db.add(emp)
-    await db.flush()
+    await db.commit()
+    # Сбросить справочник после коммита: загрузка между сбросом и коммитом не увидела бы сотрудника
+    employee_cache.invalidate()
     await db.refresh(emp)
     return _emp_to_response(emp)
 
@@ -85,10 +88,11 @@ async def update_employee(
     if data.login is not None:
         emp.login = data.login if data.login.strip() else None
     if data.password is not None and data.password.strip():
-        emp.password_hash = hash_password(data.password)
+        emp.password_hash = await hash_password(data.password)
     if data.is_active is not None:
         emp.is_active = data.is_active
     await db.commit()
+    employee_cache.invalidate()
     await db.refresh(emp)
     return _emp_to_response(emp)
 
@@ -108,5 +112,6 @@ async def deactivate_employee(
         raise HTTPException(status_code=404, detail="Сотрудник не найден")
     emp.is_active = False
     await db.commit()
+    employee_cache.invalidate()
     await db.refresh(emp)
     return _emp_to_response(emp)
@@ -1,30 +1,41 @@
-"""История заполнения формы: список записей для подстановки в форму."""
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+"""История заполнения формы: поиск по кратким записям и полный снимок для подстановки в форму."""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth import RequireFormAccess, UserInfo
 from app.core.database import get_db
 from app.models import FormHistory
+from app.services import form_history_service
 
 router = APIRouter(prefix="/form-history", tags=["form-history"])
 
 
 @router.get("")
 async def list_form_history(
-    limit: int = Query(50, ge=1, le=200),
+    q: Optional[str] = Query(None, max_length=100, description="Префикс ФИО, VIN, госномера или телефона"),
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequireFormAccess),
+):
+    """Краткие записи истории (последние использованные сверху), без form_data. Поиск — по q."""
+    return await form_history_service.search(db, q, limit)
+
+
+@router.get("/{entry_id}")
+async def get_form_history_entry(
+    entry_id: int,
     db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequireFormAccess),
 ):
-    """Список записей истории (последние сверху). Для подстановки в форму по клику."""
-    q = select(FormHistory).order_by(FormHistory.id.desc()).limit(limit)
-    rows = (await db.execute(q)).scalars().all()
-    return [
-        {
-            "id": r.id,
-            "order_id": r.order_id,
-            "form_data": r.form_data,
-            "created_at": r.created_at.isoformat() if r.created_at else None,
-        }
-        for r in rows
-    ]
+    """Полный снимок формы для подстановки по клику."""
+    entry = await db.get(FormHistory, entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Запись истории не найдена")
+    return {
+        "id": entry.id,
+        "order_id": entry.order_id,
+        "form_data": entry.form_data or {},
+        "used_at": entry.used_at.isoformat() if entry.used_at else None,
+    }
@@ -1,8 +1,8 @@
 from decimal import Decimal
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, delete, func
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
@@ -16,21 +16,36 @@ from app.models import (
     OrderStatus,
     Payment,
     PaymentType,
-    Employee,
-    CashShift,
-    ShiftStatus,
     CashRow,
-    PlateStock,
-    PlateReservation,
-    FormHistory,
     PlatePayout,
 )
 from pydantic import BaseModel
 
-from app.schemas.order import OrderCreate, OrderResponse, OrderDetailResponse
+from app.schemas.order import (
+    OrderCreate,
+    OrderDetailResponse,
+    OrderFullResponse,
+    OrderResponse,
+    OrderSearchHit,
+    OrderSearchPage,
+)
 from app.schemas.payment import PayOrderResponse
+from app.services.employee_cache import employee_names
+from app.services.form_history_service import save_snapshot
+from app.services.order_full_service import build_order_full, employee_ids, fetch_order_full
+from app.services.order_search_service import MIN_QUERY_LENGTH, search_orders
 from app.services.order_service import create_order
-from app.services.order_status import can_transition
+from app.services.order_status import can_transition, set_order_status
+from app.services.payment_service import is_first_payment, record_payment
+from app.services.shift_service import current_shift_id
+from app.services.plate_stock_service import (
+    add_work_reservation,
+    consume_for_order,
+    plate_quantity_from_order,
+    release_reserved,
+    remove_work_reservations,
+    reserve_for_paid_order,
+)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -40,18 +55,6 @@ async def _get_order(db: AsyncSession, order_id: int) -> Optional[Order]:
     return result.scalar_one_or_none()
 
 
-async def _current_shift_id(db: AsyncSession, pavilion: int) -> Optional[int]:
-    """Текущая открытая смена по павильону (1 или 2). Возвращает id смены или None."""
-    q = (
-        select(CashShift.id)
-        .where(CashShift.pavilion == pavilion, CashShift.status == ShiftStatus.OPEN)
-        .order_by(CashShift.opened_at.desc())
-        .limit(1)
-    )
-    r = await db.execute(q)
-    return r.scalar_one_or_none()
-
-
 # Шаблоны для разбивки по графам кассы: заявление, ДКП, номера
 _DKP_TEMPLATES = frozenset(("dkp.docx", "dkp_pieces.docx", "dkp_dar.docx"))
 _NUMBER_TEMPLATE = "number.docx"
@@ -125,39 +128,31 @@ async def pay_order(
             detail=f"Нельзя принять оплату для заказа со статусом {order.status.value}",
         )
     emp_id = employee_id if employee_id is not None else user.id
-    shift_1 = await _current_shift_id(db, 1)
-    shift_2 = await _current_shift_id(db, 2)
-    if order.state_duty_amount > 0:
-        db.add(
-            Payment(
-                order_id=order.id,
-                amount=order.state_duty_amount,
-                type=PaymentType.STATE_DUTY,
-                employee_id=emp_id,
-                shift_id=shift_1,
+    shift_1 = await current_shift_id(db, 1)
+    shift_2 = await current_shift_id(db, 2)
+    parts = [
+        (order.state_duty_amount, PaymentType.STATE_DUTY, shift_1),
+        (order.income_pavilion1, PaymentType.INCOME_PAVILION1, shift_1),
+        (order.income_pavilion2, PaymentType.INCOME_PAVILION2, shift_2),
+    ]
+    # Первый платёж заказа учитывается в аналитике как оплаченный заказ (если раньше не было доплаты)
+    new_order = await is_first_payment(db, order.id)
+    for amount, payment_type, shift_id in parts:
+        if amount > 0:
+            await record_payment(
+                db,
+                Payment(
+                    order_id=order.id,
+                    amount=amount,
+                    type=payment_type,
+                    employee_id=emp_id,
+                    shift_id=shift_id,
+                ),
+                new_order=new_order,
             )
-        )
-    if order.income_pavilion1 > 0:
-        db.add(
-            Payment(
-                order_id=order.id,
-                amount=order.income_pavilion1,
-                type=PaymentType.INCOME_PAVILION1,
-                employee_id=emp_id,
-                shift_id=shift_1,
-            )
-        )
-    if order.income_pavilion2 > 0:
-        db.add(
-            Payment(
-                order_id=order.id,
-                amount=order.income_pavilion2,
-                type=PaymentType.INCOME_PAVILION2,
-                employee_id=emp_id,
-                shift_id=shift_2,
-            )
-        )
-    order.status = OrderStatus.PAID
+            new_order = False
+    await reserve_for_paid_order(db, order)
+    set_order_status(db, order, OrderStatus.PAID, user.id)
     db.add(order)
     await db.flush()
     # Строка в кассу: ФИО и суммы по графам (заявление, госпошлина, ДКП, страховка, номера, итого)
@@ -171,12 +166,12 @@ async def pay_order(
             insurance=amounts["insurance"],
             plates=amounts["plates"],
             total=amounts["total"],
+            shift_id=shift_1,
         )
     )
     await db.flush()
     # Запись в историю заполнения формы (для подстановки по клику на странице формы)
-    db.add(FormHistory(order_id=order.id, form_data=order.form_data))
-    await db.flush()
+    await save_snapshot(db, order.id, order.form_data)
     logger.info("Оплата принята по заказу id=%s, строка кассы добавлена", order.id)
     return PayOrderResponse(
         order_id=order.id,
@@ -297,6 +292,42 @@ async def list_orders(
     return out
 
 
+@router.get("/search", response_model=OrderSearchPage)
+async def search_orders_endpoint(
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH, max_length=100, description="ФИО / наименование, VIN, госномер или телефон"),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequireOrdersListAccess),
+):
+    """Поиск заказов по клиенту, VIN, госномеру и телефону: самые релевантные сверху, страницы по курсору."""
+    try:
+        hits, next_cursor = await search_orders(db, q.strip(), cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = []
+    for o, rank in hits:
+        fd = o.form_data or {}
+        rows.append(OrderSearchHit(
+            id=o.id,
+            public_id=o.public_id,
+            status=o.status.value,
+            total_amount=o.total_amount,
+            state_duty_amount=o.state_duty_amount,
+            income_pavilion1=o.income_pavilion1,
+            income_pavilion2=o.income_pavilion2,
+            need_plate=o.need_plate,
+            service_type=o.service_type,
+            created_at=o.created_at.isoformat() if o.created_at else "",
+            client=(fd.get("client_fio") or fd.get("client_legal_name") or "").strip() or None,
+            vin=fd.get("vin"),
+            plate_number=fd.get("plate_number"),
+            phone=fd.get("client_phone"),
+            rank=rank,
+        ))
+    return OrderSearchPage(rows=rows, next_cursor=next_cursor)
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
@@ -330,10 +361,8 @@ async def get_order_detail(
     order = await _get_order(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
-    created_by_name = None
-    if order.employee_id:
-        r = await db.execute(select(Employee.name).where(Employee.id == order.employee_id))
-        created_by_name = r.scalar_one_or_none()
+    names = await employee_names(db, [order.employee_id])
+    created_by_name = names.get(order.employee_id)
     return OrderDetailResponse(
         id=order.id,
         public_id=order.public_id,
@@ -350,6 +379,20 @@ async def get_order_detail(
     )
 
 
+@router.get("/{order_id}/full", response_model=OrderFullResponse)
+async def get_order_full(
+    order_id: int,
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequireAnalyticsAccess),
+):
+    """Карточка заказа одним запросом: детали, платежи по типам, долг, резерв заготовок, выдача за номера."""
+    row = await fetch_order_full(db, order_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Заказ не найден")
+    names = await employee_names(db, employee_ids(row))
+    return build_order_full(row, names)
+
+
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
 
@@ -370,11 +413,11 @@ async def get_order_payments(
         raise HTTPException(status_code=404, detail="Заказ не найден")
     r = await db.execute(select(Payment).where(Payment.order_id == order_id).order_by(Payment.created_at))
     payments = r.scalars().all()
-    total_paid = sum(float(p.amount) for p in payments)
+    total_paid = sum((p.amount for p in payments), Decimal("0"))
     return {
         "payments": [{"amount": float(p.amount), "type": p.type.value, "created_at": p.created_at.isoformat() if p.created_at else ""} for p in payments],
-        "total_paid": total_paid,
-        "debt": float(order.total_amount) - total_paid,
+        "total_paid": float(total_paid),
+        "debt": float(order.total_amount - total_paid),
     }
 
 
@@ -393,15 +436,18 @@ async def pay_extra(
         raise HTTPException(status_code=404, detail="Заказ не найден")
     if not order.need_plate:
         raise HTTPException(status_code=400, detail="У заказа нет номера для доплаты")
-    shift_2 = await _current_shift_id(db, 2)
-    db.add(
+    shift_1 = await current_shift_id(db, 1)
+    shift_2 = await current_shift_id(db, 2)
+    await record_payment(
+        db,
         Payment(
             order_id=order.id,
             amount=body.amount,
             type=PaymentType.INCOME_PAVILION2,
             employee_id=_user.id,
             shift_id=shift_2,
-        )
+        ),
+        new_order=await is_first_payment(db, order.id),
     )
     # Строка в кассу: доплата за номера (ФИО из заказа, номера и итого = сумма доплаты)
     fd = order.form_data or {}
@@ -415,6 +461,7 @@ async def pay_extra(
             insurance=Decimal("0"),
             plates=Decimal(str(body.amount)),
             total=Decimal(str(body.amount)),
+            shift_id=shift_1,
         )
     )
     await db.flush()
@@ -422,21 +469,6 @@ async def pay_extra(
     return {"order_id": order.id, "amount": body.amount, "type": "INCOME_PAVILION2"}
 
 
-async def _get_or_create_stock(db: AsyncSession) -> PlateStock:
-    r = await db.execute(select(PlateStock).limit(1))
-    row = r.scalar_one_or_none()
-    if not row:
-        row = PlateStock(quantity=0)
-        db.add(row)
-        await db.flush()
-    return row
-
-
-def _plate_quantity_from_order(order: Order) -> int:
-    fd = order.form_data or {}
-    return max(1, int(fd.get("plate_quantity") or 1))
-
-
 @router.patch("/{order_id}/status")
 async def update_order_status(
     order_id: int,
@@ -453,36 +485,32 @@ async def update_order_status(
             status_code=400,
             detail=f"Переход из {order.status.value} в {new_status.value} невозможен",
         )
-    qty = _plate_quantity_from_order(order) if order.need_plate else 0
+    qty = plate_quantity_from_order(order) if order.need_plate else 0
+
+    # Оплата, отмеченная сменой статуса (без /pay): резерв заготовок, как в pay_order,
+    # иначе снятие резерва при COMPLETED / PROBLEM уведёт счётчики в минус
+    if new_status == OrderStatus.PAID:
+        await reserve_for_paid_order(db, order)
 
     # Резерв при переходе в изготовление
     if order.status == OrderStatus.PAID and new_status == OrderStatus.PLATE_IN_PROGRESS and qty > 0:
-        stock = await _get_or_create_stock(db)
-        res_sum = (await db.execute(
-            select(func.coalesce(func.sum(PlateReservation.quantity), 0))
-        )).scalar_one() or 0
-        available = stock.quantity - int(res_sum)
-        if available < qty:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Недостаточно заготовок на складе. Доступно: {available}, нужно: {qty}",
-            )
-        db.add(PlateReservation(order_id=order.id, quantity=qty))
-        await db.flush()
+        try:
+            await add_work_reservation(db, order, qty)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
     # Списание и снятие резерва при завершении
     if new_status == OrderStatus.COMPLETED and qty > 0:
-        await db.execute(delete(PlateReservation).where(PlateReservation.order_id == order.id))
-        stock = await _get_or_create_stock(db)
-        stock.quantity -= qty
-        db.add(stock)
-        await db.flush()
+        await consume_for_order(db, order, qty)
         logger.info("Списание со склада: заказ %s, кол-во %s", order.id, qty)
 
     # Снятие резерва при проблеме
-    if new_status == OrderStatus.PROBLEM and order.need_plate and qty > 0:
-        await db.execute(delete(PlateReservation).where(PlateReservation.order_id == order.id))
-        await db.flush()
+    if new_status == OrderStatus.PROBLEM and qty > 0:
+        await remove_work_reservations(db, order)
+
+    # Заказ уходит из невыданных — уменьшаем счётчик резерва склада
+    if new_status in (OrderStatus.COMPLETED, OrderStatus.PROBLEM):
+        await release_reserved(db, order)
 
     # При завершении заказа с номерами — добавляем запись в реестр выдачи денег за номера
     if new_status == OrderStatus.COMPLETED and order.need_plate:
@@ -512,6 +540,6 @@ async def update_order_status(
                 )
                 await db.flush()
 
-    order.status = new_status
+    set_order_status(db, order, new_status, _user.id)
     db.add(order)
     return {"order_id": order.id, "public_id": order.public_id, "status": new_status.value}
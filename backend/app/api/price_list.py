@@ -1,7 +1,7 @@
 from decimal import Decimal
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,31 +9,37 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.auth import RequireAdmin, RequireFormAccess, UserInfo
 from app.core.database import get_db
 from app.models import DocumentPrice
+from app.services import price_list_cache
 
 router = APIRouter(prefix="/price-list", tags=["price-list"])
 
+# Браузер хранит ответ у себя и каждый раз перепроверяет его по ETag (If-None-Match → 304)
+_CACHE_CONTROL = "private, no-cache"
 
-def _row_to_dict(row: DocumentPrice) -> dict:
-    return {
-        "id": row.id,
-        "template": row.template,
-        "label": row.label,
-        "price": float(row.price) if row.price is not None else 0,
-        "sort_order": row.sort_order,
-    }
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match: список ETag через запятую (возможно, слабых W/...) или *."""
+    for token in if_none_match.split(","):
+        token = token.strip()
+        if token == "*" or token.removeprefix("W/") == etag:
+            return True
+    return False
 
 
 @router.get("")
 async def get_price_list(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequireFormAccess),
 ):
-    """Прейскурант: список документов с ценами (для формы и админки)."""
-    r = await db.execute(
-        select(DocumentPrice).order_by(DocumentPrice.sort_order, DocumentPrice.id)
-    )
-    rows = r.scalars().all()
-    return [_row_to_dict(row) for row in rows]
+    """Прейскурант: список документов с ценами (для формы и админки). Из памяти; ETag — хеш содержимого."""
+    items, etag = await price_list_cache.get_items(db)
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return items
 
 
 class PriceListItemUpdate(BaseModel):
@@ -72,8 +78,6 @@ async def update_price_list(
     if sent_templates:
         await db.execute(delete(DocumentPrice).where(DocumentPrice.template.notin_(sent_templates)))
     await db.commit()
-    r = await db.execute(
-        select(DocumentPrice).order_by(DocumentPrice.sort_order, DocumentPrice.id)
-    )
-    rows = r.scalars().all()
-    return [_row_to_dict(row) for row in rows]
+    price_list_cache.invalidate()
+    items, _etag = await price_list_cache.get_items(db)
+    return items
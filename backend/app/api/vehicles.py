@@ -0,0 +1,27 @@
+"""Данные ТС по VIN из прошлых заказов: автозаполнение полей автомобиля в форме."""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth import RequireFormAccess, UserInfo
+from app.core.database import get_db
+from app.services.vehicle_service import get_vehicle
+
+router = APIRouter(prefix="/vehicles", tags=["vehicles"])
+
+
+@router.get("/{vin}")
+async def get_vehicle_by_vin(
+    vin: str,
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequireFormAccess),
+):
+    """Последние известные поля ТС (ключи как в form_data: brand_model, year, engine, …)."""
+    vehicle = await get_vehicle(db, vin)
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="ТС с таким VIN в заказах не найдено")
+    return {
+        "vin": vehicle.vin,
+        "order_id": vehicle.order_id,
+        "updated_at": vehicle.updated_at.isoformat() if vehicle.updated_at else None,
+        **vehicle.attributes,
+    }
@@ -3,13 +3,16 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.auth import RequirePlateAccess, UserInfo
-from app.core.database import get_db
+from app.api.auth import RequireAnalyticsAccess, RequirePlateAccess, UserInfo
+from app.core.database import get_db, async_session_maker
 from datetime import datetime
-from app.models import PlateStock, PlateReservation, PlateDefect, Order, OrderStatus
+from app.models import PlateReservedAmount, PlateReconcileRun
+from app.services.plate_forecast_service import HISTORY_DAYS, plate_forecast
+from app.services.plate_reconcile_service import last_reconcile_run, reconcile_plate_reservations
+from app.services.plate_stock_service import add_stock, defects_this_month, get_or_create_stock, register_defect
 
 router = APIRouter(prefix="/warehouse", tags=["warehouse"])
 
@@ -20,56 +23,46 @@ async def warehouse_root():
     return {"status": "ok", "module": "warehouse"}
 
 
-async def _get_or_create_stock(db: AsyncSession) -> PlateStock:
-    r = await db.execute(select(PlateStock).limit(1))
-    row = r.scalar_one_or_none()
-    if not row:
-        row = PlateStock(quantity=0)
-        db.add(row)
-        await db.flush()
-    return row
-
-
-def _plate_quantity_from_order(order: Order) -> int:
-    fd = order.form_data or {}
-    return max(1, int(fd.get("plate_quantity") or 1))
-
-
 @router.get("/plate-stock")
 async def get_plate_stock(
     db: AsyncSession = Depends(get_db),
     _user: UserInfo = Depends(RequirePlateAccess),
 ):
     """Текущий остаток, зарезервировано по невыданным заказам (PAID, PLATE_IN_PROGRESS, PLATE_READY)."""
-    stock = await _get_or_create_stock(db)
-    # Считаем по фактическим заказам из списка невыданных, а не по таблице резервов (чтобы учитывались и старые заказы без записи)
-    unissued_statuses = [OrderStatus.PAID, OrderStatus.PLATE_IN_PROGRESS, OrderStatus.PLATE_READY]
-    q_orders = (
-        select(Order)
-        .where(Order.need_plate == True, Order.status.in_(unissued_statuses))
+    # Счётчики ведутся при переходах статусов (plate_stock_service), здесь только чтение
+    stock = await get_or_create_stock(db)
+    r = await db.execute(
+        select(PlateReservedAmount)
+        .where(PlateReservedAmount.quantity > 0)
+        .order_by(PlateReservedAmount.total_amount.desc())
     )
-    orders_result = (await db.execute(q_orders)).scalars().all()
-    reserved = sum(_plate_quantity_from_order(o) for o in orders_result)
     reserved_breakdown = [
-        {"total_amount": float(o.total_amount), "quantity": _plate_quantity_from_order(o)}
-        for o in sorted(orders_result, key=lambda o: o.total_amount, reverse=True)
+        {"total_amount": float(row.total_amount), "quantity": row.quantity}
+        for row in r.scalars().all()
     ]
-    # Браков за текущий месяц
-    now = datetime.utcnow()
-    month_start = datetime(now.year, now.month, 1)
-    q_defects = select(func.coalesce(func.sum(PlateDefect.quantity), 0)).where(
-        PlateDefect.created_at >= month_start
-    )
-    defects_month = int((await db.execute(q_defects)).scalar_one() or 0)
     return {
         "quantity": stock.quantity,
-        "reserved": reserved,
-        "available": max(0, stock.quantity - reserved),
+        "reserved": stock.reserved,
+        "available": max(0, stock.quantity - stock.reserved),
         "reserved_breakdown": reserved_breakdown,
-        "defects_this_month": defects_month,
+        "defects_this_month": defects_this_month(stock, datetime.utcnow()),
     }
 
 
+@router.get("/plate-forecast")
+async def get_plate_forecast(
+    window: int = Query(14, ge=3, le=HISTORY_DAYS, description="Окно скользящего среднего, дней"),
+    lead_time_days: int = Query(7, ge=0, le=60, description="Срок поставки заготовок, дней"),
+    cover_days: int = Query(14, ge=1, le=120, description="На сколько дней после поставки должно хватить"),
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequirePlateAccess),
+):
+    """Прогноз расхода: средний расход в день, дней до исчерпания доступного остатка, сколько заказать."""
+    stock = await get_or_create_stock(db)
+    available = stock.quantity - stock.reserved
+    return await plate_forecast(db, available, window, lead_time_days, cover_days)
+
+
 class AddStockBody(BaseModel):
     amount: int
 
@@ -83,10 +76,7 @@ async def add_plate_stock(
     """Пополнить склад заготовок."""
     if body.amount <= 0:
         raise HTTPException(status_code=400, detail="Количество должно быть больше нуля")
-    stock = await _get_or_create_stock(db)
-    stock.quantity += body.amount
-    db.add(stock)
-    await db.flush()
+    stock = await add_stock(db, body.amount)
     return {"quantity": stock.quantity, "added": body.amount}
 
 
@@ -96,11 +86,38 @@ async def add_plate_defect(
     _user: UserInfo = Depends(RequirePlateAccess),
 ):
     """Списать 1 шт как брак (вычитается из остатка, учитывается в счётчике за месяц)."""
-    stock = await _get_or_create_stock(db)
+    stock = await get_or_create_stock(db, for_update=True)
     if stock.quantity < 1:
         raise HTTPException(status_code=400, detail="На складе нет заготовок для списания брака")
-    stock.quantity -= 1
-    db.add(stock)
-    db.add(PlateDefect(quantity=1))
-    await db.flush()
+    await register_defect(db, stock, 1)
     return {"quantity": stock.quantity, "defect": 1}
+
+
+def _reconcile_run_to_dict(run: PlateReconcileRun) -> dict:
+    return {
+        "id": run.id,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "orders_checked": run.orders_checked,
+        "drift_count": run.drift_count,
+        "details": run.details or [],
+    }
+
+
+@router.get("/reconcile")
+async def get_last_reconcile(
+    db: AsyncSession = Depends(get_db),
+    _user: UserInfo = Depends(RequirePlateAccess),
+):
+    """Последняя сверка резервов с невыданными заказами (drift_count = 0 — счётчики склада сходятся)."""
+    run = await last_reconcile_run(db)
+    return {"last_run": _reconcile_run_to_dict(run) if run else None}
+
+
+@router.post("/reconcile")
+async def run_reconcile(
+    _user: UserInfo = Depends(RequireAnalyticsAccess),
+):
+    """Запустить сверку вручную (менеджер/админ). Обычно она идёт в фоне раз в plate_reconcile_interval_minutes."""
+    run = await reconcile_plate_reservations(async_session_maker)
+    return {"last_run": _reconcile_run_to_dict(run)}
@@ -7,6 +7,17 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 60 * 24 * 7  # 7 дней
 
+    # Стоимость bcrypt (2^rounds итераций); старые хеши пересчитываются при входе.
+    # password_hash_workers — потоков для bcrypt (одновременных проверок паролей)
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+
+    # Сколько секунд кешировать активность и роли сотрудников для проверки токена
+    employee_cache_ttl_seconds: int = 30
+
+    # Сколько секунд держать прейскурант в памяти (изменения из другого воркера видны не позже)
+    price_list_cache_ttl_seconds: int = 60
+
     # Суперпользователь создаётся при первом запуске, если такого логина ещё нет.
     # Задайте в .env свои значения и смените пароль после первого входа.
     superuser_login: str = "sergey151"
@@ -17,6 +28,16 @@ class Settings(BaseSettings):
     # Не задано или пусто — разрешаются все origins (для разработки).
     cors_origins: str = ""
 
+    # Фоновая сверка резервов заготовок с невыданными заказами (0 — не запускать по расписанию)
+    plate_reconcile_interval_minutes: int = 60
+    plate_reconcile_batch_size: int = 500
+
+    # Сверка накопительных сумм открытых смен с платежами, минуты (0 — не запускать)
+    shift_totals_check_interval_minutes: int = 30
+
+    # Колоночный кеш платежей для аналитики (работает, только если установлен NumPy)
+    analytics_cache_enabled: bool = True
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
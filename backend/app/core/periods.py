@@ -0,0 +1,109 @@
+"""
+Периоды и постраничная выборка: разбор дат YYYY-MM-DD из query и keyset-курсоры (created_at, id).
+Ошибки формата — ValueError с текстом для пользователя (эндпоинты отдают 400).
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+
+def parse_day(value: Optional[str], name: str = "дата") -> Optional[date]:
+    """'YYYY-MM-DD' → date; пустое значение → None."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Неверный формат ({name}): ожидается YYYY-MM-DD")
+
+
+def period_bounds(date_from: Optional[str], date_to: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Границы периода [start, end) в datetime; date_to включительно. Любая граница может быть None."""
+    d_from = parse_day(date_from, "date_from")
+    d_to = parse_day(date_to, "date_to")
+    if d_from and d_to and d_from > d_to:
+        raise ValueError("Начало периода позже конца")
+    start = datetime.combine(d_from, datetime.min.time()) if d_from else None
+    end = datetime.combine(d_to + timedelta(days=1), datetime.min.time()) if d_to else None
+    return start, end
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return f"{created_at.isoformat()}|{row_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Курсор из encode_cursor → (created_at, id) последней строки предыдущей страницы."""
+    try:
+        ts, row_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError:
+        raise ValueError("Неверный курсор страницы")
+
+
+# Периоды аналитики
+PERIODS = ("day", "week", "month")
+
+
+def period_range(period: str, today: date) -> Tuple[date, date]:
+    """Текущий календарный период, содержащий today: (первый день, today). Неизвестный период — ValueError."""
+    if period == "day":
+        return today, today
+    if period == "week":
+        return today - timedelta(days=today.weekday()), today
+    if period == "month":
+        return today.replace(day=1), today
+    raise ValueError("Период: day, week или month")
+
+
+def previous_range(period: str, start: date, end: date, explicit: bool = False) -> Tuple[date, date]:
+    """
+    Период для сравнения. Календарный (explicit=False) — весь предыдущий день/неделя/месяц;
+    произвольный диапазон — такой же длины непосредственно перед start.
+    """
+    if explicit:
+        length = end - start
+        prev_end = start - timedelta(days=1)
+        return prev_end - length, prev_end
+    prev_end = start - timedelta(days=1)
+    if period == "day":
+        return prev_end, prev_end
+    if period == "week":
+        return prev_end - timedelta(days=6), prev_end
+    return prev_end.replace(day=1), prev_end
+
+
+def resolve_range(period: str, date_from: Optional[str], date_to: Optional[str], today: date) -> Tuple[date, date, bool]:
+    """
+    Диапазон дат (включительно) из query: date_from/date_to, иначе текущий период.
+    Третье значение — задан ли диапазон явно. Ошибки — ValueError.
+    """
+    if period not in PERIODS:
+        raise ValueError("Период: day, week или month")
+    d_from = parse_day(date_from, "date_from")
+    d_to = parse_day(date_to, "date_to")
+    if not d_from and not d_to:
+        start, end = period_range(period, today)
+        return start, end, False
+    start = d_from or period_range(period, d_to)[0]
+    end = d_to or today
+    if start > end:
+        raise ValueError("Начало периода позже конца")
+    return start, end, True
+
+
+def trunc_period(d: date, group_by: str) -> date:
+    """Начало дня/недели (понедельник)/месяца, содержащего d — как date_trunc в Postgres."""
+    if group_by == "week":
+        return d - timedelta(days=d.weekday())
+    if group_by == "month":
+        return d.replace(day=1)
+    return d
+
+
+def next_period(start: date, group_by: str) -> date:
+    """Начало следующего периода после периода, начинающегося в start."""
+    if group_by == "week":
+        return start + timedelta(days=7)
+    if group_by == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
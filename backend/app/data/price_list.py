@@ -17,14 +17,15 @@ PRICE_LIST = [
     {"template": "number.docx", "label": "Изготовление номера", "price": Decimal("1500")},
 ]
 
+# Позиции по шаблону (поиск за O(1) вместо прохода по списку)
+_BY_TEMPLATE = {item["template"]: item for item in PRICE_LIST}
+
+
 def get_price_by_template(template: str) -> Optional[Decimal]:
-    for item in PRICE_LIST:
-        if item["template"] == template:
-            return item["price"]
-    return None
+    item = _BY_TEMPLATE.get(template)
+    return item["price"] if item else None
+
 
 def get_label_by_template(template: str) -> str:
-    for item in PRICE_LIST:
-        if item["template"] == template:
-            return item["label"]
-    return template
+    item = _BY_TEMPLATE.get(template)
+    return item["label"] if item else template
@@ -1,13 +1,15 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sqlalchemy import select, text
+from sqlalchemy import bindparam, select, text, update
 
 from app.core.database import engine, Base, async_session_maker
 from app.core.logging_config import setup_logging, get_logger
-from app.models import DocumentPrice, Employee
+from app.models import DocumentPrice, Employee, FormHistory
+from app.models.order import ORDER_SEARCH_TEXT_SQL
 from app.models.employee import EmployeeRole
 from app.data.price_list import PRICE_LIST as DEFAULT_PRICE_LIST
 from app.api.orders import router as orders_router
@@ -19,13 +21,53 @@ from app.api.cash import router as cash_router
 from app.api.price_list import router as price_list_router
 from app.api.warehouse import router as warehouse_router
 from app.api.form_history import router as form_history_router
+from app.api.clients import router as clients_router
+from app.api.vehicles import router as vehicles_router
 from app.services.auth_service import hash_password
+from app.services import analytics_cache, client_index, form_history_service
+from app.services.analytics_service import REBUILD_ROLLUP_SQL
+from app.services.plate_reconcile_service import run_reconciler_forever
+from app.services.plate_stock_service import plate_quantity_sql
+from app.services.shift_service import run_shift_totals_check_forever
+from app.services.vehicle_service import VEHICLES_BACKFILL_SQL
 from app.config import settings
 
 setup_logging()
 logger = get_logger(__name__)
 
 
+async def _backfill_form_history(conn) -> None:
+    """Хеш и поля поиска для записей form_history без content_hash: пачками по id, затем удаление повторов и NOT NULL."""
+    after_id = 0
+    total = 0
+    while True:
+        r = await conn.execute(
+            select(FormHistory.id, FormHistory.form_data, FormHistory.created_at)
+            .where(FormHistory.content_hash.is_(None), FormHistory.id > after_id)
+            .order_by(FormHistory.id)
+            .limit(form_history_service.BACKFILL_BATCH)
+        )
+        rows = r.all()
+        if not rows:
+            break
+        await conn.execute(
+            update(FormHistory).where(FormHistory.id == bindparam("b_id")).values(
+                content_hash=bindparam("content_hash"),
+                client_name=bindparam("client_name"),
+                vin=bindparam("vin"),
+                plate_number=bindparam("plate_number"),
+                phone=bindparam("phone"),
+                used_at=bindparam("used_at"),
+            ),
+            form_history_service.backfill_values(rows),
+        )
+        after_id = rows[-1][0]
+        total += len(rows)
+    r = await conn.execute(text(form_history_service.DEDUPLICATE_SQL))
+    await conn.execute(text("ALTER TABLE form_history ALTER COLUMN content_hash SET NOT NULL"))
+    logger.info("form_history: записей=%s, удалено повторов=%s", total, r.rowcount)
+
+
 async def ensure_columns_and_enum():
     """Добавить колонки login, password_hash и ROLE_MANAGER в enum для старых БД."""
     async with engine.begin() as conn:
@@ -75,6 +117,71 @@ async def ensure_columns_and_enum():
                 END IF;
             END $$;
         """))
+        # Накопительные суммы платежей на строке смены; заполняются один раз из payments
+        await conn.execute(text("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema='public' AND table_name='cash_shifts' AND column_name='total_state_duty') THEN
+                    ALTER TABLE cash_shifts
+                        ADD COLUMN total_state_duty NUMERIC(12,2) NOT NULL DEFAULT 0,
+                        ADD COLUMN total_income_pavilion1 NUMERIC(12,2) NOT NULL DEFAULT 0,
+                        ADD COLUMN total_income_pavilion2 NUMERIC(12,2) NOT NULL DEFAULT 0;
+                    UPDATE cash_shifts s SET
+                        total_state_duty = p.state_duty,
+                        total_income_pavilion1 = p.income1,
+                        total_income_pavilion2 = p.income2
+                    FROM (
+                        SELECT shift_id,
+                               COALESCE(SUM(amount) FILTER (WHERE type = 'STATE_DUTY'), 0) AS state_duty,
+                               COALESCE(SUM(amount) FILTER (WHERE type = 'INCOME_PAVILION1'), 0) AS income1,
+                               COALESCE(SUM(amount) FILTER (WHERE type = 'INCOME_PAVILION2'), 0) AS income2
+                        FROM payments WHERE shift_id IS NOT NULL GROUP BY shift_id
+                    ) p
+                    WHERE p.shift_id = s.id;
+                END IF;
+            END $$;
+        """))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cash_shifts_open ON cash_shifts (pavilion) WHERE status = 'OPEN'"))
+        # Учёт по сотрудникам: платежи сотрудника за период
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_payments_employee_id_created_at ON payments (employee_id, created_at)"
+        ))
+        # Дневные итоги аналитики (таблица daily_rollup создаётся create_all); пустые — заполнить из payments
+        r = await conn.execute(text("SELECT NOT EXISTS (SELECT 1 FROM daily_rollup) AND EXISTS (SELECT 1 FROM payments)"))
+        if r.scalar():
+            await conn.execute(text(REBUILD_ROLLUP_SQL), {"date_from": None, "date_to": None})
+            logger.info("daily_rollup заполнена из payments")
+        # История статусов (создаётся create_all); для старых заказов — создание и оплата (первый платёж)
+        r = await conn.execute(text("SELECT NOT EXISTS (SELECT 1 FROM order_status_history) AND EXISTS (SELECT 1 FROM orders)"))
+        if r.scalar():
+            await conn.execute(text("""
+                INSERT INTO order_status_history (order_id, from_status, to_status, employee_id, changed_at)
+                SELECT id, NULL, 'AWAITING_PAYMENT', employee_id, created_at
+                FROM orders WHERE created_at IS NOT NULL
+            """))
+            await conn.execute(text("""
+                INSERT INTO order_status_history (order_id, from_status, to_status, employee_id, changed_at)
+                SELECT DISTINCT ON (order_id) order_id, 'AWAITING_PAYMENT', 'PAID', employee_id, created_at
+                FROM payments ORDER BY order_id, id
+            """))
+            logger.info("order_status_history заполнена для старых заказов (создание и оплата)")
+        # Поиск заказов: генерируемая колонка search_text и полнотекстовый индекс (русская конфигурация)
+        await conn.execute(text(f"""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema='public' AND table_name='orders' AND column_name='search_text') THEN
+                    ALTER TABLE orders ADD COLUMN search_text TEXT GENERATED ALWAYS AS ({ORDER_SEARCH_TEXT_SQL}) STORED;
+                END IF;
+            END $$;
+        """))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_orders_search_tsv ON orders USING gin (to_tsvector('russian'::regconfig, search_text))"
+        ))
+        # Данные ТС по VIN (таблица vehicles создаётся create_all); пустая — заполнить из заказов
+        r = await conn.execute(text("SELECT NOT EXISTS (SELECT 1 FROM vehicles) AND EXISTS (SELECT 1 FROM orders)"))
+        if r.scalar():
+            await conn.execute(text(VEHICLES_BACKFILL_SQL))
+            logger.info("vehicles заполнена по заказам каждого VIN")
         # Таблица cash_rows — таблица кассы (ФИО, заявление, госпошлина, ДКП, страховка, номера, итого)
         await conn.execute(text("""
             CREATE TABLE IF NOT EXISTS cash_rows (
@@ -97,6 +204,9 @@ async def ensure_columns_and_enum():
                 END IF;
             END $$;
         """))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_cash_rows_created_at_id ON cash_rows (created_at, id)"
+        ))
         # Касса номеров: фамилия и сумма (сумма может быть отрицательной)
         await conn.execute(text("""
             CREATE TABLE IF NOT EXISTS plate_cash_rows (
@@ -114,6 +224,59 @@ async def ensure_columns_and_enum():
                 END IF;
             END $$;
         """))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_plate_cash_rows_created_at_id ON plate_cash_rows (created_at, id)"
+        ))
+        # Привязка строк касс к сменам (для Z-отчёта); старые строки — по времени смены павильона
+        await conn.execute(text("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema='public' AND table_name='cash_rows' AND column_name='shift_id') THEN
+                    ALTER TABLE cash_rows ADD COLUMN shift_id INTEGER REFERENCES cash_shifts(id);
+                    UPDATE cash_rows c SET shift_id = s.id FROM cash_shifts s
+                    WHERE s.pavilion = 1 AND c.created_at >= s.opened_at
+                      AND (s.closed_at IS NULL OR c.created_at < s.closed_at);
+                END IF;
+                IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema='public' AND table_name='plate_cash_rows' AND column_name='shift_id') THEN
+                    ALTER TABLE plate_cash_rows ADD COLUMN shift_id INTEGER REFERENCES cash_shifts(id);
+                    UPDATE plate_cash_rows c SET shift_id = s.id FROM cash_shifts s
+                    WHERE s.pavilion = 2 AND c.created_at >= s.opened_at
+                      AND (s.closed_at IS NULL OR c.created_at < s.closed_at);
+                END IF;
+            END $$;
+        """))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cash_rows_shift_id ON cash_rows (shift_id)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_plate_cash_rows_shift_id ON plate_cash_rows (shift_id)"))
+        # Накопительный остаток кассы номеров; при добавлении колонки считается по всей истории
+        await conn.execute(text("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema='public' AND table_name='plate_cash_rows' AND column_name='balance') THEN
+                    ALTER TABLE plate_cash_rows ADD COLUMN balance NUMERIC(12,2);
+                    UPDATE plate_cash_rows p SET balance = s.balance
+                    FROM (
+                        SELECT id, SUM(amount) OVER (ORDER BY created_at, id) AS balance FROM plate_cash_rows
+                    ) s
+                    WHERE p.id = s.id;
+                END IF;
+            END $$;
+        """))
+        # Z-отчёты закрытых смен
+        await conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS shift_reports (
+                id SERIAL PRIMARY KEY,
+                shift_id INTEGER NOT NULL UNIQUE REFERENCES cash_shifts(id),
+                pavilion INTEGER NOT NULL,
+                created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                rows_count INTEGER NOT NULL DEFAULT 0,
+                column_totals JSONB NOT NULL,
+                payments JSONB NOT NULL,
+                opening_balance NUMERIC(12,2) NOT NULL,
+                expected_balance NUMERIC(12,2) NOT NULL,
+                declared_balance NUMERIC(12,2),
+                discrepancy NUMERIC(12,2)
+            );
+        """))
         # Реестр выдач денег за номера (между кассой документов и кассой номеров)
         await conn.execute(text("""
             CREATE TABLE IF NOT EXISTS plate_payouts (
@@ -150,6 +313,83 @@ async def ensure_columns_and_enum():
                 created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
             );
         """))
+        # Счётчики склада (резерв, браки за месяц) и разбивка резерва по сумме заказа
+        await conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS plate_reserved_amounts (
+                total_amount NUMERIC(12,2) PRIMARY KEY,
+                quantity INTEGER NOT NULL DEFAULT 0
+            );
+        """))
+        # Счётчики склада заполняются по текущим данным, когда колонки только что добавлены или строки склада
+        # ещё нет (таблица создана create_all): иначе UPDATE ничего не обновит и резерв оплаченных заказов пропадёт
+        await conn.execute(text(f"""
+            DO $$
+            DECLARE
+                added boolean := NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema='public' AND table_name='plate_stock' AND column_name='reserved');
+            BEGIN
+                IF added THEN
+                    ALTER TABLE plate_stock ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0;
+                    ALTER TABLE plate_stock ADD COLUMN reserved_in_work INTEGER NOT NULL DEFAULT 0;
+                    ALTER TABLE plate_stock ADD COLUMN defects_month INTEGER NOT NULL DEFAULT 0;
+                    ALTER TABLE plate_stock ADD COLUMN defects_month_start DATE;
+                END IF;
+                IF added OR NOT EXISTS (SELECT 1 FROM plate_stock) THEN
+                    INSERT INTO plate_stock (quantity, reserved, reserved_in_work, defects_month, updated_at)
+                    SELECT 0, 0, 0, 0, now() AT TIME ZONE 'utc'
+                    WHERE NOT EXISTS (SELECT 1 FROM plate_stock);
+                    UPDATE plate_stock SET
+                        reserved = COALESCE((
+                            SELECT SUM({plate_quantity_sql('o.form_data')})
+                            FROM orders o
+                            WHERE o.need_plate AND o.status IN ('PAID', 'PLATE_IN_PROGRESS', 'PLATE_READY')
+                        ), 0),
+                        reserved_in_work = COALESCE((SELECT SUM(quantity) FROM plate_reservations), 0),
+                        defects_month = COALESCE((
+                            SELECT SUM(quantity) FROM plate_defects
+                            WHERE created_at >= date_trunc('month', now() AT TIME ZONE 'utc')
+                        ), 0),
+                        defects_month_start = date_trunc('month', now() AT TIME ZONE 'utc')::date;
+                    DELETE FROM plate_reserved_amounts;
+                    INSERT INTO plate_reserved_amounts (total_amount, quantity)
+                    SELECT o.total_amount, SUM({plate_quantity_sql('o.form_data')})
+                    FROM orders o
+                    WHERE o.need_plate AND o.status IN ('PAID', 'PLATE_IN_PROGRESS', 'PLATE_READY')
+                    GROUP BY o.total_amount;
+                END IF;
+            END $$;
+        """))
+        # Журнал сверки резервов заготовок
+        await conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS plate_reconcile_runs (
+                id SERIAL PRIMARY KEY,
+                started_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                finished_at TIMESTAMP WITHOUT TIME ZONE,
+                orders_checked INTEGER NOT NULL DEFAULT 0,
+                drift_count INTEGER NOT NULL DEFAULT 0,
+                details JSONB
+            );
+        """))
+        # Движения склада заготовок (для прогноза расхода)
+        await conn.execute(text("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'stockmovementkind') THEN
+                    CREATE TYPE stockmovementkind AS ENUM ('ADD', 'CONSUME', 'DEFECT');
+                END IF;
+            END $$;
+        """))
+        await conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS plate_stock_movements (
+                id SERIAL PRIMARY KEY,
+                created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+                kind stockmovementkind NOT NULL,
+                quantity INTEGER NOT NULL,
+                order_id INTEGER REFERENCES orders(id) ON DELETE SET NULL
+            );
+        """))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_plate_stock_movements_created_at ON plate_stock_movements (created_at)"
+        ))
         # История заполнения формы (при «Деньги получены»)
         await conn.execute(text("""
             CREATE TABLE IF NOT EXISTS form_history (
@@ -159,6 +399,37 @@ async def ensure_columns_and_enum():
                 created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
             );
         """))
+        # Дедупликация и поиск по истории: хеш содержимого и нормализованные поля
+        await conn.execute(text("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema='public' AND table_name='form_history' AND column_name='content_hash') THEN
+                    ALTER TABLE form_history ADD COLUMN content_hash VARCHAR(64);
+                    ALTER TABLE form_history ADD COLUMN client_name VARCHAR(255);
+                    ALTER TABLE form_history ADD COLUMN vin VARCHAR(32);
+                    ALTER TABLE form_history ADD COLUMN plate_number VARCHAR(32);
+                    ALTER TABLE form_history ADD COLUMN phone VARCHAR(32);
+                    ALTER TABLE form_history ADD COLUMN used_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc');
+                END IF;
+            END $$;
+        """))
+        # Перенос и NOT NULL — только пока content_hash допускает NULL (колонка только что добавлена
+        # или прошлый перенос не завершился); в остальные запуски — без сканирования и блокировки таблицы
+        r = await conn.execute(text(
+            "SELECT is_nullable = 'YES' FROM information_schema.columns "
+            "WHERE table_schema='public' AND table_name='form_history' AND column_name='content_hash'"
+        ))
+        if r.scalar():
+            await _backfill_form_history(conn)
+        await conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_form_history_content_hash ON form_history (content_hash)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_form_history_used_at ON form_history (used_at)"))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_form_history_client_name ON form_history (lower(client_name) text_pattern_ops)"
+        ))
+        for column in ("vin", "plate_number", "phone"):
+            await conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_form_history_{column} ON form_history ({column} text_pattern_ops)"
+            ))
     try:
         async with engine.connect() as conn:
             await conn.execute(text("ALTER TYPE employeerole ADD VALUE 'ROLE_MANAGER'"))
@@ -166,6 +437,15 @@ async def ensure_columns_and_enum():
     except Exception as e:
         if "already exists" not in str(e).lower():
             logger.warning("Enum ROLE_MANAGER: %s", e)
+    # Триграммный индекс для поиска заказов; CREATE EXTENSION может требовать прав владельца БД
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_orders_search_trgm ON orders USING gin (search_text gin_trgm_ops)"
+            ))
+    except Exception as e:
+        logger.warning("pg_trgm (поиск заказов): %s", e)
 
 
 async def ensure_superuser():
@@ -183,7 +463,7 @@ async def ensure_superuser():
             name=name,
             role=EmployeeRole.ROLE_ADMIN,
             login=login,
-            password_hash=hash_password(password),
+            password_hash=await hash_password(password),
             is_active=True,
         )
         session.add(emp)
@@ -226,7 +506,22 @@ async def lifespan(app: FastAPI):
         await seed_document_prices()
     except Exception as e:
         logger.warning("Прейскурант: %s", e)
+    background = []
+    if settings.plate_reconcile_interval_minutes > 0:
+        background.append(asyncio.create_task(
+            run_reconciler_forever(async_session_maker, settings.plate_reconcile_interval_minutes)
+        ))
+    if settings.shift_totals_check_interval_minutes > 0:
+        background.append(asyncio.create_task(
+            run_shift_totals_check_forever(async_session_maker, settings.shift_totals_check_interval_minutes)
+        ))
+    if analytics_cache.available():
+        background.append(asyncio.create_task(analytics_cache.load(async_session_maker)))
+    background.append(asyncio.create_task(client_index.load(async_session_maker)))
     yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
     await engine.dispose()
 
 
@@ -270,6 +565,8 @@ app.include_router(auth_router)
 app.include_router(employees_router)
 app.include_router(warehouse_router)
 app.include_router(form_history_router)
+app.include_router(clients_router)
+app.include_router(vehicles_router)
 
 
 @app.get("/health")
@@ -6,12 +6,19 @@ from app.models.payment import Payment, PaymentType
 from app.models.plate import Plate, PlateStatus
 from app.models.cash_shift import CashShift, ShiftStatus
 from app.models.cash_row import CashRow
+from app.models.shift_report import ShiftReport
 from app.models.plate_cash_row import PlateCashRow
 from app.models.plate_stock import PlateStock
+from app.models.plate_reserved_amount import PlateReservedAmount
+from app.models.plate_reconcile_run import PlateReconcileRun
+from app.models.plate_stock_movement import PlateStockMovement, StockMovementKind
 from app.models.plate_reservation import PlateReservation
 from app.models.plate_defect import PlateDefect
 from app.models.form_history import FormHistory
 from app.models.plate_payout import PlatePayout
+from app.models.daily_rollup import DailyRollup
+from app.models.order_status_history import OrderStatusHistory
+from app.models.vehicle import Vehicle
 
 __all__ = [
     "Base",
@@ -19,6 +26,7 @@ __all__ = [
     "PlateCashRow",
     "CashShift",
     "ShiftStatus",
+    "ShiftReport",
     "DocumentPrice",
     "Employee",
     "EmployeeRole",
@@ -29,8 +37,15 @@ __all__ = [
     "Plate",
     "PlateStatus",
     "PlateStock",
+    "PlateReservedAmount",
+    "PlateReconcileRun",
+    "PlateStockMovement",
+    "StockMovementKind",
     "PlateReservation",
     "PlateDefect",
     "FormHistory",
     "PlatePayout",
+    "DailyRollup",
+    "OrderStatusHistory",
+    "Vehicle",
 ]
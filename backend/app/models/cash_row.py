@@ -1,7 +1,8 @@
 """Строка кассы: ФИО и суммы по графам (заявление, госпошлина, ДКП, страховка, номера, итого)."""
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import DateTime, Numeric, String
+from typing import Optional
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -10,6 +11,10 @@ from app.core.database import Base
 class CashRow(Base):
     """Одна строка в таблице кассы — редактируемые ячейки."""
     __tablename__ = "cash_rows"
+    __table_args__ = (
+        Index("ix_cash_rows_created_at_id", "created_at", "id"),
+        Index("ix_cash_rows_shift_id", "shift_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -20,3 +25,5 @@ class CashRow(Base):
     insurance: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)     # Страховка
     plates: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)       # Номера
     total: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)        # Итого
+    # Смена павильона 1, открытая в момент записи строки
+    shift_id: Mapped[Optional[int]] = mapped_column(ForeignKey("cash_shifts.id"), nullable=True)
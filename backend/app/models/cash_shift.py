@@ -29,6 +29,17 @@ class CashShift(Base):
     status: Mapped[ShiftStatus] = mapped_column(
         Enum(ShiftStatus), default=ShiftStatus.OPEN, nullable=False
     )
+    # Накопительные суммы платежей смены по PaymentType (меняются в транзакции платежа)
+    total_state_duty: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)
+    total_income_pavilion1: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)
+    total_income_pavilion2: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)
 
     opened_by = relationship("Employee", foreign_keys=[opened_by_id])
     closed_by = relationship("Employee", foreign_keys=[closed_by_id])
+
+    @property
+    def total_payments(self) -> Decimal:
+        return sum(
+            (self.total_state_duty, self.total_income_pavilion1, self.total_income_pavilion2),
+            Decimal("0"),
+        )
@@ -0,0 +1,25 @@
+"""Дневные итоги платежей для аналитики: (день, павильон, тип платежа, сотрудник) → сумма и количество."""
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import Date, Enum, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.payment import PaymentType
+
+
+class DailyRollup(Base):
+    """
+    Увеличивается в транзакции каждого платежа (payment_service.record_payment).
+    employee_id = 0 — платёж без сотрудника. orders_count — оплаченные заказы: заказ
+    учитывается один раз, в строке своего первого платежа.
+    """
+    __tablename__ = "daily_rollup"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    pavilion: Mapped[int] = mapped_column(Integer, primary_key=True)
+    payment_type: Mapped[PaymentType] = mapped_column(Enum(PaymentType), primary_key=True)
+    employee_id: Mapped[int] = mapped_column(Integer, primary_key=True, default=0)
+    amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"), nullable=False)
+    payments_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
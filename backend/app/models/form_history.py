@@ -1,7 +1,7 @@
 """История заполнения формы: снимок form_data при нажатии «Деньги получены»."""
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy import DateTime, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -9,10 +9,28 @@ from app.core.database import Base
 
 
 class FormHistory(Base):
-    """Запись истории: данные формы на момент приёма оплаты."""
+    """
+    Запись истории: данные формы на момент приёма оплаты. Одинаковые снимки хранятся один раз
+    (content_hash), повторная оплата с теми же данными только обновляет used_at и order_id.
+    client_name, vin, plate_number, phone — нормализованные поля для поиска и краткого списка
+    (индекс по lower(client_name) создаётся в ensure_columns_and_enum).
+    """
     __tablename__ = "form_history"
+    __table_args__ = (
+        Index("ix_form_history_content_hash", "content_hash", unique=True),
+        Index("ix_form_history_used_at", "used_at"),
+        Index("ix_form_history_vin", "vin", postgresql_ops={"vin": "text_pattern_ops"}),
+        Index("ix_form_history_plate_number", "plate_number", postgresql_ops={"plate_number": "text_pattern_ops"}),
+        Index("ix_form_history_phone", "phone", postgresql_ops={"phone": "text_pattern_ops"}),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    order_id: Mapped[Optional[int]] = mapped_column(ForeignKey("orders.id"), nullable=True)
+    order_id: Mapped[Optional[int]] = mapped_column(ForeignKey("orders.id", ondelete="SET NULL"), nullable=True)
     form_data: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    client_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    vin: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    plate_number: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    phone: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
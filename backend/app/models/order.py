@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
-from sqlalchemy import String, Enum, Boolean, Numeric, DateTime, ForeignKey, Text
+from sqlalchemy import String, Enum, Boolean, Numeric, DateTime, ForeignKey, Text, Computed
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -20,6 +20,19 @@ class OrderStatus(str, enum.Enum):
     PROBLEM = "PROBLEM"
 
 
+# Текст для поиска заказов (order_search_service): клиент, VIN и госномер без пробелов, цифры телефона.
+# Генерируемая колонка: индексы GIN (pg_trgm и to_tsvector('russian')) строятся по ней.
+ORDER_SEARCH_TEXT_SQL = (
+    "lower("
+    "coalesce(form_data->>'client_fio', '') || ' ' || "
+    "coalesce(form_data->>'client_legal_name', '') || ' ' || "
+    "regexp_replace(coalesce(form_data->>'vin', ''), '\\s', '', 'g') || ' ' || "
+    "regexp_replace(coalesce(form_data->>'plate_number', ''), '\\s', '', 'g') || ' ' || "
+    "regexp_replace(coalesce(form_data->>'client_phone', ''), '\\D', '', 'g')"
+    ")"
+)
+
+
 class Order(Base):
     __tablename__ = "orders"
 
@@ -38,6 +51,9 @@ class Order(Base):
     need_plate: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     service_type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     form_data: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    search_text: Mapped[Optional[str]] = mapped_column(
+        Text, Computed(ORDER_SEARCH_TEXT_SQL, persisted=True), deferred=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
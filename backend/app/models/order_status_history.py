@@ -0,0 +1,27 @@
+"""История статусов заказа: каждая смена статуса с моментом перехода (для аналитики сроков и выдачи)."""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Enum, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.order import OrderStatus
+
+
+class OrderStatusHistory(Base):
+    """
+    Пишется в транзакции смены статуса (order_status.set_order_status). from_status = NULL —
+    заказ создан. Для старых заказов при первом запуске восстановлены только создание и оплата.
+    """
+    __tablename__ = "order_status_history"
+    __table_args__ = (
+        Index("ix_order_status_history_order_id", "order_id"),
+        Index("ix_order_status_history_to_status_changed_at", "to_status", "changed_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    from_status: Mapped[Optional[OrderStatus]] = mapped_column(Enum(OrderStatus), nullable=True)
+    to_status: Mapped[OrderStatus] = mapped_column(Enum(OrderStatus), nullable=False)
+    employee_id: Mapped[Optional[int]] = mapped_column(ForeignKey("employees.id"), nullable=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
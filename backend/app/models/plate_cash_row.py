@@ -1,7 +1,8 @@
 """Касса номеров: строка — фамилия и сумма (сумма может быть отрицательной, например изъятие из кассы)."""
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import DateTime, Numeric, String
+from typing import Optional
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -9,8 +10,16 @@ from app.core.database import Base
 
 class PlateCashRow(Base):
     __tablename__ = "plate_cash_rows"
+    __table_args__ = (
+        Index("ix_plate_cash_rows_created_at_id", "created_at", "id"),
+        Index("ix_plate_cash_rows_shift_id", "shift_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     client_name: Mapped[str] = mapped_column(String(255), default="", nullable=False)
     amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"), nullable=False)
+    # Остаток кассы после этой строки в порядке (created_at, id); см. plate_cash_service
+    balance: Mapped[Optional[Decimal]] = mapped_column(Numeric(12, 2), nullable=True)
+    # Смена павильона 2, открытая в момент записи строки
+    shift_id: Mapped[Optional[int]] = mapped_column(ForeignKey("cash_shifts.id"), nullable=True)
@@ -0,0 +1,21 @@
+"""Журнал сверки резервов заготовок с невыданными заказами."""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class PlateReconcileRun(Base):
+    """Один запуск сверки: сколько заказов проверено, сколько расхождений найдено и исправлено."""
+    __tablename__ = "plate_reconcile_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    orders_checked: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    drift_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Список расхождений (первые N): [{"kind": ..., "order_id": ..., "expected": ..., "actual": ...}]
+    details: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True)
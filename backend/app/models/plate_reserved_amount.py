@@ -0,0 +1,14 @@
+"""Разбивка резерва заготовок по сумме заказа (для блока «зарезервировано» на странице склада)."""
+from decimal import Decimal
+from sqlalchemy import Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class PlateReservedAmount(Base):
+    """Сумма заказа → количество зарезервированных заготовок по невыданным заказам."""
+    __tablename__ = "plate_reserved_amounts"
+
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), primary_key=True)
+    quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
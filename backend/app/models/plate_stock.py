@@ -1,17 +1,30 @@
 """Склад заготовок номеров: остаток, пополнение, списание при изготовлении."""
-from datetime import datetime
-from sqlalchemy import Integer, DateTime
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import Integer, DateTime, Date
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
 
 
 class PlateStock(Base):
-    """Остаток заготовок номеров на складе (одна строка — текущий баланс)."""
+    """
+    Остаток заготовок номеров на складе (одна строка — текущий баланс).
+
+    Счётчики reserved / reserved_in_work / defects_month ведутся в той же транзакции,
+    что и переходы статусов заказа, поэтому чтение склада — одна строка без сканирования заказов.
+    """
     __tablename__ = "plate_stock"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Зарезервировано под невыданные заказы (PAID, PLATE_IN_PROGRESS, PLATE_READY)
+    reserved: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Сумма plate_reservations (заказы, взятые в изготовление) — для проверки остатка
+    reserved_in_work: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Браков за месяц defects_month_start (при смене месяца счётчик начинается заново)
+    defects_month: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    defects_month_start: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
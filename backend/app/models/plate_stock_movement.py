@@ -0,0 +1,26 @@
+"""Движение заготовок по складу: пополнение, списание при выдаче, брак."""
+import enum
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Enum, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class StockMovementKind(str, enum.Enum):
+    ADD = "ADD"            # пополнение склада
+    CONSUME = "CONSUME"    # списание при выдаче заказа (COMPLETED)
+    DEFECT = "DEFECT"      # брак
+
+
+class PlateStockMovement(Base):
+    """Одна операция со складом. quantity со знаком: + приход, − расход."""
+    __tablename__ = "plate_stock_movements"
+    __table_args__ = (Index("ix_plate_stock_movements_created_at", "created_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    kind: Mapped[StockMovementKind] = mapped_column(Enum(StockMovementKind), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    order_id: Mapped[Optional[int]] = mapped_column(ForeignKey("orders.id", ondelete="SET NULL"), nullable=True)
@@ -0,0 +1,28 @@
+"""Отчёт о закрытии смены (Z-отчёт): неизменяемый снимок итогов, строится в close_shift."""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ShiftReport(Base):
+    """Один отчёт на смену. Итоги по графам кассы, платежи по типам, ожидаемый и заявленный остаток."""
+    __tablename__ = "shift_reports"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    shift_id: Mapped[int] = mapped_column(ForeignKey("cash_shifts.id"), unique=True, nullable=False)
+    pavilion: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    rows_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Павильон 1: {application, state_duty, dkp, insurance, plates, total}; павильон 2: {amount}
+    column_totals: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # {PaymentType: {"count": n, "amount": "..."}}
+    payments: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    opening_balance: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    expected_balance: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    declared_balance: Mapped[Optional[Decimal]] = mapped_column(Numeric(12, 2), nullable=True)
+    discrepancy: Mapped[Optional[Decimal]] = mapped_column(Numeric(12, 2), nullable=True)
@@ -0,0 +1,22 @@
+"""Транспортные средства по VIN: последние известные данные из заказов (для автозаполнения формы)."""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class Vehicle(Base):
+    """
+    Одна строка на нормализованный VIN (верхний регистр, без пробелов и дефисов). attributes —
+    поля ТС из form_data (brand_model, year, engine, …); новый заказ перезаписывает только
+    заполненные поля (vehicle_service.remember_vehicle).
+    """
+    __tablename__ = "vehicles"
+
+    vin: Mapped[str] = mapped_column(String(32), primary_key=True)
+    attributes: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    order_id: Mapped[Optional[int]] = mapped_column(ForeignKey("orders.id", ondelete="SET NULL"), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,6 +1,6 @@
 from decimal import Decimal
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class BaseAnalyticsBlock(BaseModel):
@@ -62,3 +62,38 @@ class EmployeesAnalytics(BaseModel):
     period: str  # "day" | "week" | "month"
     total_revenue: Decimal
     employees: List[EmployeeStat]
+
+
+class CheckBin(BaseModel):
+    """Интервал распределения чеков [from_amount, to_amount) и число заказов в нём."""
+
+    from_amount: Decimal
+    to_amount: Decimal
+    orders_count: int
+
+
+class ChecksAnalytics(BaseModel):
+    period: str  # "day" | "week" | "month"
+    orders_count: int
+    bins: List[CheckBin]
+
+
+class PlatesDayPoint(BaseModel):
+    """Павильон 2 за день: выдано номеров, брак, медиана срока PAID → COMPLETED, выручка."""
+
+    date: str  # ISO date string
+    plates_issued: int
+    defects: int
+    median_lead_time_hours: Optional[float]
+    revenue: Decimal
+
+
+class PlatesAnalytics(BaseModel):
+    date_from: str
+    date_to: str
+    plates_issued: int
+    defects: int
+    defect_rate_percent: Optional[Decimal]
+    median_lead_time_hours: Optional[float]
+    revenue: Decimal
+    days: List[PlatesDayPoint]
@@ -1,7 +1,7 @@
 """Схемы для касс и смен."""
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -21,9 +21,11 @@ class ShiftResponse(BaseModel):
     id: int
     pavilion: int
     opened_by_id: int
+    opened_by_name: Optional[str] = None
     opened_at: str
     closed_at: Optional[str] = None
     closed_by_id: Optional[int] = None
+    closed_by_name: Optional[str] = None
     opening_balance: Decimal
     closing_balance: Optional[Decimal] = None
     status: str
@@ -60,6 +62,12 @@ class CashRowUpdate(BaseModel):
     total: Optional[Decimal] = None
 
 
+class CashRowBatchItem(BaseModel):
+    """Изменение одной строки в пакетном PATCH: id и только изменённые ячейки."""
+    id: int
+    fields: CashRowUpdate
+
+
 class CashRowResponse(BaseModel):
     id: int
     client_name: str
@@ -72,3 +80,10 @@ class CashRowResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PlatePayoutSettle(BaseModel):
+    """Частичная выдача денег за номера: по id записей и/или по периоду создания (YYYY-MM-DD, включительно)."""
+    ids: Optional[List[int]] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
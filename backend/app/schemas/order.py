@@ -74,3 +74,40 @@ class OrderDetailResponse(OrderResponse):
     """Заказ с деталями для админки: form_data и кто оформил."""
     form_data: Optional[dict] = None
     created_by_name: Optional[str] = None
+
+
+class OrderSearchHit(OrderResponse):
+    """Найденный заказ: VIN, госномер и телефон для списка результатов, rank — релевантность."""
+    vin: Optional[str] = None
+    plate_number: Optional[str] = None
+    phone: Optional[str] = None
+    rank: Decimal
+
+
+class OrderSearchPage(BaseModel):
+    rows: List[OrderSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class OrderPaymentItem(BaseModel):
+    amount: Decimal
+    type: str
+    employee_name: Optional[str] = None
+    created_at: str
+
+
+class PlatePayoutState(BaseModel):
+    """Выдача денег за номера по заказу: paid_at = None — ещё не выданы."""
+    amount: Decimal
+    paid_at: Optional[str] = None
+    paid_by_name: Optional[str] = None
+
+
+class OrderFullResponse(OrderDetailResponse):
+    """Карточка заказа: детали, платежи с итогами по типам, точный долг, резерв заготовок и выдача за номера."""
+    payments: List[OrderPaymentItem]
+    paid_by_type: dict[str, Decimal]
+    paid_total: Decimal
+    debt: Decimal
+    plates_reserved: int = 0
+    plate_payout: Optional[PlatePayoutState] = None
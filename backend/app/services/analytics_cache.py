@@ -0,0 +1,225 @@
+"""
+Колоночный кеш платежей в памяти процесса для аналитики (необязательный, нужен NumPy).
+
+Платежи (время, сумма в копейках, тип, сотрудник, заказ) хранятся массивами NumPy:
+загружаются при старте фоновой задачей, новые дописываются после коммита транзакции
+платежа (record_payment → track_new_payment), а перед ответом кеш догружает платежи
+с id больше последнего известного (один запрос по первичному ключу). Суммы за период,
+доли сотрудников и распределение чеков считаются векторно по маскам.
+
+Кеш живёт в процессе: рассчитан на один воркер uvicorn (как в deploy/setup_server.sh).
+Без NumPy или пока кеш не загружен (columns() → None) аналитика считается по daily_rollup / SQL.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.logging_config import get_logger
+from app.models import Payment, PaymentType
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен: без него аналитика идёт через SQL
+    np = None
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+_TYPES = list(PaymentType)
+_TYPE_CODES = {t: i for i, t in enumerate(_TYPES)}
+_LOAD_BATCH = 10_000
+# Сколько последних id проверять на повтор при дописывании не по порядку
+_RECENT_IDS = 1000
+
+# Ключ в session.info: платежи транзакции, которые попадут в кеш после коммита
+_PENDING_KEY = "analytics_cache_pending"
+
+
+def _ts(dt: datetime) -> int:
+    return int((dt - _EPOCH).total_seconds())
+
+
+def _kopecks(amount) -> int:
+    return int(Decimal(str(amount)) * 100)
+
+
+def _rub(kopecks) -> Decimal:
+    return (Decimal(int(kopecks)) / 100).quantize(Decimal("0.01"))
+
+
+class PaymentColumns:
+    """
+    Платежи в виде растущих массивов. first — платёж открывает заказ (для числа заказов): у новых
+    платежей — флаг new_order из record_payment, как в daily_rollup; у прочитанных из БД — первый
+    по id платёж заказа, как в REBUILD_ROLLUP_SQL.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.last_id = 0
+        self._seen_orders: set[int] = set()
+        self._cols = {
+            "id": np.empty(capacity, dtype=np.int64),
+            "ts": np.empty(capacity, dtype=np.int64),
+            "amount": np.empty(capacity, dtype=np.int64),
+            "type": np.empty(capacity, dtype=np.int8),
+            "employee": np.empty(capacity, dtype=np.int32),
+            "order": np.empty(capacity, dtype=np.int64),
+            "first": np.empty(capacity, dtype=np.bool_),
+        }
+
+    def col(self, name: str):
+        return self._cols[name][: self.size]
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self._cols["id"])
+        if self.size + extra <= capacity:
+            return
+        while capacity < self.size + extra:
+            capacity *= 2
+        for name, arr in self._cols.items():
+            grown = np.empty(capacity, dtype=arr.dtype)
+            grown[: self.size] = arr[: self.size]
+            self._cols[name] = grown
+
+    def append_rows(self, rows) -> int:
+        """
+        Дописать платежи (id, created_at, amount, type, employee_id, order_id[, new_order]). Транзакции коммитятся
+        не по порядку id, поэтому id не больше last_id допускаются, но уже известные среди последних
+        _RECENT_IDS пропускаются (платёж мог прийти и из догрузки, и из хука коммита).
+        """
+        rows = sorted(rows, key=lambda r: r[0])
+        if rows and rows[0][0] <= self.last_id:
+            recent = set(self.col("id")[-_RECENT_IDS:].tolist())
+            rows = [r for r in rows if r[0] > self.last_id or r[0] not in recent]
+        if not rows:
+            return 0
+        n = len(rows)
+        self._reserve(n)
+        first = []
+        for r in rows:
+            first.append(bool(r[6]) if len(r) > 6 else r[5] not in self._seen_orders)
+            self._seen_orders.add(r[5])
+        s = slice(self.size, self.size + n)
+        self._cols["id"][s] = [r[0] for r in rows]
+        self._cols["ts"][s] = [_ts(r[1]) for r in rows]
+        self._cols["amount"][s] = [_kopecks(r[2]) for r in rows]
+        self._cols["type"][s] = [_TYPE_CODES[r[3]] for r in rows]
+        self._cols["employee"][s] = [r[4] or 0 for r in rows]
+        self._cols["order"][s] = [r[5] for r in rows]
+        self._cols["first"][s] = first
+        self.size += n
+        self.last_id = max(self.last_id, rows[-1][0])
+        return n
+
+    def _mask(self, start: datetime, end: datetime, types=None):
+        ts = self.col("ts")
+        mask = (ts >= _ts(start)) & (ts < _ts(end))
+        if types is not None:
+            mask &= np.isin(self.col("type"), [_TYPE_CODES[t] for t in types])
+        return mask
+
+    def totals_by_type(self, start: datetime, end: datetime) -> tuple[dict, int]:
+        """Суммы по типам платежа за [start, end) и число оплаченных заказов."""
+        mask = self._mask(start, end)
+        sums = np.bincount(self.col("type")[mask], weights=self.col("amount")[mask], minlength=len(_TYPES))
+        by_type = {t: _rub(sums[i]) for i, t in enumerate(_TYPES) if sums[i]}
+        return by_type, int(np.count_nonzero(self.col("first")[mask]))
+
+    def employee_totals(self, start: datetime, end: datetime, types) -> list[tuple[int, int, int]]:
+        """[(employee_id, заказов, сумма в копейках)] за [start, end) по убыванию суммы; без сотрудника — не учитываются."""
+        mask = self._mask(start, end, types) & (self.col("employee") != 0)
+        emp = self.col("employee")[mask]
+        if not len(emp):
+            return []
+        ids, inverse = np.unique(emp, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.col("amount")[mask])
+        pairs = np.unique((emp.astype(np.int64) << 32) | self.col("order")[mask])
+        orders = np.bincount(np.searchsorted(ids, pairs >> 32), minlength=len(ids))
+        out = [(int(ids[i]), int(orders[i]), int(totals[i])) for i in range(len(ids))]
+        out.sort(key=lambda r: (-r[2], r[0]))
+        return out
+
+    def check_histogram(self, start: datetime, end: datetime, bins: int) -> tuple[int, list[int]]:
+        """
+        Распределение чеков (сумма платежей заказа за [start, end)) на bins равных интервалов от 0
+        до максимального чека: (максимальный чек в копейках, число заказов в каждом интервале).
+        """
+        mask = self._mask(start, end)
+        _, inverse = np.unique(self.col("order")[mask], return_inverse=True)
+        checks = np.bincount(inverse, weights=self.col("amount")[mask])
+        top = int(checks.max()) if len(checks) else 0
+        if top <= 0:
+            return 0, []
+        counts, _ = np.histogram(np.clip(checks, 0, top), bins=bins, range=(0, top))
+        return top, [int(c) for c in counts]
+
+
+_cache: Optional[PaymentColumns] = None
+
+
+def available() -> bool:
+    return np is not None and settings.analytics_cache_enabled
+
+
+def _payment_row(p: Payment, new_order: bool) -> tuple:
+    return (p.id, p.created_at, p.amount, p.type, p.employee_id, p.order_id, new_order)
+
+
+_ROWS = select(Payment.id, Payment.created_at, Payment.amount, Payment.type, Payment.employee_id, Payment.order_id)
+
+
+async def load(session_maker: async_sessionmaker) -> None:
+    """Загрузить все платежи (фоновая задача при старте). До окончания загрузки аналитика идёт через SQL."""
+    global _cache
+    if not available():
+        return
+    cols = PaymentColumns()
+    try:
+        async with session_maker() as db:
+            result = await db.stream(_ROWS.order_by(Payment.id).execution_options(yield_per=_LOAD_BATCH))
+            async for batch in result.partitions():
+                cols.append_rows(batch)
+    except Exception:
+        logger.exception("Кеш аналитики не загружен, аналитика считается в БД")
+        return
+    _cache = cols
+    logger.info("Кеш аналитики загружен: платежей=%s", cols.size)
+
+
+async def columns(db: AsyncSession) -> Optional[PaymentColumns]:
+    """
+    Кеш, догруженный платежами с id больше последнего известного (записанными в обход
+    record_payment или другим процессом); None — кеш недоступен, считать в БД.
+    """
+    if _cache is None:
+        return None
+    r = await db.execute(_ROWS.where(Payment.id > _cache.last_id).order_by(Payment.id))
+    _cache.append_rows(r.all())
+    return _cache
+
+
+def track_new_payment(db: AsyncSession, payment: Payment, new_order: bool = False) -> None:
+    """
+    Запомнить платёж транзакции: в кеш он попадёт после коммита (при откате — нет).
+    new_order — тот же флаг, что получили дневные итоги.
+    """
+    if _cache is not None:
+        db.info.setdefault(_PENDING_KEY, []).append((payment, new_order))
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and _cache is not None:
+        _cache.append_rows([_payment_row(p, new_order) for p, new_order in pending])
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,366 @@
+"""
+Аналитика по платежам на дневных итогах (daily_rollup).
+
+Итоги увеличиваются в транзакции каждого платежа (add_to_rollup), поэтому сводка
+за период читает десятки строк daily_rollup, а не сканирует payments. Для старых
+БД и ручной проверки итоги пересобираются из payments одним INSERT ... SELECT.
+
+Динамика строится в БД (date_trunc + generate_series, пустые периоды = 0). Точки
+закрытых периодов не меняются и кешируются в процессе навсегда по (group_by, начало
+периода); на каждый запрос пересчитывается только текущий открытый период.
+Пересборка итогов сбрасывает кеш.
+
+Если установлен NumPy, сводки, учёт по сотрудникам и распределение чеков считаются
+по колоночному кешу платежей в памяти (analytics_cache), иначе — запросами к БД.
+"""
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, Select, cast, select, func, delete, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.periods import next_period, trunc_period
+from app.models import DailyRollup, Employee, Payment, PaymentType
+from app.schemas.analytics import BaseAnalyticsBlock, CheckBin, DynamicsPoint, EmployeeStat
+from app.services import analytics_cache
+from app.services.employee_cache import employee_names
+
+# Тип платежа → павильон, в кассу которого он поступает
+PAVILION_BY_TYPE = {
+    PaymentType.STATE_DUTY: 1,
+    PaymentType.INCOME_PAVILION1: 1,
+    PaymentType.INCOME_PAVILION2: 2,
+}
+
+# Вид выручки для учёта по сотрудникам → типы платежей
+EMPLOYEE_KINDS = {
+    "all": tuple(PaymentType),
+    "docs": (PaymentType.STATE_DUTY, PaymentType.INCOME_PAVILION1),
+    "plates": (PaymentType.INCOME_PAVILION2,),
+}
+
+# Пересборка итогов из payments. Заказ считается в строке своего первого платежа (min id).
+# :date_from / :date_to — необязательные границы дней (NULL — без ограничения).
+REBUILD_ROLLUP_SQL = """
+    INSERT INTO daily_rollup (day, pavilion, payment_type, employee_id, amount, payments_count, orders_count)
+    SELECT p.created_at::date,
+           CASE WHEN p.type = 'INCOME_PAVILION2' THEN 2 ELSE 1 END,
+           p.type,
+           COALESCE(p.employee_id, 0),
+           SUM(p.amount),
+           COUNT(*),
+           COUNT(*) FILTER (WHERE p.id = f.first_id)
+    FROM payments p
+    JOIN (SELECT order_id, MIN(id) AS first_id FROM payments GROUP BY order_id) f ON f.order_id = p.order_id
+    WHERE (CAST(:date_from AS date) IS NULL OR p.created_at >= CAST(:date_from AS date))
+      AND (CAST(:date_to AS date) IS NULL OR p.created_at < CAST(:date_to AS date) + 1)
+    GROUP BY 1, 2, 3, 4
+"""
+
+_DYNAMICS_SQL = text("""
+    WITH periods AS (
+        SELECT generate_series(
+            date_trunc(CAST(:group_by AS text), CAST(:start AS timestamp)),
+            date_trunc(CAST(:group_by AS text), CAST(:last AS timestamp)),
+            CAST('1 ' || CAST(:group_by AS text) AS interval)
+        )::date AS period_start
+    ),
+    agg AS (
+        SELECT date_trunc(CAST(:group_by AS text), CAST(day AS timestamp))::date AS period_start,
+               SUM(amount) AS total,
+               SUM(amount) FILTER (WHERE payment_type = 'STATE_DUTY') AS state_duty,
+               SUM(amount) FILTER (WHERE payment_type = 'INCOME_PAVILION1') AS income1,
+               SUM(amount) FILTER (WHERE payment_type = 'INCOME_PAVILION2') AS income2,
+               SUM(orders_count) AS orders
+        FROM daily_rollup
+        WHERE day >= CAST(:start AS timestamp) AND day < CAST(:end AS timestamp)
+        GROUP BY 1
+    )
+    SELECT p.period_start,
+           COALESCE(a.total, 0), COALESCE(a.state_duty, 0),
+           COALESCE(a.income1, 0), COALESCE(a.income2, 0), COALESCE(a.orders, 0)
+    FROM periods p
+    LEFT JOIN agg a ON a.period_start = p.period_start
+    ORDER BY p.period_start
+""")
+
+# (group_by, начало периода) → точка закрытого периода
+_dynamics_cache: dict[tuple[str, date], DynamicsPoint] = {}
+
+_ZERO = Decimal("0")
+_CENT = Decimal("0.01")
+
+
+async def add_to_rollup(db: AsyncSession, payment: Payment, new_order: bool = False) -> None:
+    """Учесть платёж в дневных итогах (upsert с прибавлением). new_order — первый платёж оплаченного заказа."""
+    created = payment.created_at or datetime.utcnow()
+    stmt = pg_insert(DailyRollup).values(
+        day=created.date(),
+        pavilion=PAVILION_BY_TYPE[payment.type],
+        payment_type=payment.type,
+        employee_id=payment.employee_id or 0,
+        amount=Decimal(str(payment.amount)),
+        payments_count=1,
+        orders_count=1 if new_order else 0,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyRollup.day, DailyRollup.pavilion, DailyRollup.payment_type, DailyRollup.employee_id],
+        set_={
+            "amount": DailyRollup.amount + stmt.excluded.amount,
+            "payments_count": DailyRollup.payments_count + stmt.excluded.payments_count,
+            "orders_count": DailyRollup.orders_count + stmt.excluded.orders_count,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_daily_rollup(
+    db: AsyncSession,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> int:
+    """Пересобрать итоги за дни [date_from, date_to] (по умолчанию — все) из payments. Возвращает число строк."""
+    q = delete(DailyRollup)
+    if date_from:
+        q = q.where(DailyRollup.day >= date_from)
+    if date_to:
+        q = q.where(DailyRollup.day <= date_to)
+    await db.execute(q)
+    r = await db.execute(text(REBUILD_ROLLUP_SQL), {"date_from": date_from, "date_to": date_to})
+    _dynamics_cache.clear()
+    return r.rowcount or 0
+
+
+def block_from_totals(by_type: dict, orders_count: int) -> BaseAnalyticsBlock:
+    """Показатели периода из сумм по типам платежа и числа оплаченных заказов."""
+    state_duty = by_type.get(PaymentType.STATE_DUTY, _ZERO)
+    income1 = by_type.get(PaymentType.INCOME_PAVILION1, _ZERO)
+    income2 = by_type.get(PaymentType.INCOME_PAVILION2, _ZERO)
+    total = state_duty + income1 + income2
+    average = (total / orders_count).quantize(_CENT) if orders_count else _ZERO
+    return BaseAnalyticsBlock(
+        total_revenue=total,
+        state_duty_total=state_duty,
+        net_income=total - state_duty,
+        income_pavilion1=income1,
+        income_pavilion2=income2,
+        orders_count=orders_count,
+        average_check=average,
+    )
+
+
+def _day_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    """Дни [start, end] → полуинтервал [start 00:00, end+1 00:00)."""
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+
+async def period_block(db: AsyncSession, start: date, end: date) -> BaseAnalyticsBlock:
+    """Показатели за дни [start, end]: по кешу в памяти, иначе по daily_rollup (не больше строк, чем дни × типы × сотрудники)."""
+    cols = await analytics_cache.columns(db)
+    if cols is not None:
+        return block_from_totals(*cols.totals_by_type(*_day_bounds(start, end)))
+    r = await db.execute(
+        select(
+            DailyRollup.payment_type,
+            func.coalesce(func.sum(DailyRollup.amount), 0),
+            func.coalesce(func.sum(DailyRollup.orders_count), 0),
+        )
+        .where(DailyRollup.day >= start, DailyRollup.day <= end)
+        .group_by(DailyRollup.payment_type)
+    )
+    by_type = {}
+    orders = 0
+    for payment_type, amount, orders_count in r.all():
+        by_type[payment_type] = Decimal(amount)
+        orders += int(orders_count)
+    return block_from_totals(by_type, orders)
+
+
+def period_starts(group_by: str, start: date, end: date) -> list[date]:
+    """Начала периодов, покрывающих [start, end] (выровнены по date_trunc)."""
+    out = []
+    p = trunc_period(start, group_by)
+    while p <= end:
+        out.append(p)
+        p = next_period(p, group_by)
+    return out
+
+
+async def dynamics(db: AsyncSession, group_by: str, start: date, end: date, today: date) -> list[DynamicsPoint]:
+    """
+    Точки динамики по целым периодам от периода start до периода end. Закрытые периоды
+    (закончились до today) берутся из кеша; SQL считает только периоды от первого некешированного.
+    """
+    starts = period_starts(group_by, start, end)
+    missing = [p for p in starts if (group_by, p) not in _dynamics_cache]
+    fresh = {}
+    if missing:
+        r = await db.execute(_DYNAMICS_SQL, {
+            "group_by": group_by,
+            "start": datetime.combine(missing[0], datetime.min.time()),
+            "last": datetime.combine(starts[-1], datetime.min.time()),
+            "end": datetime.combine(next_period(starts[-1], group_by), datetime.min.time()),
+        })
+        for period_start, total, state_duty, income1, income2, orders in r.all():
+            point = DynamicsPoint(
+                period_start=period_start.isoformat(),
+                total_revenue=total,
+                net_income=total - state_duty,
+                income_pavilion1=income1,
+                income_pavilion2=income2,
+                orders_count=int(orders),
+            )
+            fresh[period_start] = point
+            if next_period(period_start, group_by) <= today:
+                _dynamics_cache[(group_by, period_start)] = point
+    return [fresh.get(p) or _dynamics_cache[(group_by, p)] for p in starts]
+
+
+async def employee_stats(db: AsyncSession, kind: str, start: datetime, end: datetime) -> tuple[Decimal, list[EmployeeStat]]:
+    """
+    Учёт по сотрудникам за [start, end) одним запросом: GROUP BY сотрудник, доля и общий итог —
+    оконными функциями поверх групп (индекс ix_payments_employee_id_created_at); имена — из справочника.
+    Платежи без сотрудника не учитываются. Возвращает (итог по всем сотрудникам, строки по убыванию суммы).
+    """
+    cols = await analytics_cache.columns(db)
+    if cols is not None:
+        return await _employee_stats_cached(db, cols, kind, start, end)
+    total = func.sum(Payment.amount)
+    grand_total = func.sum(total).over()
+    orders = func.count(Payment.order_id.distinct())
+    q = (
+        select(
+            Payment.employee_id,
+            orders,
+            total,
+            func.round(total / func.nullif(orders, 0), 2),
+            func.round(100 * total / func.nullif(grand_total, 0), 2),
+            grand_total,
+        )
+        .where(
+            Payment.created_at >= start,
+            Payment.created_at < end,
+            Payment.employee_id.is_not(None),
+            Payment.type.in_(EMPLOYEE_KINDS[kind]),
+        )
+        .group_by(Payment.employee_id)
+        .order_by(total.desc(), Payment.employee_id)
+    )
+    rows = (await db.execute(q)).all()
+    names = await employee_names(db, [row[0] for row in rows])
+    stats = [
+        EmployeeStat(
+            employee_id=emp_id,
+            employee_name=names.get(emp_id, "—"),
+            orders_count=orders_count,
+            total_amount=amount,
+            average_check=average or _ZERO,
+            share_percent=share or _ZERO,
+        )
+        for emp_id, orders_count, amount, average, share, _ in rows
+    ]
+    return (rows[0][-1] if rows else _ZERO), stats
+
+
+async def _employee_stats_cached(
+    db: AsyncSession, cols, kind: str, start: datetime, end: datetime
+) -> tuple[Decimal, list[EmployeeStat]]:
+    """То же по кешу платежей: суммы и заказы векторно, имена — из справочника сотрудников."""
+    rows = cols.employee_totals(start, end, EMPLOYEE_KINDS[kind])
+    if not rows:
+        return _ZERO, []
+    names = await employee_names(db, [emp_id for emp_id, _, _ in rows])
+    grand_total = sum(kopecks for _, _, kopecks in rows)
+    stats = []
+    for emp_id, orders_count, kopecks in rows:
+        amount = Decimal(kopecks) / 100
+        stats.append(EmployeeStat(
+            employee_id=emp_id,
+            employee_name=names.get(emp_id, "—"),
+            orders_count=orders_count,
+            total_amount=amount.quantize(_CENT),
+            average_check=(amount / orders_count).quantize(_CENT, ROUND_HALF_UP) if orders_count else _ZERO,
+            share_percent=(Decimal(100 * kopecks) / grand_total).quantize(_CENT, ROUND_HALF_UP) if grand_total else _ZERO,
+        ))
+    return (Decimal(grand_total) / 100).quantize(_CENT), stats
+
+
+# Распределение чеков в БД: заказ → сумма его платежей за период, корзины от 0 до максимума
+_CHECKS_SQL = text("""
+    WITH checks AS (
+        SELECT SUM(amount) AS total
+        FROM payments
+        WHERE created_at >= :start AND created_at < :end
+        GROUP BY order_id
+    ),
+    top AS (SELECT MAX(total) AS top FROM checks)
+    SELECT t.top, LEAST(GREATEST(width_bucket(c.total, 0, t.top, :bins), 1), :bins) AS bucket, COUNT(*)
+    FROM checks c CROSS JOIN top t
+    WHERE t.top > 0
+    GROUP BY t.top, bucket
+""")
+
+
+def check_bins(top: Decimal, counts: list[int]) -> list[CheckBin]:
+    """Интервалы равной ширины от 0 до top с числом заказов в каждом."""
+    width = top / len(counts) if counts else _ZERO
+    return [
+        CheckBin(from_amount=(width * i).quantize(_CENT), to_amount=(width * (i + 1)).quantize(_CENT), orders_count=c)
+        for i, c in enumerate(counts)
+    ]
+
+
+async def check_histogram(db: AsyncSession, start: datetime, end: datetime, bins: int) -> list[CheckBin]:
+    """Распределение чеков (сумма платежей заказа за [start, end)): кеш в памяти или width_bucket в БД."""
+    cols = await analytics_cache.columns(db)
+    if cols is not None:
+        top, counts = cols.check_histogram(start, end, bins)
+        return check_bins(Decimal(top) / 100, counts)
+    r = (await db.execute(_CHECKS_SQL, {"start": start, "end": end, "bins": bins})).all()
+    if not r:
+        return []
+    counts = [0] * bins
+    for _, bucket, count in r:
+        counts[bucket - 1] = int(count)
+    return check_bins(Decimal(r[0][0]), counts)
+
+
+def _type_sum(payment_type: PaymentType):
+    return func.coalesce(func.sum(DailyRollup.amount).filter(DailyRollup.payment_type == payment_type), 0)
+
+
+def export_query(kind: str, start: date, end: date) -> tuple[Select, list[str]]:
+    """
+    Запрос выгрузки аналитики по daily_rollup за дни [start, end] и заголовок CSV.
+    kind: day — строка на день, month — на месяц, employees — на день и сотрудника.
+    Строки: период, [сотрудник], выручка, госпошлина, чистый доход, павильон 1, павильон 2, заказы.
+    """
+    sums = [
+        func.sum(DailyRollup.amount),
+        _type_sum(PaymentType.STATE_DUTY),
+        func.sum(DailyRollup.amount) - _type_sum(PaymentType.STATE_DUTY),
+        _type_sum(PaymentType.INCOME_PAVILION1),
+        _type_sum(PaymentType.INCOME_PAVILION2),
+        func.sum(DailyRollup.orders_count),
+    ]
+    sums_header = ["Выручка", "Госпошлина", "Чистый доход", "Павильон 1", "Павильон 2 (номера)", "Заказов"]
+    in_range = (DailyRollup.day >= start, DailyRollup.day <= end)
+    if kind == "month":
+        # Литерал, а не параметр: выражение в SELECT и GROUP BY должно совпадать
+        month = cast(func.date_trunc(literal_column("'month'"), cast(DailyRollup.day, DateTime)), Date)
+        q = select(month, *sums).where(*in_range).group_by(month).order_by(month)
+        return q, ["Месяц", *sums_header]
+    if kind == "employees":
+        name = func.coalesce(Employee.name, "—")
+        q = (
+            select(DailyRollup.day, DailyRollup.employee_id, name, *sums)
+            .outerjoin(Employee, Employee.id == DailyRollup.employee_id)
+            .where(*in_range)
+            .group_by(DailyRollup.day, DailyRollup.employee_id, Employee.name)
+            .order_by(DailyRollup.day, DailyRollup.employee_id)
+        )
+        return q, ["Дата", "ID сотрудника", "Сотрудник", *sums_header]
+    q = select(DailyRollup.day, *sums).where(*in_range).group_by(DailyRollup.day).order_by(DailyRollup.day)
+    return q, ["Дата", *sums_header]
@@ -1,4 +1,12 @@
-"""Хеширование паролей и JWT для веб-авторизации."""
+"""
+Хеширование паролей и JWT для веб-авторизации.
+
+bcrypt намеренно медленный (100–300 мс на вызов), поэтому hash_password / verify_password
+выполняются в отдельном пуле потоков ограниченного размера и не блокируют цикл событий.
+Стоимость задаётся BCRYPT_ROUNDS; хеши с другой стоимостью пересчитываются при входе.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Optional
 
@@ -12,14 +20,34 @@ from app.models.employee import EmployeeRole
 logger = get_logger(__name__)
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+# Не больше password_hash_workers одновременных вызовов bcrypt, остальные ждут в очереди пула
+_hash_pool = ThreadPoolExecutor(max_workers=max(1, settings.password_hash_workers), thread_name_prefix="bcrypt")
+
+
+def _hash_sync(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
 
 
-def verify_password(plain: str, hashed: str) -> bool:
+def _verify_sync(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
 
 
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, _hash_sync, password, settings.bcrypt_rounds)
+
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, _verify_sync, plain, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """Хеш создан с другой стоимостью, чем BCRYPT_ROUNDS (формат $2b$<rounds>$...)."""
+    try:
+        return int(hashed.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return True
+
+
 def create_access_token(
     subject: int,
     role: str,
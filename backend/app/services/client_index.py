@@ -0,0 +1,189 @@
+"""
+Подсказки клиентов по прошлым заказам: префиксный индекс в памяти процесса.
+
+Клиенты и продавцы (ДКП) из form_data заказов собираются в записи «человек → последние
+известные ФИО, паспорт, адрес, телефон». Человек определяется по цифрам паспорта, без
+паспорта — по ФИО. Для поиска — отсортированный список (ключ, человек), где ключ —
+нормализованное ФИО или цифры паспорта; префикс ищется bisect'ом без обращения к БД.
+
+Индекс загружается при старте фоновой задачей, новые заказы добавляются после коммита
+транзакции (create_order → track_new_order), как в analytics_cache. Рассчитан на один
+воркер uvicorn. Пока индекс не загружен, suggest() возвращает пустой список.
+"""
+import re
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.logging_config import get_logger
+from app.models import Order
+
+logger = get_logger(__name__)
+
+_LOAD_BATCH = 5_000
+_MIN_QUERY = 2
+_MIN_PASSPORT_DIGITS = 6
+# Сколько совпадений по префиксу просматривать для выбора самых свежих
+_SCAN_LIMIT = 500
+# Роли человека в form_data: префикс полей
+_ROLES = ("client", "seller")
+
+_PENDING_KEY = "client_index_pending"
+_NOT_DIGITS = re.compile(r"\D")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_fio(value) -> str:
+    """Нижний регистр, ё → е, одиночные пробелы."""
+    return _SPACES.sub(" ", str(value or "")).strip().lower().replace("ё", "е")
+
+
+def passport_digits(value) -> str:
+    return _NOT_DIGITS.sub("", str(value or ""))
+
+
+@dataclass(frozen=True)
+class ClientRecord:
+    fio: str
+    passport: Optional[str]
+    address: Optional[str]
+    phone: Optional[str]
+    order_id: int
+
+
+def _clean(value) -> Optional[str]:
+    s = str(value).strip() if value is not None else ""
+    return s or None
+
+
+def people_from_form(form_data: Optional[dict], order_id: int) -> list[ClientRecord]:
+    """Клиент (физлицо) и продавец из form_data заказа; без ФИО — не учитываются."""
+    fd = form_data or {}
+    out = []
+    for role in _ROLES:
+        if role == "client" and fd.get("client_is_legal"):
+            continue
+        fio = _clean(fd.get(f"{role}_fio"))
+        if not fio:
+            continue
+        out.append(ClientRecord(
+            fio=fio,
+            passport=_clean(fd.get(f"{role}_passport")),
+            address=_clean(fd.get(f"{role}_address")),
+            phone=_clean(fd.get(f"{role}_phone")),
+            order_id=order_id,
+        ))
+    return out
+
+
+class ClientIndex:
+    """Последняя запись по каждому человеку и отсортированные ключи поиска."""
+
+    def __init__(self):
+        self.ready = False
+        self._people: dict[str, ClientRecord] = {}
+        self._keys: list[tuple[str, str]] = []
+        self._known: set[tuple[str, str]] = set()
+
+    def __len__(self) -> int:
+        return len(self._people)
+
+    def _add_key(self, key: str, person: str) -> None:
+        if key and (key, person) not in self._known:
+            self._known.add((key, person))
+            # При загрузке ключи дописываются и сортируются один раз в mark_ready()
+            if self.ready:
+                insort(self._keys, (key, person))
+            else:
+                self._keys.append((key, person))
+
+    def mark_ready(self) -> None:
+        self._keys.sort()
+        self.ready = True
+
+    def add(self, record: ClientRecord) -> None:
+        """Учесть запись; у человека остаются данные самого нового заказа (поля, которых там нет, — из прежних)."""
+        digits = passport_digits(record.passport)
+        fio_key = normalize_fio(record.fio)
+        person = f"p:{digits}" if len(digits) >= _MIN_PASSPORT_DIGITS else f"f:{fio_key}"
+        old = self._people.get(person)
+        if old is not None:
+            if old.order_id > record.order_id:
+                record, old = old, record
+            record = ClientRecord(
+                fio=record.fio,
+                passport=record.passport or old.passport,
+                address=record.address or old.address,
+                phone=record.phone or old.phone,
+                order_id=record.order_id,
+            )
+        self._people[person] = record
+        self._add_key(fio_key, person)
+        if len(digits) >= _MIN_PASSPORT_DIGITS:
+            self._add_key(digits, person)
+
+    def add_order(self, order_id: int, form_data: Optional[dict]) -> None:
+        for record in people_from_form(form_data, order_id):
+            self.add(record)
+
+    def suggest(self, q: str, limit: int) -> list[ClientRecord]:
+        """До limit человек, у которых ФИО или цифры паспорта начинаются с q; свежие заказы — первыми."""
+        # В ФИО цифр нет: запрос с цифрами — поиск по паспорту
+        digits = passport_digits(q)
+        key = digits if digits else normalize_fio(q)
+        if len(key) < _MIN_QUERY:
+            return []
+        found: dict[str, ClientRecord] = {}
+        i = bisect_left(self._keys, (key, ""))
+        scanned = 0
+        while i < len(self._keys) and scanned < _SCAN_LIMIT:
+            term, person = self._keys[i]
+            if not term.startswith(key):
+                break
+            found[person] = self._people[person]
+            i += 1
+            scanned += 1
+        return sorted(found.values(), key=lambda r: -r.order_id)[:limit]
+
+
+_index = ClientIndex()
+
+
+def suggest(q: str, limit: int) -> list[ClientRecord]:
+    return _index.suggest(q, limit) if _index.ready else []
+
+
+async def load(session_maker: async_sessionmaker) -> None:
+    """Построить индекс по всем заказам (фоновая задача при старте)."""
+    try:
+        async with session_maker() as db:
+            stmt = select(Order.id, Order.form_data).order_by(Order.id).execution_options(yield_per=_LOAD_BATCH)
+            result = await db.stream(stmt)
+            async for batch in result.partitions():
+                for order_id, form_data in batch:
+                    _index.add_order(order_id, form_data)
+    except Exception:
+        logger.exception("Индекс клиентов не загружен, подсказки отключены")
+        return
+    _index.mark_ready()
+    logger.info("Индекс клиентов загружен: людей=%s", len(_index))
+
+
+def track_new_order(db: AsyncSession, order: Order) -> None:
+    """Запомнить заказ транзакции: в индекс он попадёт после коммита (при откате — нет)."""
+    db.info.setdefault(_PENDING_KEY, []).append((order.id, order.form_data))
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    for order_id, form_data in session.info.pop(_PENDING_KEY, ()):
+        _index.add_order(order_id, form_data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,84 @@
+"""
+Справочник сотрудников в памяти процесса: id → имя, роль, активность.
+
+Используется для проверки токена (require_roles: деактивация и смена роли действуют сразу,
+а не через 7 дней жизни JWT) и везде, где по id нужно имя сотрудника (детали заказа,
+смены, выдачи за номера, учёт по сотрудникам) — без запроса или JOIN на каждое имя.
+
+Таблица employees маленькая, поэтому снимок загружается целиком одним запросом и живёт
+EMPLOYEE_CACHE_TTL_SECONDS. Эндпоинты /employees сбрасывают его после изменения (invalidate).
+Неизвестный id (сотрудник создан после загрузки снимка) перечитывает снимок, но не чаще
+раза в _MISS_RELOAD_SECONDS.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models import Employee
+
+_MISS_RELOAD_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class CachedEmployee:
+    id: int
+    name: str
+    role: str
+    is_active: bool
+
+
+_employees: dict[int, CachedEmployee] = {}
+_loaded_at: Optional[float] = None
+_lock = asyncio.Lock()
+
+
+def invalidate() -> None:
+    """Сбросить снимок: следующий запрос перечитает сотрудников из БД."""
+    global _loaded_at
+    _loaded_at = None
+
+
+async def _reload(db: AsyncSession) -> None:
+    global _employees, _loaded_at
+    r = await db.execute(select(Employee.id, Employee.name, Employee.role, Employee.is_active))
+    _employees = {
+        emp_id: CachedEmployee(emp_id, name, role.value, is_active)
+        for emp_id, name, role, is_active in r.all()
+    }
+    _loaded_at = time.monotonic()
+
+
+def _needs_reload(ids: set[int]) -> bool:
+    """Снимок устарел, сброшен или в нём нет кого-то из ids."""
+    now = time.monotonic()
+    stale = _loaded_at is None or now - _loaded_at >= settings.employee_cache_ttl_seconds
+    missing = not ids.issubset(_employees) and (_loaded_at is None or now - _loaded_at >= _MISS_RELOAD_SECONDS)
+    return stale or missing
+
+
+async def get_employee(session_maker: async_sessionmaker, employee_id: int) -> Optional[CachedEmployee]:
+    """
+    Сотрудник из снимка; нет в БД — None. Вызывается из проверки токена до открытия сессии
+    запроса, поэтому при перечитывании открывает свою сессию.
+    """
+    async with _lock:
+        if _needs_reload({employee_id}):
+            async with session_maker() as db:
+                await _reload(db)
+    return _employees.get(employee_id)
+
+
+async def employee_names(db: AsyncSession, ids: Iterable[Optional[int]]) -> dict[int, str]:
+    """Имена по id (None пропускаются); сотрудников, которых нет в БД, в ответе нет. Перечитывает в сессии запроса."""
+    wanted = {i for i in ids if i is not None}
+    if not wanted:
+        return {}
+    async with _lock:
+        if _needs_reload(wanted):
+            await _reload(db)
+    return {i: _employees[i].name for i in wanted if i in _employees}
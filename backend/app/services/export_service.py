@@ -0,0 +1,197 @@
+"""
+Потоковая выгрузка таблиц в CSV / XLSX.
+
+Строки читаются из БД серверным курсором пачками (AsyncSession.stream + yield_per)
+в собственной сессии: зависимость get_db закрывается до начала отдачи ответа.
+Каждая пачка сразу превращается в байты и отдаётся клиенту, поэтому память не растёт
+с размером периода. Если клиент отключился, выгрузка останавливается между пачками,
+курсор и сессия закрываются сразу (until_disconnected).
+
+CSV — для Excel с русской локалью: UTF-8 с BOM, разделитель «;», десятичная запятая.
+XLSX собирается без сторонних библиотек: zip пишется в поток (data descriptor),
+лист — inline-строки и числа, без общих строк и стилей.
+"""
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Iterable, Sequence
+from xml.sax.saxutils import escape
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.requests import Request
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+# Строк в пачке серверного курсора
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _csv_value(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, (Decimal, float)):
+        return str(v).replace(".", ",")
+    if isinstance(v, datetime):
+        return v.strftime("%d.%m.%Y %H:%M:%S")
+    if isinstance(v, date):
+        return v.strftime("%d.%m.%Y")
+    return str(v)
+
+
+def csv_lines(rows: Iterable[Sequence]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=";", lineterminator="\r\n")
+    writer.writerows([_csv_value(v) for v in row] for row in rows)
+    return buf.getvalue().encode("utf-8")
+
+
+class _Sink:
+    """Приёмник zip-потока: накапливает записанные байты до следующего drain()."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def _xlsx_cell(v) -> str:
+    if v is None:
+        return "<c/>"
+    if isinstance(v, bool):
+        v = "да" if v else "нет"
+    elif isinstance(v, (int, float, Decimal)):
+        return f"<c><v>{v}</v></c>"
+    elif isinstance(v, datetime):
+        v = v.strftime("%d.%m.%Y %H:%M:%S")
+    elif isinstance(v, date):
+        v = v.strftime("%d.%m.%Y")
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(v))}</t></is></c>'
+
+
+class XlsxStream:
+    """Однолистовой XLSX, который пишется построчно: add_rows() / close() возвращают готовые байты zip."""
+
+    def __init__(self, sheet_name: str = "Лист1"):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name[:31])))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(_SHEET_HEAD.encode("utf-8"))
+
+    def add_rows(self, rows: Iterable[Sequence]) -> bytes:
+        xml = "".join("<row>" + "".join(_xlsx_cell(v) for v in row) + "</row>" for row in rows)
+        self._sheet.write(xml.encode("utf-8"))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._sheet.write(_SHEET_TAIL.encode("utf-8"))
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.drain()
+
+
+async def stream_rows(session_maker: async_sessionmaker, stmt: Select, batch_size: int = EXPORT_BATCH_SIZE):
+    """Пачки строк запроса из серверного курсора (своя сессия на всё время выгрузки)."""
+    async with session_maker() as db:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def export_chunks(
+    fmt: str,
+    header: Sequence[str],
+    batches: AsyncIterator[Sequence[Sequence]],
+    row_fn: Callable[[Sequence], Sequence] = tuple,
+    sheet_name: str = "Лист1",
+) -> AsyncIterator[bytes]:
+    """Байты файла выгрузки по мере чтения пачек: заголовок, строки (через row_fn), конец файла."""
+    try:
+        if fmt == "csv":
+            yield b"\xef\xbb\xbf" + csv_lines([header])
+            async for batch in batches:
+                yield csv_lines(row_fn(row) for row in batch)
+            return
+        xlsx = XlsxStream(sheet_name)
+        yield xlsx.add_rows([header])
+        async for batch in batches:
+            chunk = xlsx.add_rows(row_fn(row) for row in batch)
+            if chunk:
+                yield chunk
+        yield xlsx.close()
+    finally:
+        # Прерванная выгрузка: закрыть источник пачек (серверный курсор и сессию) сразу
+        await batches.aclose()
+
+
+async def until_disconnected(request: Request, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Отдавать куски, пока клиент на связи; при отключении или отмене — закрыть генератор (и курсор БД)."""
+    try:
+        async for chunk in chunks:
+            if await request.is_disconnected():
+                break
+            yield chunk
+    finally:
+        await chunks.aclose()
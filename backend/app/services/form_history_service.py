@@ -0,0 +1,150 @@
+"""
+История заполнения формы: дедупликация снимков и поиск.
+
+Снимок form_data сохраняется при оплате заказа. Одинаковые снимки (повторная оплата
+с теми же данными) хранятся один раз: ключ — sha256 канонического JSON, upsert обновляет
+только used_at и order_id. Для поиска и краткого списка из снимка выносятся нормализованные
+поля: ФИО / наименование, VIN, госномер, цифры телефона. Полный form_data отдаётся по id.
+"""
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import FormHistory
+
+_NOT_DIGITS = re.compile(r"\D")
+_SPACES = re.compile(r"[\s\-]")
+# Запрос, похожий на телефон: только цифры, +, пробелы, скобки и дефисы
+_PHONE_QUERY = re.compile(r"^[\d+()\s\-]+$")
+_MIN_PHONE_DIGITS = 3
+
+
+def content_hash(form_data: dict) -> str:
+    """sha256 канонического JSON: порядок ключей не влияет."""
+    canonical = json.dumps(form_data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _clean(value) -> Optional[str]:
+    s = str(value).strip() if value is not None else ""
+    return s or None
+
+
+def normalize_code(value) -> Optional[str]:
+    """VIN / госномер: верхний регистр без пробелов и дефисов."""
+    s = _SPACES.sub("", _clean(value) or "").upper()
+    return s or None
+
+
+def normalize_phone(value) -> Optional[str]:
+    """Только цифры; ведущая 8 заменяется на 7, чтобы «8 999…» и «+7 999…» совпадали."""
+    digits = _NOT_DIGITS.sub("", str(value or ""))
+    if digits.startswith("8"):
+        digits = "7" + digits[1:]
+    return digits or None
+
+
+def _cut(value: Optional[str], length: int) -> Optional[str]:
+    return value[:length] if value else None
+
+
+def summary_fields(form_data: dict) -> dict:
+    """Поля для поиска и краткого списка (значения колонок FormHistory)."""
+    name = _clean(form_data.get("client_fio")) or _clean(form_data.get("client_legal_name"))
+    return {
+        "client_name": _cut(name, 255),
+        "vin": _cut(normalize_code(form_data.get("vin")), 32),
+        "plate_number": _cut(normalize_code(form_data.get("plate_number")), 32),
+        "phone": _cut(normalize_phone(form_data.get("client_phone")), 32),
+    }
+
+
+async def save_snapshot(db: AsyncSession, order_id: Optional[int], form_data: Optional[dict]) -> None:
+    """Записать снимок формы; такой же снимок уже есть — обновить used_at и order_id."""
+    if not form_data:
+        return
+    now = datetime.utcnow()
+    stmt = pg_insert(FormHistory).values(
+        order_id=order_id,
+        form_data=form_data,
+        content_hash=content_hash(form_data),
+        created_at=now,
+        used_at=now,
+        **summary_fields(form_data),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FormHistory.content_hash],
+        set_={"used_at": stmt.excluded.used_at, "order_id": stmt.excluded.order_id},
+    )
+    await db.execute(stmt)
+
+
+# Перенос записей, созданных до дедупликации: пачка строк и удаление повторов (остаётся самая новая)
+BACKFILL_BATCH = 1000
+DEDUPLICATE_SQL = """
+    DELETE FROM form_history a USING form_history b
+    WHERE a.content_hash = b.content_hash AND a.id < b.id
+"""
+
+
+def backfill_values(rows) -> list[dict]:
+    """Значения колонок для UPDATE старых записей (id, form_data, created_at): хеш, поля поиска, used_at."""
+    return [
+        {"b_id": row_id, "content_hash": content_hash(form_data or {}), "used_at": created_at, **summary_fields(form_data or {})}
+        for row_id, form_data, created_at in rows
+    ]
+
+
+def _like_prefix(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_conditions(q: str) -> list:
+    """Условия поиска по префиксу: ФИО, VIN, госномер, телефон (если запрос похож на номер)."""
+    conds = [func.lower(FormHistory.client_name).like(_like_prefix(q.lower()))]
+    code = normalize_code(q)
+    if code:
+        conds.append(FormHistory.vin.like(_like_prefix(code)))
+        conds.append(FormHistory.plate_number.like(_like_prefix(code)))
+    phone = normalize_phone(q) if _PHONE_QUERY.match(q) else None
+    if phone and len(phone) >= _MIN_PHONE_DIGITS:
+        conds.append(FormHistory.phone.like(_like_prefix(phone)))
+    return conds
+
+
+async def search(db: AsyncSession, q: Optional[str], limit: int) -> list[dict]:
+    """Краткие записи (без form_data), последние использованные сверху; q — префикс для поиска."""
+    stmt = select(
+        FormHistory.id,
+        FormHistory.order_id,
+        FormHistory.client_name,
+        FormHistory.vin,
+        FormHistory.plate_number,
+        FormHistory.phone,
+        FormHistory.form_data["brand_model"].astext,
+        FormHistory.used_at,
+    )
+    q = (q or "").strip()
+    if q:
+        stmt = stmt.where(or_(*search_conditions(q)))
+    stmt = stmt.order_by(FormHistory.used_at.desc(), FormHistory.id.desc()).limit(limit)
+    r = await db.execute(stmt)
+    return [
+        {
+            "id": id_,
+            "order_id": order_id,
+            "client_name": client_name,
+            "vin": vin,
+            "plate_number": plate_number,
+            "phone": phone,
+            "brand_model": brand_model,
+            "used_at": used_at.isoformat() if used_at else None,
+        }
+        for id_, order_id, client_name, vin, plate_number, phone, brand_model, used_at in r.all()
+    ]
@@ -0,0 +1,108 @@
+"""
+Полная карточка заказа для админки одним запросом: заказ, платежи с итогами по типам,
+резерв заготовок и выдача денег за номера (plate_payouts).
+
+Суммы по типам считаются в БД (SUM ... FILTER), платежи списком — jsonb_agg с суммами
+строками, чтобы Decimal не проходил через float; долг = total_amount − оплачено (точно).
+Имена сотрудников — из справочника в памяти (employee_cache), без JOIN employees.
+"""
+import json
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PaymentType
+from app.schemas.order import OrderFullResponse, OrderPaymentItem, PlatePayoutState
+
+_ORDER_FULL_SQL = text("""
+    SELECT o.id, o.public_id, o.status, o.total_amount, o.state_duty_amount, o.income_pavilion1,
+           o.income_pavilion2, o.need_plate, o.service_type, o.created_at, o.form_data, o.employee_id,
+           p.paid_total, p.paid_state_duty, p.paid_pavilion1, p.paid_pavilion2, p.items,
+           r.reserved,
+           po.amount AS payout_amount, po.paid_at AS payout_paid_at, po.paid_by_id AS payout_paid_by_id
+    FROM orders o
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(SUM(amount), 0) AS paid_total,
+               COALESCE(SUM(amount) FILTER (WHERE type = 'STATE_DUTY'), 0) AS paid_state_duty,
+               COALESCE(SUM(amount) FILTER (WHERE type = 'INCOME_PAVILION1'), 0) AS paid_pavilion1,
+               COALESCE(SUM(amount) FILTER (WHERE type = 'INCOME_PAVILION2'), 0) AS paid_pavilion2,
+               COALESCE(jsonb_agg(jsonb_build_object(
+                   'amount', CAST(amount AS text), 'type', type, 'employee_id', employee_id, 'created_at', created_at
+               ) ORDER BY created_at, id), CAST('[]' AS jsonb)) AS items
+        FROM payments WHERE order_id = o.id
+    ) p ON true
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(SUM(quantity), 0) AS reserved FROM plate_reservations WHERE order_id = o.id
+    ) r ON true
+    LEFT JOIN LATERAL (
+        SELECT amount, paid_at, paid_by_id FROM plate_payouts WHERE order_id = o.id ORDER BY id DESC LIMIT 1
+    ) po ON true
+    WHERE o.id = :order_id
+""").columns(items=JSONB, form_data=JSONB)
+
+
+async def fetch_order_full(db: AsyncSession, order_id: int):
+    """Строка карточки заказа; нет заказа — None."""
+    r = await db.execute(_ORDER_FULL_SQL, {"order_id": order_id})
+    return r.mappings().one_or_none()
+
+
+def _payment_items(items) -> list[dict]:
+    if isinstance(items, str):
+        items = json.loads(items)
+    return items or []
+
+
+def employee_ids(row) -> list[Optional[int]]:
+    """Сотрудники карточки (оформил, принимали платежи, выдал деньги за номера) — для справочника имён."""
+    return [row["employee_id"], row["payout_paid_by_id"]] + [p.get("employee_id") for p in _payment_items(row["items"])]
+
+
+def build_order_full(row, names: dict[int, str]) -> OrderFullResponse:
+    """Ответ /orders/{id}/full из строки запроса и имён сотрудников."""
+    fd = row["form_data"] or {}
+    paid_total = Decimal(row["paid_total"])
+    payout = None
+    if row["payout_amount"] is not None:
+        payout = PlatePayoutState(
+            amount=row["payout_amount"],
+            paid_at=row["payout_paid_at"].isoformat() if row["payout_paid_at"] else None,
+            paid_by_name=names.get(row["payout_paid_by_id"]),
+        )
+    status = row["status"]
+    return OrderFullResponse(
+        id=row["id"],
+        public_id=row["public_id"],
+        status=getattr(status, "value", status),
+        total_amount=row["total_amount"],
+        state_duty_amount=row["state_duty_amount"],
+        income_pavilion1=row["income_pavilion1"],
+        income_pavilion2=row["income_pavilion2"],
+        need_plate=row["need_plate"],
+        service_type=row["service_type"],
+        created_at=row["created_at"].isoformat() if row["created_at"] else "",
+        client=(fd.get("client_fio") or fd.get("client_legal_name") or "").strip() or None,
+        form_data=row["form_data"],
+        created_by_name=names.get(row["employee_id"]),
+        payments=[
+            OrderPaymentItem(
+                amount=Decimal(p["amount"]),
+                type=p["type"],
+                employee_name=names.get(p.get("employee_id")),
+                created_at=p.get("created_at") or "",
+            )
+            for p in _payment_items(row["items"])
+        ],
+        paid_by_type={
+            PaymentType.STATE_DUTY.value: row["paid_state_duty"],
+            PaymentType.INCOME_PAVILION1.value: row["paid_pavilion1"],
+            PaymentType.INCOME_PAVILION2.value: row["paid_pavilion2"],
+        },
+        paid_total=paid_total,
+        debt=Decimal(row["total_amount"]) - paid_total,
+        plates_reserved=int(row["reserved"] or 0),
+        plate_payout=payout,
+    )
@@ -0,0 +1,122 @@
+"""
+Поиск заказов по клиенту, VIN, госномеру и телефону.
+
+Ищется по генерируемой колонке orders.search_text (ORDER_SEARCH_TEXT_SQL): подстрока —
+через триграммный GIN-индекс (pg_trgm, LIKE '%…%'), слова с учётом словоформ — через
+GIN-индекс to_tsvector('russian'). Ранг — word_similarity + ts_rank (округлён, чтобы курсор
+был точным); страницы — keyset по (rank, id) по убыванию.
+
+pg_trgm необязателен (CREATE EXTENSION может требовать прав владельца БД): его наличие
+проверяется один раз на процесс, без него ранг — только ts_rank, а LIKE идёт без индекса.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Order
+
+MIN_QUERY_LENGTH = 3
+
+_PHONE_QUERY = re.compile(r"^[\d+()\s\-]+$")
+_NOT_DIGITS = re.compile(r"\D")
+_SPACES = re.compile(r"[\s\-]")
+
+# Конфигурация 'russian' и выражения — литералами, как в индексах (иначе планировщик их не использует)
+_TS_RANK = (
+    "ts_rank(to_tsvector('russian'::regconfig, o.search_text), plainto_tsquery('russian'::regconfig, :q))"
+)
+_SEARCH_SQL_TEMPLATE = """
+    WITH hits AS (
+        SELECT o.id, round(({rank})::numeric, 4) AS rank
+        FROM orders o
+        WHERE o.search_text LIKE :pattern
+           OR o.search_text LIKE :code_pattern
+           OR to_tsvector('russian'::regconfig, o.search_text) @@ plainto_tsquery('russian'::regconfig, :q)
+    )
+    SELECT id, rank FROM hits
+    WHERE CAST(:after_rank AS numeric) IS NULL
+       OR (rank, id) < (CAST(:after_rank AS numeric), CAST(:after_id AS integer))
+    ORDER BY rank DESC, id DESC
+    LIMIT :limit
+"""
+_SEARCH_SQL = text(_SEARCH_SQL_TEMPLATE.format(rank=f"word_similarity(:q, o.search_text) + {_TS_RANK}"))
+# Без pg_trgm: word_similarity недоступна
+_SEARCH_SQL_NO_TRGM = text(_SEARCH_SQL_TEMPLATE.format(rank=_TS_RANK))
+
+_HAS_TRGM_SQL = text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+
+# Есть ли pg_trgm в БД; None — ещё не проверяли
+_trigram: Optional[bool] = None
+
+
+async def _has_trigram(db: AsyncSession) -> bool:
+    global _trigram
+    if _trigram is None:
+        _trigram = bool((await db.execute(_HAS_TRGM_SQL)).scalar())
+    return _trigram
+
+
+def _like(s: str) -> str:
+    return "%" + s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_terms(q: str) -> Tuple[str, str]:
+    """
+    (текст, код) из запроса: текст — нижний регистр с одиночными пробелами; код — без пробелов
+    и дефисов (VIN, госномер), а для телефона — цифры без кода страны (+7 / 8).
+    """
+    words = " ".join(q.lower().split())
+    if _PHONE_QUERY.match(q):
+        digits = _NOT_DIGITS.sub("", q)
+        if len(digits) == 11 and digits[0] in "78":
+            digits = digits[1:]
+        return words, digits
+    return words, _SPACES.sub("", words)
+
+
+def encode_cursor(rank: Decimal, order_id: int) -> str:
+    return f"{rank}|{order_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[Decimal, int]:
+    """Курсор из encode_cursor → (rank, id) последней строки предыдущей страницы."""
+    try:
+        rank, order_id = cursor.rsplit("|", 1)
+        return Decimal(rank), int(order_id)
+    except (ValueError, InvalidOperation):
+        raise ValueError("Неверный курсор страницы")
+
+
+async def search_orders(
+    db: AsyncSession, q: str, cursor: Optional[str], limit: int,
+) -> Tuple[list[Tuple[Order, Decimal]], Optional[str]]:
+    """
+    Заказы с рангом (лучшие сверху) и курсор следующей страницы. Неверный курсор или запрос,
+    в котором без пробелов, дефисов и кода страны остаётся меньше MIN_QUERY_LENGTH символов, — ValueError.
+    """
+    after_rank, after_id = decode_cursor(cursor) if cursor else (None, None)
+    words, code = search_terms(q)
+    if len(code) < MIN_QUERY_LENGTH:
+        raise ValueError(f"Запрос должен содержать не меньше {MIN_QUERY_LENGTH} символов")
+    sql = _SEARCH_SQL if await _has_trigram(db) else _SEARCH_SQL_NO_TRGM
+    r = await db.execute(sql, {
+        "q": words,
+        "pattern": _like(words),
+        "code_pattern": _like(code),
+        "after_rank": after_rank,
+        "after_id": after_id,
+        "limit": limit + 1,
+    })
+    hits = r.all()
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1][1], hits[-1][0])
+    if not hits:
+        return [], None
+    orders = (await db.execute(select(Order).where(Order.id.in_([h[0] for h in hits])))).scalars().all()
+    by_id = {o.id: o for o in orders}
+    return [(by_id[order_id], rank) for order_id, rank in hits if order_id in by_id], next_cursor
@@ -2,12 +2,14 @@ from decimal import Decimal
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.data.price_list import get_label_by_template
 from app.models import Order, OrderStatus
 from app.schemas.order import OrderCreate
+from app.services import client_index, price_list_cache, vehicle_service
+from app.services.order_status import set_order_status
 
 
-def _form_data_from_create(d: OrderCreate) -> dict:
+def _form_data_from_create(d: OrderCreate, labels: dict[str, str]) -> dict:
+    """form_data заказа; labels — названия из прейскуранта для документов без label."""
     out = {
         "client_fio": d.client_fio,
         "client_passport": d.client_passport,
@@ -43,13 +45,18 @@ def _form_data_from_create(d: OrderCreate) -> dict:
     }
     if d.documents:
         out["documents"] = [
-            {"template": x.template, "label": x.label or get_label_by_template(x.template), "price": str(x.price)}
+            {"template": x.template, "label": x.label or labels.get(x.template, x.template), "price": str(x.price)}
             for x in d.documents
         ]
     return out
 
 
 async def create_order(db: AsyncSession, data: OrderCreate) -> Order:
+    labels = {
+        doc.template: await price_list_cache.label_for(db, doc.template)
+        for doc in data.documents or ()
+        if not doc.label
+    }
     state_duty = data.state_duty
     if data.documents:
         income_p1 = sum(doc.price for doc in data.documents)
@@ -70,10 +77,13 @@ async def create_order(db: AsyncSession, data: OrderCreate) -> Order:
         income_pavilion2=income_p2,
         need_plate=need_plate,
         service_type=service_type,
-        form_data=_form_data_from_create(data),
+        form_data=_form_data_from_create(data, labels),
         employee_id=data.employee_id,
     )
     db.add(order)
     await db.flush()
     await db.refresh(order)
+    set_order_status(db, order, OrderStatus.AWAITING_PAYMENT, data.employee_id, created=True)
+    client_index.track_new_order(db, order)
+    await vehicle_service.remember_vehicle(db, order.id, order.form_data)
     return order
@@ -1,4 +1,10 @@
-from app.models import OrderStatus
+"""Переходы статусов заказа; каждая смена статуса пишется в order_status_history."""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Order, OrderStatus, OrderStatusHistory
 
 ALLOWED_TRANSITIONS: dict[OrderStatus, list[OrderStatus]] = {
     OrderStatus.CREATED: [OrderStatus.AWAITING_PAYMENT, OrderStatus.PROBLEM],
@@ -17,3 +23,24 @@ ALLOWED_TRANSITIONS: dict[OrderStatus, list[OrderStatus]] = {
 
 def can_transition(current: OrderStatus, new: OrderStatus) -> bool:
     return new in ALLOWED_TRANSITIONS.get(current, [])
+
+
+def set_order_status(
+    db: AsyncSession,
+    order: Order,
+    new_status: OrderStatus,
+    employee_id: Optional[int] = None,
+    created: bool = False,
+) -> None:
+    """
+    Сменить статус и записать переход в историю (в той же транзакции). created — статус
+    только что созданного заказа: в истории from_status = NULL. Заказ должен иметь id (после flush).
+    """
+    db.add(OrderStatusHistory(
+        order_id=order.id,
+        from_status=None if created else order.status,
+        to_status=new_status,
+        employee_id=employee_id,
+        changed_at=datetime.utcnow(),
+    ))
+    order.status = new_status
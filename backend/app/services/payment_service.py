@@ -0,0 +1,32 @@
+"""
+Запись платежа: сам платёж, сумма смены и дневные итоги аналитики — в одной транзакции;
+после коммита платёж попадает в кеш аналитики в памяти (если он включён).
+Все места, где создаётся Payment, должны идти через record_payment.
+"""
+from datetime import datetime
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Payment
+from app.services import analytics_cache
+from app.services.analytics_service import add_to_rollup
+from app.services.shift_service import add_to_shift_totals
+
+
+async def is_first_payment(db: AsyncSession, order_id: int) -> bool:
+    """У заказа ещё нет платежей: следующий откроет его в числе заказов (как min id в REBUILD_ROLLUP_SQL)."""
+    return not (await db.execute(select(exists().where(Payment.order_id == order_id)))).scalar()
+
+
+async def record_payment(db: AsyncSession, payment: Payment, new_order: bool = False) -> None:
+    """
+    Добавить платёж. new_order — первый платёж заказа (is_first_payment): учитывается в числе заказов
+    одинаково в дневных итогах и в кеше аналитики.
+    """
+    if payment.created_at is None:
+        payment.created_at = datetime.utcnow()
+    db.add(payment)
+    await add_to_shift_totals(db, payment)
+    await add_to_rollup(db, payment, new_order=new_order)
+    analytics_cache.track_new_payment(db, payment, new_order)
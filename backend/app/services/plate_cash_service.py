@@ -0,0 +1,67 @@
+"""
+Касса номеров: накопительный остаток по строкам.
+
+plate_cash_rows.balance — остаток кассы после строки в порядке (created_at, id).
+При вставке, правке и удалении строк остаток пересчитывается оконной функцией только
+для строк начиная с изменённой (обычно это последние строки). Изменения кассы номеров
+выполняются под транзакционной advisory-блокировкой, чтобы параллельные записи не
+считали остаток от одной и той же предыдущей строки. Остаток на момент времени —
+одна строка по индексу (created_at, id), без суммирования истории.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select, func, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PlateCashRow
+
+# Ключ pg_advisory_xact_lock для записи в кассу номеров
+LEDGER_LOCK_KEY = 7_340_021
+
+_RECOMPUTE_SQL = text("""
+    UPDATE plate_cash_rows AS p
+    SET balance = s.balance
+    FROM (
+        SELECT id, CAST(:base AS NUMERIC(12,2)) + SUM(amount) OVER (ORDER BY created_at, id) AS balance
+        FROM plate_cash_rows
+        WHERE (created_at, id) >= (:created_at, :row_id)
+    ) s
+    WHERE p.id = s.id AND p.balance IS DISTINCT FROM s.balance
+""")
+
+
+async def lock_ledger(db: AsyncSession) -> None:
+    """Заблокировать запись в кассу номеров до конца транзакции."""
+    await db.execute(select(func.pg_advisory_xact_lock(LEDGER_LOCK_KEY)))
+
+
+async def balance_at(db: AsyncSession, at: datetime) -> Decimal:
+    """Остаток кассы номеров на момент at (включительно): последняя строка до at по индексу."""
+    r = await db.execute(
+        select(PlateCashRow.balance)
+        .where(PlateCashRow.created_at <= at)
+        .order_by(PlateCashRow.created_at.desc(), PlateCashRow.id.desc())
+        .limit(1)
+    )
+    return r.scalar_one_or_none() or Decimal("0")
+
+
+async def _balance_before(db: AsyncSession, created_at: datetime, row_id: int) -> Decimal:
+    r = await db.execute(
+        select(PlateCashRow.balance)
+        .where(tuple_(PlateCashRow.created_at, PlateCashRow.id) < tuple_(created_at, row_id))
+        .order_by(PlateCashRow.created_at.desc(), PlateCashRow.id.desc())
+        .limit(1)
+    )
+    return r.scalar_one_or_none() or Decimal("0")
+
+
+async def recompute_balances(db: AsyncSession, created_at: datetime, row_id: int) -> None:
+    """
+    Пересчитать остаток для строк начиная с позиции (created_at, row_id).
+    Вызывать после flush вставки/правки/удаления, под lock_ledger.
+    """
+    base = await _balance_before(db, created_at, row_id)
+    await db.execute(_RECOMPUTE_SQL, {"base": base, "created_at": created_at, "row_id": row_id})
+
@@ -0,0 +1,142 @@
+"""
+Прогноз расхода заготовок номеров.
+
+Дневной ряд (списано со склада + брак, заказано номеров) считается одним SQL-запросом
+по закрытым дням с generate_series (пустые дни = 0) и кешируется в процессе до смены даты.
+Заказанные номера относятся ко дню первой оплаты заказа (первый переход в PAID по
+order_status_history), а не ко дню создания: неоплаченные заказы в ряд не попадают.
+По ряду — скользящее среднее, дни до исчерпания и рекомендуемый объём закупки;
+текущий остаток читается из plate_stock при каждом запросе.
+"""
+import math
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.plate_stock_service import plate_quantity_sql
+
+# Глубина истории для ряда (дней), окно скользящего среднего не может быть больше
+HISTORY_DAYS = 90
+
+_SERIES_SQL = text(f"""
+    WITH days AS (
+        SELECT generate_series(CAST(:start AS date), CAST(:last AS date), interval '1 day')::date AS day
+    ),
+    consumed AS (
+        SELECT created_at::date AS day, -SUM(quantity) AS qty
+        FROM plate_stock_movements
+        WHERE kind IN ('CONSUME', 'DEFECT') AND created_at >= :start AND created_at < :end
+        GROUP BY 1
+    ),
+    ordered AS (
+        SELECT h.changed_at::date AS day,
+               SUM({plate_quantity_sql("o.form_data")}) AS qty
+        FROM order_status_history h
+        JOIN orders o ON o.id = h.order_id
+        WHERE h.to_status = 'PAID' AND h.changed_at >= :start AND h.changed_at < :end
+          AND o.need_plate AND o.status <> 'PROBLEM'
+          AND NOT EXISTS (
+              SELECT 1 FROM order_status_history e
+              WHERE e.order_id = h.order_id AND e.to_status = 'PAID'
+                AND (e.changed_at, e.id) < (h.changed_at, h.id)
+          )
+        GROUP BY 1
+    )
+    SELECT d.day, COALESCE(c.qty, 0), COALESCE(o.qty, 0)
+    FROM days d
+    LEFT JOIN consumed c ON c.day = d.day
+    LEFT JOIN ordered o ON o.day = d.day
+    ORDER BY d.day
+""")
+
+# (день расчёта) → ряд [(day, consumed, ordered)], пересчитывается раз в сутки
+_series_cache: dict[date, list[tuple[date, int, int]]] = {}
+
+
+def moving_average(values: list[int], window: int) -> list[float]:
+    """Скользящее среднее за window точек (для первых точек — среднее по имеющимся)."""
+    out = []
+    acc = 0
+    for i, v in enumerate(values):
+        acc += v
+        if i >= window:
+            acc -= values[i - window]
+        out.append(acc / min(i + 1, window))
+    return out
+
+
+def build_forecast(
+    daily_rate: float,
+    available: int,
+    lead_time_days: int,
+    cover_days: int,
+    today: date,
+) -> dict:
+    """Дни до исчерпания доступного остатка и сколько заказать, чтобы покрыть поставку + cover_days."""
+    if daily_rate <= 0:
+        days_left: Optional[float] = None
+        stockout_date = None
+    else:
+        days_left = round(max(0, available) / daily_rate, 1)
+        stockout_date = (today + timedelta(days=math.floor(days_left))).isoformat()
+    need = math.ceil(daily_rate * (lead_time_days + cover_days))
+    return {
+        "days_until_stockout": days_left,
+        "stockout_date": stockout_date,
+        "suggested_reorder": max(0, need - max(0, available)),
+    }
+
+
+async def _daily_series(db: AsyncSession, today: date) -> list[tuple[date, int, int]]:
+    cached = _series_cache.get(today)
+    if cached is not None:
+        return cached
+    start = today - timedelta(days=HISTORY_DAYS)
+    r = await db.execute(_SERIES_SQL, {
+        "start": datetime.combine(start, datetime.min.time()),
+        "end": datetime.combine(today, datetime.min.time()),
+        "last": today - timedelta(days=1),
+    })
+    series = [(day, int(consumed), int(ordered)) for day, consumed, ordered in r.all()]
+    _series_cache.clear()
+    _series_cache[today] = series
+    return series
+
+
+async def plate_forecast(
+    db: AsyncSession,
+    available: int,
+    window: int,
+    lead_time_days: int,
+    cover_days: int,
+) -> dict:
+    """
+    Прогноз по закрытым дням. Расход в день — максимум из среднего списания и среднего
+    числа заказанных номеров (у старых заказов нет движений склада, поэтому учитываются оба ряда).
+    """
+    today = datetime.utcnow().date()
+    series = await _daily_series(db, today)
+    consumed = [c for _, c, _ in series]
+    ordered = [o for _, _, o in series]
+    consumed_ma = moving_average(consumed, window)
+    ordered_ma = moving_average(ordered, window)
+    avg_consumed = consumed_ma[-1] if consumed_ma else 0.0
+    avg_ordered = ordered_ma[-1] if ordered_ma else 0.0
+    daily_rate = max(avg_consumed, avg_ordered)
+    result = {
+        "window_days": window,
+        "avg_daily_consumption": round(avg_consumed, 2),
+        "avg_daily_orders": round(avg_ordered, 2),
+        "daily_rate": round(daily_rate, 2),
+        "available": available,
+        "lead_time_days": lead_time_days,
+        "cover_days": cover_days,
+        "series": [
+            {"date": day.isoformat(), "consumed": c, "ordered": o, "consumed_avg": round(ma, 2)}
+            for (day, c, o), ma in zip(series, consumed_ma)
+        ],
+    }
+    result.update(build_forecast(daily_rate, available, lead_time_days, cover_days, today))
+    return result
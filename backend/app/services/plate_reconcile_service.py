@@ -0,0 +1,176 @@
+"""
+Фоновая сверка резервов заготовок с невыданными заказами.
+
+Старые заказы могли остаться без PlateReservation (или с неверным количеством),
+а счётчики plate_stock — разойтись с фактом. Сверка идёт по заказам пачками по id
+(короткие транзакции), исправляет резервы изготовления, затем пересчитывает счётчики
+склада и пишет результат в plate_reconcile_runs. Когда drift_count = 0, счётчики
+и plate_reservations можно считать источником правды.
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, select, delete, func, and_, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.core.logging_config import get_logger
+from app.models import Order, OrderStatus, PlateReservation, PlateReservedAmount, PlateDefect, PlateReconcileRun
+from app.services.plate_stock_service import (
+    UNISSUED_STATUSES,
+    get_or_create_stock,
+    month_start,
+    parse_plate_quantity,
+    plate_quantity_sql,
+)
+
+logger = get_logger(__name__)
+
+# Заказы в изготовлении: под них должна быть ровно одна запись PlateReservation
+IN_WORK_STATUSES = (OrderStatus.PLATE_IN_PROGRESS, OrderStatus.PLATE_READY)
+
+# Сколько расхождений сохранять в details (счётчик drift_count — полный)
+MAX_DETAILS = 200
+
+# То же, что plate_quantity_from_order, но в SQL (запросы ниже — по orders без алиаса)
+_plate_qty_sql = literal_column(plate_quantity_sql("orders.form_data"), Integer)
+
+
+async def _reconcile_batch(db: AsyncSession, after_id: int, batch_size: int, drift: list) -> tuple[int, int]:
+    """
+    Одна пачка невыданных заказов с номерами (id > after_id). Строка склада блокируется,
+    чтобы переходы статусов не шли параллельно с исправлением. Возвращает (последний id, кол-во заказов).
+    """
+    stock = await get_or_create_stock(db, for_update=True)
+    r = await db.execute(
+        select(Order.id, Order.status, Order.form_data["plate_quantity"].astext)
+        .where(Order.need_plate == True, Order.status.in_(UNISSUED_STATUSES), Order.id > after_id)
+        .order_by(Order.id)
+        .limit(batch_size)
+    )
+    orders = r.all()
+    if not orders:
+        return after_id, 0
+    ids = [o.id for o in orders]
+    r = await db.execute(
+        select(PlateReservation.order_id, func.sum(PlateReservation.quantity), func.count())
+        .where(PlateReservation.order_id.in_(ids))
+        .group_by(PlateReservation.order_id)
+    )
+    actual = {oid: (int(total), int(cnt)) for oid, total, cnt in r.all()}
+    delta_in_work = 0
+    for order_id, status, raw_qty in orders:
+        expected = parse_plate_quantity(raw_qty) if status in IN_WORK_STATUSES else 0
+        have, count = actual.get(order_id, (0, 0))
+        if have == expected and count <= 1:
+            continue
+        kind = "missing" if have == 0 else ("stale" if expected else "unexpected")
+        drift.append({"kind": kind, "order_id": order_id, "expected": expected, "actual": have})
+        await db.execute(delete(PlateReservation).where(PlateReservation.order_id == order_id))
+        if expected:
+            db.add(PlateReservation(order_id=order_id, quantity=expected))
+        delta_in_work += expected - have
+    if delta_in_work:
+        stock.reserved_in_work = max(0, stock.reserved_in_work + delta_in_work)
+        db.add(stock)
+    await db.flush()
+    return ids[-1], len(ids)
+
+
+async def _reconcile_counters(db: AsyncSession, drift: list) -> None:
+    """Резервы по выданным/проблемным заказам удалить, счётчики склада пересчитать одним проходом под блокировкой."""
+    stock = await get_or_create_stock(db, for_update=True)
+    in_work_ids = select(Order.id).where(Order.need_plate == True, Order.status.in_(IN_WORK_STATUSES))
+    r = await db.execute(
+        delete(PlateReservation)
+        .where(PlateReservation.order_id.notin_(in_work_ids))
+        .returning(PlateReservation.order_id, PlateReservation.quantity)
+    )
+    for order_id, qty in r.all():
+        drift.append({"kind": "orphan", "order_id": order_id, "expected": 0, "actual": qty})
+
+    unissued = and_(Order.need_plate == True, Order.status.in_(UNISSUED_STATUSES))
+    r = await db.execute(select(Order.total_amount, func.sum(_plate_qty_sql)).where(unissued).group_by(Order.total_amount))
+    by_amount = {amount: int(qty) for amount, qty in r.all()}
+    reserved = sum(by_amount.values())
+    in_work = int((await db.execute(select(func.coalesce(func.sum(PlateReservation.quantity), 0)))).scalar_one() or 0)
+    now = datetime.utcnow()
+    current_month = month_start(now)
+    defects = int((await db.execute(
+        select(func.coalesce(func.sum(PlateDefect.quantity), 0)).where(PlateDefect.created_at >= current_month)
+    )).scalar_one() or 0)
+
+    stored_month = stock.defects_month if stock.defects_month_start == current_month else 0
+    for kind, expected, have in (
+        ("counter_reserved", reserved, stock.reserved),
+        ("counter_in_work", in_work, stock.reserved_in_work),
+        ("counter_defects", defects, stored_month),
+    ):
+        if expected != have:
+            drift.append({"kind": kind, "order_id": None, "expected": expected, "actual": have})
+    r = await db.execute(select(PlateReservedAmount).where(PlateReservedAmount.quantity != 0))
+    stored_amounts = {row.total_amount: row.quantity for row in r.scalars().all()}
+    if stored_amounts != by_amount:
+        drift.append({"kind": "breakdown", "order_id": None, "expected": len(by_amount), "actual": len(stored_amounts)})
+        await db.execute(delete(PlateReservedAmount))
+        db.add_all(PlateReservedAmount(total_amount=a, quantity=q) for a, q in by_amount.items())
+
+    stock.reserved = reserved
+    stock.reserved_in_work = in_work
+    stock.defects_month = defects
+    stock.defects_month_start = current_month
+    db.add(stock)
+    await db.flush()
+
+
+async def reconcile_plate_reservations(
+    session_maker: async_sessionmaker,
+    batch_size: Optional[int] = None,
+) -> PlateReconcileRun:
+    """Полная сверка: пачки заказов → счётчики → запись в plate_reconcile_runs."""
+    batch_size = batch_size or settings.plate_reconcile_batch_size
+    started_at = datetime.utcnow()
+    drift: list = []
+    checked = 0
+    after_id = 0
+    while True:
+        async with session_maker() as db:
+            async with db.begin():
+                after_id, n = await _reconcile_batch(db, after_id, batch_size, drift)
+        checked += n
+        if n < batch_size:
+            break
+    async with session_maker() as db:
+        async with db.begin():
+            await _reconcile_counters(db, drift)
+            run = PlateReconcileRun(
+                started_at=started_at,
+                finished_at=datetime.utcnow(),
+                orders_checked=checked,
+                drift_count=len(drift),
+                details=drift[:MAX_DETAILS],
+            )
+            db.add(run)
+    if drift:
+        logger.warning("Сверка резервов: заказов=%s, расхождений=%s (исправлено)", checked, len(drift))
+    else:
+        logger.info("Сверка резервов: заказов=%s, расхождений нет", checked)
+    return run
+
+
+async def last_reconcile_run(db: AsyncSession) -> Optional[PlateReconcileRun]:
+    r = await db.execute(select(PlateReconcileRun).order_by(PlateReconcileRun.id.desc()).limit(1))
+    return r.scalar_one_or_none()
+
+
+async def run_reconciler_forever(session_maker: async_sessionmaker, interval_minutes: int) -> None:
+    """Фоновая задача (lifespan): сверка сразу после старта и далее раз в interval_minutes."""
+    while True:
+        try:
+            await reconcile_plate_reservations(session_maker)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Сверка резервов не выполнена: %s", e)
+        await asyncio.sleep(interval_minutes * 60)
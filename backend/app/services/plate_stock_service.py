@@ -0,0 +1,173 @@
+"""
+Склад заготовок: счётчики резерва и браков.
+
+Счётчики на строке plate_stock меняются в той же транзакции, что и статус заказа
+(строка склада блокируется SELECT ... FOR UPDATE), поэтому GET /warehouse/plate-stock
+читает одну строку и не сканирует заказы.
+"""
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    Order,
+    OrderStatus,
+    PlateStock,
+    PlateReservation,
+    PlateReservedAmount,
+    PlateDefect,
+    PlateStockMovement,
+    StockMovementKind,
+)
+
+# Невыданные заказы с номерами: под них держится резерв заготовок
+UNISSUED_STATUSES = (OrderStatus.PAID, OrderStatus.PLATE_IN_PROGRESS, OrderStatus.PLATE_READY)
+
+
+async def get_or_create_stock(db: AsyncSession, for_update: bool = False) -> PlateStock:
+    """Строка склада (создаётся при первом обращении). for_update — заблокировать до конца транзакции."""
+    q = select(PlateStock).order_by(PlateStock.id).limit(1)
+    if for_update:
+        q = q.with_for_update().execution_options(populate_existing=True)
+    r = await db.execute(q)
+    row = r.scalar_one_or_none()
+    if not row:
+        row = PlateStock(quantity=0, reserved=0, reserved_in_work=0, defects_month=0)
+        db.add(row)
+        await db.flush()
+    return row
+
+
+# Количество номеров в form_data: целое из цифр (не больше 6, пробелы по краям допустимы), иначе 1.
+# Одно правило в Python (parse_plate_quantity) и в SQL (plate_quantity_sql), чтобы «2 шт» или мусор
+# от старых клиентов не ломали пересчёты и не давали разные числа в счётчиках и сверке.
+_PLATE_QTY = re.compile(r"[0-9]{1,6}")
+
+
+def parse_plate_quantity(raw) -> int:
+    s = str(raw).strip(" ") if raw is not None else ""
+    return max(1, int(s)) if _PLATE_QTY.fullmatch(s) else 1
+
+
+def plate_quantity_sql(form_data: str = "form_data") -> str:
+    """То же правило, что parse_plate_quantity, выражением SQL; form_data — колонка (например, "o.form_data")."""
+    raw = f"btrim({form_data}->>'plate_quantity', ' ')"
+    return f"(CASE WHEN {raw} ~ '^[0-9]{{1,6}}$' THEN GREATEST(1, CAST({raw} AS integer)) ELSE 1 END)"
+
+
+def plate_quantity_from_order(order: Order) -> int:
+    return parse_plate_quantity((order.form_data or {}).get("plate_quantity"))
+
+
+def month_start(now: datetime) -> date:
+    return date(now.year, now.month, 1)
+
+
+def defects_this_month(stock: PlateStock, now: datetime) -> int:
+    """Счётчик браков, если он относится к текущему месяцу, иначе 0."""
+    if stock.defects_month_start != month_start(now):
+        return 0
+    return stock.defects_month
+
+
+async def _add_reserved_amount(db: AsyncSession, total_amount: Decimal, qty: int) -> None:
+    stmt = pg_insert(PlateReservedAmount).values(total_amount=total_amount, quantity=qty)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlateReservedAmount.total_amount],
+        set_={"quantity": PlateReservedAmount.quantity + stmt.excluded.quantity},
+    )
+    await db.execute(stmt)
+
+
+async def reserve_for_paid_order(db: AsyncSession, order: Order) -> None:
+    """Заказ с номерами оплачен (→ PAID): заготовки уходят в резерв."""
+    if not order.need_plate:
+        return
+    qty = plate_quantity_from_order(order)
+    stock = await get_or_create_stock(db, for_update=True)
+    stock.reserved += qty
+    db.add(stock)
+    await _add_reserved_amount(db, order.total_amount, qty)
+    await db.flush()
+
+
+async def release_reserved(db: AsyncSession, order: Order) -> None:
+    """Заказ ушёл из невыданных (COMPLETED / PROBLEM): снять резерв. Вызывать до смены order.status."""
+    if not order.need_plate or order.status not in UNISSUED_STATUSES:
+        return
+    qty = plate_quantity_from_order(order)
+    stock = await get_or_create_stock(db, for_update=True)
+    stock.reserved = max(0, stock.reserved - qty)
+    db.add(stock)
+    await _add_reserved_amount(db, order.total_amount, -qty)
+    await db.flush()
+
+
+async def add_work_reservation(db: AsyncSession, order: Order, qty: int) -> None:
+    """
+    Взять заказ в изготовление: проверить свободный остаток и создать PlateReservation.
+    Raises ValueError с текстом для пользователя, если заготовок не хватает.
+    """
+    stock = await get_or_create_stock(db, for_update=True)
+    available = stock.quantity - stock.reserved_in_work
+    if available < qty:
+        raise ValueError(f"Недостаточно заготовок на складе. Доступно: {available}, нужно: {qty}")
+    db.add(PlateReservation(order_id=order.id, quantity=qty))
+    stock.reserved_in_work += qty
+    db.add(stock)
+    await db.flush()
+
+
+async def remove_work_reservations(db: AsyncSession, order: Order) -> PlateStock:
+    """Удалить резервы изготовления по заказу и уменьшить счётчик. Возвращает заблокированную строку склада."""
+    stock = await get_or_create_stock(db, for_update=True)
+    r = await db.execute(
+        delete(PlateReservation)
+        .where(PlateReservation.order_id == order.id)
+        .returning(PlateReservation.quantity)
+    )
+    removed = sum(r.scalars().all())
+    if removed:
+        stock.reserved_in_work = max(0, stock.reserved_in_work - removed)
+        db.add(stock)
+    await db.flush()
+    return stock
+
+
+async def register_defect(db: AsyncSession, stock: PlateStock, qty: int = 1) -> None:
+    """Списать брак: уменьшить остаток, записать PlateDefect и увеличить счётчик за месяц."""
+    now = datetime.utcnow()
+    current = month_start(now)
+    if stock.defects_month_start != current:
+        stock.defects_month_start = current
+        stock.defects_month = 0
+    stock.defects_month += qty
+    stock.quantity -= qty
+    db.add(stock)
+    db.add(PlateDefect(quantity=qty, created_at=now))
+    db.add(PlateStockMovement(kind=StockMovementKind.DEFECT, quantity=-qty, created_at=now))
+    await db.flush()
+
+
+async def add_stock(db: AsyncSession, amount: int) -> PlateStock:
+    """Пополнить склад (строка блокируется) и записать движение."""
+    stock = await get_or_create_stock(db, for_update=True)
+    stock.quantity += amount
+    db.add(stock)
+    db.add(PlateStockMovement(kind=StockMovementKind.ADD, quantity=amount))
+    await db.flush()
+    return stock
+
+
+async def consume_for_order(db: AsyncSession, order: Order, qty: int) -> PlateStock:
+    """Заказ выдан (COMPLETED): снять резерв изготовления и списать заготовки со склада."""
+    stock = await remove_work_reservations(db, order)
+    stock.quantity -= qty
+    db.add(stock)
+    db.add(PlateStockMovement(kind=StockMovementKind.CONSUME, quantity=-qty, order_id=order.id))
+    await db.flush()
+    return stock
@@ -0,0 +1,146 @@
+"""
+Аналитика павильона 2 (номера) по дням: выдано номеров, срок PAID → COMPLETED, брак, выручка.
+
+Выдача и сроки считаются по order_status_history (индекс по (to_status, changed_at)):
+номера заказа считаются выданными в день перехода в COMPLETED, срок — от первого
+перехода в PAID. Брак — plate_defects, выручка — INCOME_PAVILION2 из daily_rollup.
+Один SQL-запрос с generate_series (пустые дни = 0); закрытые дни кешируются в процессе,
+на каждый запрос пересчитывается только сегодняшний день. Дни до первой выдачи в истории
+статусов не кешируются (история могла появиться позже заказов), а пересборка daily_rollup
+сбрасывает кеш (invalidate).
+"""
+import statistics
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.analytics import PlatesAnalytics, PlatesDayPoint
+from app.services.plate_stock_service import plate_quantity_sql
+
+_PLATES_SQL = text(f"""
+    WITH days AS (
+        SELECT generate_series(CAST(:start AS timestamp), CAST(:last AS timestamp), interval '1 day')::date AS day
+    ),
+    issued AS (
+        SELECT h.changed_at::date AS day,
+               SUM({plate_quantity_sql('o.form_data')}) AS plates,
+               array_agg(EXTRACT(EPOCH FROM h.changed_at - paid.changed_at)::bigint)
+                   FILTER (WHERE paid.changed_at IS NOT NULL) AS lead_seconds
+        FROM order_status_history h
+        JOIN orders o ON o.id = h.order_id AND o.need_plate
+        LEFT JOIN LATERAL (
+            SELECT MIN(p.changed_at) AS changed_at
+            FROM order_status_history p
+            WHERE p.order_id = h.order_id AND p.to_status = 'PAID'
+        ) paid ON true
+        WHERE h.to_status = 'COMPLETED' AND h.changed_at >= :start AND h.changed_at < :end
+        GROUP BY 1
+    ),
+    defects AS (
+        SELECT created_at::date AS day, SUM(quantity) AS qty
+        FROM plate_defects
+        WHERE created_at >= :start AND created_at < :end
+        GROUP BY 1
+    ),
+    revenue AS (
+        SELECT day, SUM(amount) AS amount
+        FROM daily_rollup
+        WHERE payment_type = 'INCOME_PAVILION2' AND day >= CAST(:start AS date) AND day < CAST(:end AS date)
+        GROUP BY 1
+    ),
+    first_issued AS (
+        SELECT MIN(changed_at)::date AS day FROM order_status_history WHERE to_status = 'COMPLETED'
+    )
+    SELECT d.day, COALESCE(i.plates, 0), i.lead_seconds, COALESCE(df.qty, 0), COALESCE(r.amount, 0), f.day
+    FROM days d
+    CROSS JOIN first_issued f
+    LEFT JOIN issued i ON i.day = d.day
+    LEFT JOIN defects df ON df.day = d.day
+    LEFT JOIN revenue r ON r.day = d.day
+    ORDER BY d.day
+""")
+
+
+@dataclass(frozen=True)
+class PlatesDay:
+    """Показатели одного дня; lead_seconds — сроки PAID → COMPLETED по выданным в этот день заказам."""
+
+    day: date
+    plates: int
+    lead_seconds: tuple[int, ...]
+    defects: int
+    revenue: Decimal
+
+
+# Закрытый день (не раньше первой выдачи в истории) → показатели
+_day_cache: dict[date, PlatesDay] = {}
+
+_CENT = Decimal("0.01")
+
+
+def median_hours(lead_seconds) -> Optional[float]:
+    """Медиана сроков в часах (1 знак); нет данных — None."""
+    if not lead_seconds:
+        return None
+    return round(statistics.median(lead_seconds) / 3600, 1)
+
+
+def defect_rate(defects: int, plates: int) -> Optional[Decimal]:
+    """Брак в процентах от выданных номеров; ничего не выдано — None."""
+    if plates <= 0:
+        return None
+    return (Decimal(100 * defects) / plates).quantize(_CENT, ROUND_HALF_UP)
+
+
+def build_plates_analytics(days: list[PlatesDay]) -> PlatesAnalytics:
+    """Итоги за период и точки по дням. Медиана периода — по всем заказам, а не по медианам дней."""
+    plates = sum(d.plates for d in days)
+    defects = sum(d.defects for d in days)
+    return PlatesAnalytics(
+        date_from=days[0].day.isoformat(),
+        date_to=days[-1].day.isoformat(),
+        plates_issued=plates,
+        defects=defects,
+        defect_rate_percent=defect_rate(defects, plates),
+        median_lead_time_hours=median_hours([s for d in days for s in d.lead_seconds]),
+        revenue=sum((d.revenue for d in days), Decimal("0")),
+        days=[
+            PlatesDayPoint(
+                date=d.day.isoformat(),
+                plates_issued=d.plates,
+                defects=d.defects,
+                median_lead_time_hours=median_hours(d.lead_seconds),
+                revenue=d.revenue,
+            )
+            for d in days
+        ],
+    )
+
+
+async def plates_days(db: AsyncSession, start: date, end: date, today: date) -> list[PlatesDay]:
+    """Показатели по дням [start, end]; SQL считает только дни от первого некешированного."""
+    span = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    missing = [d for d in span if d not in _day_cache]
+    fresh = {}
+    if missing:
+        r = await db.execute(_PLATES_SQL, {
+            "start": datetime.combine(missing[0], datetime.min.time()),
+            "last": datetime.combine(end, datetime.min.time()),
+            "end": datetime.combine(end + timedelta(days=1), datetime.min.time()),
+        })
+        for day, plates, lead_seconds, defects, revenue, first_issued in r.all():
+            point = PlatesDay(day, int(plates), tuple(lead_seconds or ()), int(defects), Decimal(revenue))
+            fresh[day] = point
+            # Дни без истории выдач ещё могут заполниться (перенос истории), их не кешируем
+            if first_issued is not None and first_issued <= day < today:
+                _day_cache[day] = point
+    return [fresh.get(d) or _day_cache[d] for d in span]
+
+
+def invalidate() -> None:
+    """Сбросить кеш дней (после пересборки daily_rollup или правки истории статусов)."""
+    _day_cache.clear()
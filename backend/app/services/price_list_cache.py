@@ -0,0 +1,87 @@
+"""
+Прейскурант в памяти процесса.
+
+Список document_prices читается из БД и отдаётся из памяти не дольше
+PRICE_LIST_CACHE_TTL_SECONDS; PUT /price-list после коммита сбрасывает его (invalidate).
+Сброс действует только в воркере, обработавшем изменение, — в остальных (если их несколько)
+список обновится по истечении TTL. ETag — хеш содержимого списка, поэтому он одинаков во всех
+воркерах и после перезапуска, а меняется только вместе с прейскурантом.
+Поиск названия по шаблону — словарь; для шаблонов, которых нет в БД, — значения по умолчанию
+из app/data/price_list.py.
+"""
+import hashlib
+import json
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.data.price_list import get_label_by_template
+from app.models import DocumentPrice
+
+
+class _Snapshot(NamedTuple):
+    """Одна загрузка прейскуранта: список, его ETag и словарь по шаблону — всегда согласованы."""
+    items: list[dict]
+    etag: str
+    by_template: dict[str, dict]
+    loaded_at: float
+
+
+# Номер сброса: загрузка, начатая до invalidate(), не сохраняется
+_version = 1
+_snapshot: Optional[_Snapshot] = None
+
+
+def _row_to_dict(row: DocumentPrice) -> dict:
+    return {
+        "id": row.id,
+        "template": row.template,
+        "label": row.label,
+        "price": float(row.price) if row.price is not None else 0,
+        "sort_order": row.sort_order,
+    }
+
+
+def invalidate() -> None:
+    """Прейскурант изменён: перечитать при следующем обращении."""
+    global _snapshot, _version
+    _snapshot = None
+    _version += 1
+
+
+def _content_etag(items: list[dict]) -> str:
+    digest = hashlib.sha256(json.dumps(items, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f'"{digest[:16]}"'
+
+
+async def _load(db: AsyncSession) -> _Snapshot:
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.loaded_at < settings.price_list_cache_ttl_seconds:
+        return snapshot
+    version = _version
+    r = await db.execute(select(DocumentPrice).order_by(DocumentPrice.sort_order, DocumentPrice.id))
+    items = [_row_to_dict(row) for row in r.scalars().all()]
+    snapshot = _Snapshot(
+        items, _content_etag(items), {item["template"]: item for item in items}, time.monotonic()
+    )
+    if version == _version:
+        # Сохранить, только если за время запроса прейскурант не меняли; вызывающий в любом случае
+        # получает то, что прочитал сам
+        _snapshot = snapshot
+    return snapshot
+
+
+async def get_items(db: AsyncSession) -> tuple[list[dict], str]:
+    """Позиции прейскуранта по sort_order (как в GET /price-list) и ETag именно этого списка."""
+    snapshot = await _load(db)
+    return snapshot.items, snapshot.etag
+
+
+async def label_for(db: AsyncSession, template: str) -> str:
+    """Название документа по шаблону; неизвестный шаблон — название по умолчанию или сам шаблон."""
+    item = (await _load(db)).by_template.get(template)
+    return item["label"] if item else get_label_by_template(template)
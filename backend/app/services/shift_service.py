@@ -0,0 +1,173 @@
+"""
+Смены касс: текущая смена павильона, накопительные суммы платежей и отчёт о закрытии (Z-отчёт).
+
+Суммы по типам платежа хранятся на строке cash_shifts и увеличиваются атомарным UPDATE
+в транзакции платежа, поэтому текущая смена читается одной строкой без SUM по payments.
+Фоновая проверка сравнивает их с полным SUM и исправляет расхождения.
+"""
+import asyncio
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import select, func, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logging_config import get_logger
+from app.models import CashShift, ShiftStatus, ShiftReport, CashRow, PlateCashRow, Payment, PaymentType
+
+logger = get_logger(__name__)
+
+# Графы кассы павильона 1
+CASH_COLUMNS = ("application", "state_duty", "dkp", "insurance", "plates", "total")
+
+# Тип платежа → колонка накопительной суммы на cash_shifts
+SHIFT_TOTAL_COLUMNS = {
+    PaymentType.STATE_DUTY: "total_state_duty",
+    PaymentType.INCOME_PAVILION1: "total_income_pavilion1",
+    PaymentType.INCOME_PAVILION2: "total_income_pavilion2",
+}
+
+
+async def current_shift_id(db: AsyncSession, pavilion: int) -> Optional[int]:
+    """Текущая открытая смена по павильону (1 или 2). Возвращает id смены или None."""
+    q = (
+        select(CashShift.id)
+        .where(CashShift.pavilion == pavilion, CashShift.status == ShiftStatus.OPEN)
+        .order_by(CashShift.opened_at.desc())
+        .limit(1)
+    )
+    r = await db.execute(q)
+    return r.scalar_one_or_none()
+
+
+async def get_open_shift(db: AsyncSession, pavilion: int) -> Optional[CashShift]:
+    """Открытая смена павильона (частичный индекс ix_cash_shifts_open — одна строка)."""
+    q = (
+        select(CashShift)
+        .where(CashShift.pavilion == pavilion, CashShift.status == ShiftStatus.OPEN)
+        .order_by(CashShift.opened_at.desc())
+        .limit(1)
+    )
+    r = await db.execute(q)
+    return r.scalar_one_or_none()
+
+
+async def add_to_shift_totals(db: AsyncSession, payment: Payment) -> None:
+    """Увеличить сумму смены платежа (UPDATE ... SET col = col + amount); вызывается из record_payment."""
+    if payment.shift_id is None:
+        return
+    col = SHIFT_TOTAL_COLUMNS[payment.type]
+    amount = Decimal(str(payment.amount))
+    await db.execute(
+        update(CashShift)
+        .where(CashShift.id == payment.shift_id)
+        .values({col: getattr(CashShift, col) + amount})
+        .execution_options(synchronize_session=False)
+    )
+
+
+def shift_totals_to_dict(shift: CashShift) -> dict:
+    return {t.value: float(getattr(shift, col) or 0) for t, col in SHIFT_TOTAL_COLUMNS.items()}
+
+
+async def check_shift_totals(db: AsyncSession, only_open: bool = True) -> list[dict]:
+    """
+    Сверить накопительные суммы смен с SUM(payments.amount) по shift_id и типу.
+    Расхождения исправляются; возвращается их список (shift_id, type, expected, actual).
+    """
+    q = select(CashShift).with_for_update().execution_options(populate_existing=True)
+    if only_open:
+        q = q.where(CashShift.status == ShiftStatus.OPEN)
+    shifts = (await db.execute(q)).scalars().all()
+    if not shifts:
+        return []
+    r = await db.execute(
+        select(Payment.shift_id, Payment.type, func.coalesce(func.sum(Payment.amount), 0))
+        .where(Payment.shift_id.in_([s.id for s in shifts]))
+        .group_by(Payment.shift_id, Payment.type)
+    )
+    sums = {(shift_id, t): Decimal(total) for shift_id, t, total in r.all()}
+    drift = []
+    for shift in shifts:
+        for t, col in SHIFT_TOTAL_COLUMNS.items():
+            expected = sums.get((shift.id, t), Decimal("0"))
+            actual = getattr(shift, col) or Decimal("0")
+            if expected != actual:
+                drift.append({"shift_id": shift.id, "type": t.value, "expected": str(expected), "actual": str(actual)})
+                setattr(shift, col, expected)
+                db.add(shift)
+    await db.flush()
+    return drift
+
+
+async def run_shift_totals_check_forever(session_maker: async_sessionmaker, interval_minutes: int) -> None:
+    """Фоновая задача (lifespan): сверка сумм открытых смен раз в interval_minutes."""
+    while True:
+        try:
+            async with session_maker() as db:
+                async with db.begin():
+                    drift = await check_shift_totals(db)
+            if drift:
+                logger.warning("Суммы смен расходились с платежами (исправлено): %s", drift)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Сверка сумм смен не выполнена: %s", e)
+        await asyncio.sleep(interval_minutes * 60)
+
+
+async def build_shift_report(db: AsyncSession, shift: CashShift) -> ShiftReport:
+    """
+    Снимок итогов смены по строкам кассы и платежам с её shift_id.
+    Ожидаемый остаток = начальный + итог строк кассы смены; расхождение = заявленный − ожидаемый.
+    """
+    if shift.pavilion == 1:
+        q = select(func.count(), *(func.coalesce(func.sum(getattr(CashRow, c)), 0) for c in CASH_COLUMNS))
+        r = (await db.execute(q.where(CashRow.shift_id == shift.id))).one()
+        rows_count = r[0]
+        sums = dict(zip(CASH_COLUMNS, r[1:]))
+        cash_total = sums["total"]
+    else:
+        q = select(func.count(), func.coalesce(func.sum(PlateCashRow.amount), 0))
+        rows_count, cash_total = (await db.execute(q.where(PlateCashRow.shift_id == shift.id))).one()
+        sums = {"amount": cash_total}
+    r = await db.execute(
+        select(Payment.type, func.count(), func.coalesce(func.sum(Payment.amount), 0))
+        .where(Payment.shift_id == shift.id)
+        .group_by(Payment.type)
+    )
+    payments = {t.value: {"count": n, "amount": str(amount)} for t, n, amount in r.all()}
+    expected = (shift.opening_balance or Decimal("0")) + Decimal(cash_total)
+    declared = shift.closing_balance
+    report = ShiftReport(
+        shift_id=shift.id,
+        pavilion=shift.pavilion,
+        rows_count=rows_count,
+        column_totals={k: str(v) for k, v in sums.items()},
+        payments=payments,
+        opening_balance=shift.opening_balance,
+        expected_balance=expected,
+        declared_balance=declared,
+        discrepancy=(declared - expected) if declared is not None else None,
+    )
+    db.add(report)
+    await db.flush()
+    return report
+
+
+def shift_report_to_dict(report: ShiftReport) -> dict:
+    return {
+        "shift_id": report.shift_id,
+        "pavilion": report.pavilion,
+        "created_at": report.created_at.isoformat() if report.created_at else None,
+        "rows_count": report.rows_count,
+        "column_totals": {k: float(v) for k, v in (report.column_totals or {}).items()},
+        "payments": {
+            t: {"count": p["count"], "amount": float(p["amount"])}
+            for t, p in (report.payments or {}).items()
+        },
+        "opening_balance": float(report.opening_balance),
+        "expected_balance": float(report.expected_balance),
+        "declared_balance": float(report.declared_balance) if report.declared_balance is not None else None,
+        "discrepancy": float(report.discrepancy) if report.discrepancy is not None else None,
+    }
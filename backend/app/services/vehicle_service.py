@@ -0,0 +1,108 @@
+"""
+Данные ТС по VIN для автозаполнения формы.
+
+Таблица vehicles (ключ — нормализованный VIN) обновляется в транзакции создания заказа:
+upsert, при котором новые непустые поля перезаписывают старые, а незаполненные в новом
+заказе остаются из прежних (attributes || excluded.attributes). Для заказов, созданных до
+появления таблицы, она заполняется один раз при старте (VEHICLES_BACKFILL_SQL) тем же
+слиянием по всем заказам VIN от старых к новым.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Vehicle
+from app.services.form_history_service import normalize_code
+
+# Поля ТС в form_data заказа (schemas/order.py)
+VEHICLE_FIELDS = (
+    "brand_model", "vehicle_type", "year", "engine", "chassis", "body", "color", "srts", "pts", "plate_number",
+)
+_VIN_LENGTH = 32
+
+
+def normalize_vin(value) -> Optional[str]:
+    vin = normalize_code(value)
+    return vin[:_VIN_LENGTH] if vin else None
+
+
+def vehicle_attributes(form_data: Optional[dict]) -> dict:
+    """Заполненные поля ТС из form_data (пустые строки не учитываются)."""
+    fd = form_data or {}
+    out = {}
+    for field in VEHICLE_FIELDS:
+        value = fd.get(field)
+        value = str(value).strip() if value is not None else ""
+        if value:
+            out[field] = value
+    return out
+
+
+async def remember_vehicle(db: AsyncSession, order_id: int, form_data: Optional[dict]) -> None:
+    """Запомнить данные ТС заказа; без VIN — ничего не делать."""
+    vin = normalize_vin((form_data or {}).get("vin"))
+    if not vin:
+        return
+    stmt = pg_insert(Vehicle).values(
+        vin=vin,
+        attributes=vehicle_attributes(form_data),
+        order_id=order_id,
+        updated_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Vehicle.vin],
+        set_={
+            "attributes": Vehicle.attributes.concat(stmt.excluded.attributes),
+            "order_id": stmt.excluded.order_id,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_vehicle(db: AsyncSession, vin: str) -> Optional[Vehicle]:
+    key = normalize_vin(vin)
+    return await db.get(Vehicle, key) if key else None
+
+
+def _backfill_sql() -> str:
+    """
+    Все заказы VIN сворачиваются так же, как при upsert по порядку создания (attributes || excluded.attributes):
+    по каждому полю — значение из самого нового заказа, где оно заполнено; order_id и updated_at — последнего заказа.
+    """
+    attributes = ", ".join(
+        f"'{field}', NULLIF(btrim(o.form_data->>'{field}'), '')" for field in VEHICLE_FIELDS
+    )
+    return f"""
+        WITH src AS (
+            SELECT v.vin, o.id, COALESCE(o.created_at, now() AT TIME ZONE 'utc') AS created_at,
+                   jsonb_strip_nulls(jsonb_build_object({attributes})) AS attributes
+            FROM orders o
+            CROSS JOIN LATERAL (
+                SELECT left(upper(regexp_replace(o.form_data->>'vin', '[\\s\\-]', '', 'g')), {_VIN_LENGTH}) AS vin
+            ) v
+            WHERE v.vin <> ''
+        ),
+        latest AS (
+            SELECT DISTINCT ON (vin) vin, id, created_at FROM src ORDER BY vin, id DESC
+        ),
+        fields AS (
+            SELECT DISTINCT ON (s.vin, a.key) s.vin, a.key, a.value
+            FROM src s
+            CROSS JOIN LATERAL jsonb_each(s.attributes) a
+            ORDER BY s.vin, a.key, s.id DESC
+        ),
+        merged AS (
+            SELECT vin, jsonb_object_agg(key, value) AS attributes FROM fields GROUP BY vin
+        )
+        INSERT INTO vehicles (vin, attributes, order_id, updated_at)
+        SELECT l.vin, COALESCE(m.attributes, '{{}}'::jsonb), l.id, l.created_at
+        FROM latest l
+        LEFT JOIN merged m ON m.vin = l.vin
+    """
+
+
+# Заполнение vehicles по всем заказам каждого VIN (один раз, если таблица пуста)
+VEHICLES_BACKFILL_SQL = _backfill_sql()
@@ -1,4 +1,4 @@
-"""Фикстуры для тестов API."""
+"""Фикстуры для тестов API и сервисов."""
 import os
 
 import pytest
@@ -7,9 +7,154 @@ from fastapi.testclient import TestClient
 # Использовать тестовую БД, если задана (чтобы не трогать прод)
 TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
 
+# Логин/пароль из .env для теста (если нет — тесты с БД пропускаются)
+SUPERUSER_LOGIN = os.environ.get("SUPERUSER_LOGIN", "sergey151")
+SUPERUSER_PASSWORD = os.environ.get("SUPERUSER_PASSWORD", "1wq21wq2")
+
 
 @pytest.fixture
 def client():
     """Тестовый клиент приложения."""
     from app.main import app
     return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Получить заголовок Authorization после логина суперпользователя."""
+    try:
+        r = client.post(
+            "/auth/login",
+            data={"username": SUPERUSER_LOGIN, "password": SUPERUSER_PASSWORD},
+        )
+    except OSError:
+        pytest.skip("Нет подключения к БД")
+    if r.status_code != 200:
+        pytest.skip("Логин не удался (нет БД или неверные SUPERUSER_* в env)")
+    data = r.json()
+    token = data.get("access_token")
+    assert token
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def create_order(client, auth_headers):
+    """Создать заказ через POST /orders: минимальное тело + переданные поля формы; нет прав — skip."""
+
+    def create(**fields) -> dict:
+        body = {
+            "state_duty": 0,
+            "extra_amount": 0,
+            "plate_amount": 0,
+            "summa_dkp": 0,
+            "need_plate": False,
+            "documents": [],
+            **fields,
+        }
+        r = client.post("/orders", json=body, headers=auth_headers)
+        if r.status_code in (401, 403):
+            pytest.skip("Нет прав на создание заказа")
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    return create
+
+
+class FakeResult:
+    """Результат execute() без БД: строки для all(), scalars(), scalar_one_or_none(), mappings()."""
+
+    def __init__(self, rows=()):
+        self._rows = list(rows)
+
+    def all(self):
+        return list(self._rows)
+
+    def scalars(self):
+        return FakeResult(self._rows)
+
+    def mappings(self):
+        return FakeResult(self._rows)
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+    def scalar_one_or_none(self):
+        return self.first()
+
+    one_or_none = scalar_one_or_none
+    scalar = scalar_one_or_none
+
+    def one(self):
+        (row,) = self._rows
+        return row
+
+    scalar_one = one
+
+
+class FakeDb:
+    """
+    Сессия без БД. На каждый execute() запоминает (запрос, параметры) в executed и отдаёт FakeResult:
+    respond(stmt, params) → строки, если задан; иначе следующий ответ из results; иначе rows
+    (одни и те же строки на каждый запрос, их можно подменить между вызовами).
+    Вызов и async with возвращают саму сессию — годится как session_maker.
+    """
+
+    def __init__(self, rows=(), *, results=None, respond=None):
+        self.rows = rows
+        self.results = list(results or [])
+        self.respond = respond
+        self.executed = []
+        self.added = []
+        self.commits = 0
+
+    @property
+    def loads(self) -> int:
+        return len(self.executed)
+
+    @property
+    def params(self) -> list:
+        return [params for _, params in self.executed]
+
+    @property
+    def statements(self) -> list:
+        return [stmt for stmt, _ in self.executed]
+
+    async def execute(self, stmt, params=None):
+        self.executed.append((stmt, params))
+        if self.respond is not None:
+            rows = self.respond(stmt, params)
+        elif self.results:
+            rows = self.results.pop(0)
+        else:
+            rows = self.rows
+        return rows if isinstance(rows, FakeResult) else FakeResult(rows or ())
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def add_all(self, objs):
+        self.added.extend(objs)
+
+    async def flush(self):
+        pass
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fake_db():
+    """Фабрика FakeDb: fake_db(rows), fake_db(results=[...]), fake_db(respond=...)."""
+    return FakeDb
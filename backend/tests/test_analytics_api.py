@@ -0,0 +1,35 @@
+"""API аналитики на живой БД: пересборка дневных итогов. Без БД или без входа суперпользователя тесты пропускаются."""
+from datetime import datetime
+
+import pytest
+
+
+def _today_block(client, auth_headers, day: str) -> dict:
+    r = client.get("/analytics/today", params={"date_from": day, "date_to": day}, headers=auth_headers)
+    if r.status_code == 403:
+        pytest.skip("Нет доступа к аналитике")
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_rollup_rebuild_keeps_live_totals(client, auth_headers, create_order):
+    """POST /analytics/rollup/rebuild за сегодня даёт те же итоги, что накоплены при оплате."""
+    day = datetime.utcnow().date().isoformat()
+    before = _today_block(client, auth_headers, day)
+    order = create_order(state_duty=700, extra_amount=300)
+    r = client.post(f"/orders/{order['id']}/pay", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    live = _today_block(client, auth_headers, day)
+    assert live["orders_count"] == before["orders_count"] + 1
+
+    r = client.post("/analytics/rollup/rebuild", params={"date_from": day, "date_to": day}, headers=auth_headers)
+    if r.status_code == 403:
+        pytest.skip("Пересборка итогов — только для админа")
+    assert r.status_code == 200, r.text
+    assert r.json()["rows"] >= 1
+    assert _today_block(client, auth_headers, day) == live
+
+
+def test_rollup_rebuild_rejects_bad_date(client, auth_headers):
+    r = client.post("/analytics/rollup/rebuild", params={"date_from": "19.10.2026"}, headers=auth_headers)
+    assert r.status_code in (400, 403)
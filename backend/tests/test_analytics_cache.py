@@ -0,0 +1,84 @@
+"""Колоночный кеш платежей (без БД; пропускается, если NumPy не установлен)."""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.models import Payment, PaymentType
+from app.services import analytics_cache
+from app.services.analytics_cache import PaymentColumns
+
+D1 = datetime(2026, 10, 1, 10, 0)
+D2 = datetime(2026, 10, 2, 12, 30)
+D3 = datetime(2026, 10, 3, 9, 15)
+
+
+def _columns():
+    cols = PaymentColumns(capacity=2)
+    # (id, created_at, amount, type, employee_id, order_id)
+    cols.append_rows([
+        (1, D1, Decimal("2850"), PaymentType.STATE_DUTY, 7, 100),
+        (2, D1, Decimal("1500.50"), PaymentType.INCOME_PAVILION1, 7, 100),
+        (3, D2, Decimal("1500"), PaymentType.INCOME_PAVILION2, 8, 101),
+        (4, D3, Decimal("500"), PaymentType.INCOME_PAVILION1, 7, 100),
+        (5, D3, Decimal("300"), PaymentType.INCOME_PAVILION1, None, 102),
+    ])
+    return cols
+
+
+def test_totals_by_type_and_first_payment_orders():
+    by_type, orders = _columns().totals_by_type(D1.replace(hour=0), datetime(2026, 10, 4))
+    assert by_type == {
+        PaymentType.STATE_DUTY: Decimal("2850.00"),
+        PaymentType.INCOME_PAVILION1: Decimal("2300.50"),
+        PaymentType.INCOME_PAVILION2: Decimal("1500.00"),
+    }
+    assert orders == 3
+    # Доплата по заказу 100 в другой день не считается новым заказом
+    _, orders = _columns().totals_by_type(datetime(2026, 10, 3), datetime(2026, 10, 4))
+    assert orders == 1
+
+
+def test_new_payments_use_record_payment_flag(fake_db, monkeypatch):
+    """После коммита в кеш идёт тот же new_order, что получили дневные итоги, а не «первый в кеше»."""
+    cols = _columns()
+    monkeypatch.setattr(analytics_cache, "_cache", cols)
+    db = fake_db()
+    db.info = {}
+    # Заказ 103 открыт доплатой (new_order), оплата следом уже не новый заказ; заказ 104 — без флага
+    payments = [
+        (Payment(id=6, created_at=D3, amount=Decimal("100"), type=PaymentType.INCOME_PAVILION2, employee_id=8, order_id=103), True),
+        (Payment(id=7, created_at=D3, amount=Decimal("900"), type=PaymentType.INCOME_PAVILION1, employee_id=7, order_id=103), False),
+        (Payment(id=8, created_at=D3, amount=Decimal("50"), type=PaymentType.INCOME_PAVILION1, employee_id=7, order_id=104), False),
+    ]
+    for payment, new_order in payments:
+        analytics_cache.track_new_payment(db, payment, new_order)
+    analytics_cache._after_commit(db)
+    _, orders = cols.totals_by_type(datetime(2026, 10, 3), datetime(2026, 10, 4))
+    assert cols.size == 8 and orders == 2
+
+
+def test_employee_totals_count_distinct_orders():
+    rows = _columns().employee_totals(datetime(2026, 10, 1), datetime(2026, 10, 4), tuple(PaymentType))
+    assert rows == [(7, 1, 485050), (8, 1, 150000)]
+    plates = _columns().employee_totals(datetime(2026, 10, 1), datetime(2026, 10, 4), (PaymentType.INCOME_PAVILION2,))
+    assert plates == [(8, 1, 150000)]
+
+
+def test_out_of_order_commit_is_appended_once():
+    cols = _columns()
+    late = (6, D3, Decimal("100"), PaymentType.INCOME_PAVILION1, 8, 103)
+    cols.append_rows([(7, D3, Decimal("200"), PaymentType.INCOME_PAVILION1, 8, 104)])
+    assert cols.append_rows([late]) == 1
+    assert cols.append_rows([late]) == 0
+    assert cols.size == 7 and cols.last_id == 7
+
+
+def test_check_histogram():
+    top, counts = _columns().check_histogram(datetime(2026, 10, 1), datetime(2026, 10, 4), bins=4)
+    # Чеки: заказ 100 — 4850.50, 101 — 1500, 102 — 300
+    assert top == 485050
+    assert counts == [1, 1, 0, 1]
+    assert _columns().check_histogram(datetime(2026, 11, 1), datetime(2026, 11, 2), bins=4) == (0, [])
@@ -0,0 +1,129 @@
+"""Показатели аналитики из дневных итогов (без БД)."""
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import PaymentType
+from app.services import analytics_service
+from app.services.analytics_service import PAVILION_BY_TYPE, block_from_totals, dynamics, period_starts
+
+
+def test_block_from_totals():
+    block = block_from_totals(
+        {
+            PaymentType.STATE_DUTY: Decimal("2850"),
+            PaymentType.INCOME_PAVILION1: Decimal("3000"),
+            PaymentType.INCOME_PAVILION2: Decimal("1500"),
+        },
+        orders_count=3,
+    )
+    assert block.total_revenue == Decimal("7350")
+    assert block.net_income == Decimal("4500")
+    assert block.average_check == Decimal("2450.00")
+
+
+def test_empty_period_is_zero():
+    block = block_from_totals({}, orders_count=0)
+    assert block.total_revenue == 0 and block.average_check == 0 and block.orders_count == 0
+
+
+def test_every_payment_type_has_pavilion():
+    assert set(PAVILION_BY_TYPE) == set(PaymentType)
+
+
+def test_period_starts_are_aligned():
+    assert period_starts("week", date(2026, 10, 1), date(2026, 10, 14)) == [
+        date(2026, 9, 28), date(2026, 10, 5), date(2026, 10, 12),
+    ]
+    assert period_starts("month", date(2026, 11, 20), date(2027, 1, 5)) == [
+        date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1),
+    ]
+
+
+def _daily_rows(stmt, params):
+    """По строке на каждый день от params["start"] до params["last"]."""
+    day, last = params["start"].date(), params["last"].date()
+    rows = []
+    while day <= last:
+        rows.append((day, Decimal("100"), Decimal("30"), Decimal("70"), Decimal("0"), 1))
+        day = date.fromordinal(day.toordinal() + 1)
+    return rows
+
+
+def test_closed_days_are_cached_and_open_day_recomputed(fake_db):
+    analytics_service._dynamics_cache.clear()
+    db = fake_db(respond=_daily_rows)
+    today = date(2026, 10, 19)
+    points = asyncio.run(dynamics(db, "day", date(2026, 10, 17), today, today))
+    assert [p.period_start for p in points] == ["2026-10-17", "2026-10-18", "2026-10-19"]
+    assert points[0].net_income == Decimal("70")
+    asyncio.run(dynamics(db, "day", date(2026, 10, 17), today, today))
+    # Второй запрос считает только текущий (открытый) день
+    assert [p["start"].date() for p in db.params] == [date(2026, 10, 17), today]
+    analytics_service._dynamics_cache.clear()
+
+
+def test_check_bins_split_zero_to_top():
+    bins = analytics_service.check_bins(Decimal("1000"), [2, 0, 1, 1])
+    assert [(b.from_amount, b.to_amount, b.orders_count) for b in bins] == [
+        (Decimal("0.00"), Decimal("250.00"), 2),
+        (Decimal("250.00"), Decimal("500.00"), 0),
+        (Decimal("500.00"), Decimal("750.00"), 1),
+        (Decimal("750.00"), Decimal("1000.00"), 1),
+    ]
+
+
+def test_employee_kinds_split_all_payment_types():
+    kinds = analytics_service.EMPLOYEE_KINDS
+    assert set(kinds["docs"]) | set(kinds["plates"]) == set(kinds["all"]) == set(PaymentType)
+    assert not set(kinds["docs"]) & set(kinds["plates"])
+
+
+def test_employee_stats_one_grouped_query_with_window_share(fake_db, monkeypatch):
+    """Без колоночного кеша — один GROUP BY по сотруднику, доля и итог — окном поверх групп; имена из справочника."""
+
+    async def no_columns(db):
+        return None
+
+    async def names(session, ids):
+        assert session is db  # имена — в сессии запроса
+        return {1: "Анна"}
+
+    monkeypatch.setattr(analytics_service.analytics_cache, "columns", no_columns)
+    monkeypatch.setattr(analytics_service, "employee_names", names)
+    db = fake_db([
+        (1, 3, Decimal("4500"), Decimal("1500.00"), Decimal("75.00"), Decimal("6000")),
+        (2, 1, Decimal("1500"), Decimal("1500.00"), Decimal("25.00"), Decimal("6000")),
+    ])
+    total, stats = asyncio.run(
+        analytics_service.employee_stats(db, "docs", datetime(2026, 10, 1), datetime(2026, 11, 1))
+    )
+    assert total == Decimal("6000")
+    assert [(s.employee_name, s.orders_count, s.share_percent) for s in stats] == [
+        ("Анна", 3, Decimal("75.00")), ("—", 1, Decimal("25.00")),
+    ]
+    (stmt,) = db.statements
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "sum(sum(payments.amount)) OVER ()" in sql
+    assert "count(DISTINCT payments.order_id)" in sql
+    assert "payments.employee_id IS NOT NULL" in sql and "GROUP BY payments.employee_id" in sql
+    assert "JOIN" not in sql
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert set(params["type_1"]) == {PaymentType.STATE_DUTY, PaymentType.INCOME_PAVILION1}
+
+
+def test_employee_stats_empty_period(fake_db, monkeypatch):
+    async def no_columns(db):
+        return None
+
+    async def names(session, ids):
+        return {}
+
+    monkeypatch.setattr(analytics_service.analytics_cache, "columns", no_columns)
+    monkeypatch.setattr(analytics_service, "employee_names", names)
+    total, stats = asyncio.run(
+        analytics_service.employee_stats(fake_db(), "all", datetime(2026, 10, 1), datetime(2026, 11, 1))
+    )
+    assert total == 0 and stats == []
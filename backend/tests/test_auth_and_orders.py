@@ -1,26 +1,7 @@
 """Тесты авторизации и создания заказа + оплаты."""
-import os
-
 import pytest
 
-# Логин/пароль из .env для теста (если нет — тесты с БД пропускаются)
-SUPERUSER_LOGIN = os.environ.get("SUPERUSER_LOGIN", "sergey151")
-SUPERUSER_PASSWORD = os.environ.get("SUPERUSER_PASSWORD", "1wq21wq2")
-
-
-@pytest.fixture
-def auth_headers(client):
-    """Получить заголовок Authorization после логина суперпользователя."""
-    r = client.post(
-        "/auth/login",
-        data={"username": SUPERUSER_LOGIN, "password": SUPERUSER_PASSWORD},
-    )
-    if r.status_code != 200:
-        pytest.skip("Логин не удался (нет БД или неверные SUPERUSER_* в env)")
-    data = r.json()
-    token = data.get("access_token")
-    assert token
-    return {"Authorization": f"Bearer {token}"}
+from tests.conftest import SUPERUSER_LOGIN, SUPERUSER_PASSWORD
 
 
 def test_login_returns_token(client):
@@ -0,0 +1,27 @@
+"""Хеширование паролей в пуле потоков и пересчёт хеша при смене стоимости (без БД)."""
+import asyncio
+
+from app.config import settings
+from app.services.auth_service import hash_password, needs_rehash, verify_password
+
+
+def test_hash_and_verify_off_loop(monkeypatch):
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+
+    async def run():
+        hashed = await hash_password("секрет")
+        ok, bad = await asyncio.gather(verify_password("секрет", hashed), verify_password("другой", hashed))
+        return hashed, ok, bad
+
+    hashed, ok, bad = asyncio.run(run())
+    assert ok and not bad
+    assert hashed.split("$")[2] == "04"
+
+
+def test_needs_rehash_on_cost_change(monkeypatch):
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    hashed = asyncio.run(hash_password("секрет"))
+    assert not needs_rehash(hashed)
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    assert needs_rehash(hashed)
+    assert needs_rehash("не-bcrypt")
@@ -0,0 +1,87 @@
+"""API кассы на живой БД: пакетное обновление строк, выдача денег за номера. Без БД или без входа суперпользователя тесты пропускаются."""
+import uuid
+
+import pytest
+
+
+def _create_row(client, auth_headers, **fields) -> dict:
+    r = client.post("/cash/rows", json={"client_name": "Пакетов", **fields}, headers=auth_headers)
+    if r.status_code in (401, 403):
+        pytest.skip("Нет доступа к кассе")
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_batch_update_applies_cells_in_request_order(client, auth_headers):
+    """PATCH /cash/rows:batch меняет только переданные ячейки и отдаёт строки в порядке запроса."""
+    first = _create_row(client, auth_headers, application=100, total=100)
+    second = _create_row(client, auth_headers, dkp=200, total=200)
+    changes = [
+        {"id": second["id"], "fields": {"dkp": 250, "total": 250}},
+        {"id": first["id"], "fields": {"client_name": "Пакетов И."}},
+    ]
+    r = client.patch("/cash/rows:batch", json=changes, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    rows = r.json()
+    assert [row["id"] for row in rows] == [second["id"], first["id"]]
+    assert float(rows[0]["dkp"]) == 250 and float(rows[0]["total"]) == 250
+    assert rows[0]["client_name"] == "Пакетов"
+    assert rows[1]["client_name"] == "Пакетов И." and float(rows[1]["application"]) == 100
+
+
+def test_batch_update_with_missing_row_changes_nothing(client, auth_headers):
+    """Если одной строки нет — 404, и остальные изменения пакета откатываются."""
+    row = _create_row(client, auth_headers, insurance=300, total=300)
+    changes = [
+        {"id": row["id"], "fields": {"insurance": 999}},
+        {"id": 2147483647, "fields": {"insurance": 1}},
+    ]
+    r = client.patch("/cash/rows:batch", json=changes, headers=auth_headers)
+    assert r.status_code == 404
+    # Пакет без изменённых ячеек только читает строки
+    r = client.patch("/cash/rows:batch", json=[{"id": row["id"], "fields": {}}], headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert float(r.json()[0]["insurance"]) == 300
+
+
+def _completed_plate_order(client, auth_headers, create_order, client_fio: str) -> dict:
+    """Заказ с номером: оплата, заготовка на складе, завершение — появляется запись к выдаче."""
+    order = create_order(client_fio=client_fio, need_plate=True, plate_amount=1500)
+    r = client.post(f"/orders/{order['id']}/pay", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    r = client.post("/warehouse/plate-stock/add", json={"amount": 1}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    r = client.patch(f"/orders/{order['id']}/status", json={"status": "COMPLETED"}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    return order
+
+
+def test_plate_payout_settled_once_into_plate_cash(client, auth_headers, create_order):
+    """POST /cash/plate-payouts/pay по id: запись выдана, в кассе номеров строка с остатком, повтор — 400."""
+    marker = "Выплатов " + uuid.uuid4().hex[:8]
+    _completed_plate_order(client, auth_headers, create_order, marker)
+    r = client.get("/cash/plate-payouts", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    (payout,) = [row for row in r.json()["rows"] if row["client_name"] == marker]
+    assert payout["amount"] > 0 and payout["paid_at"] is None
+    balance_before = client.get("/cash/plate-rows/balance", headers=auth_headers).json()["balance"]
+
+    r = client.post("/cash/plate-payouts/pay", json={"ids": [payout["id"]]}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {"count": 1, "total": payout["amount"]}
+
+    rows = client.get("/cash/plate-payouts", headers=auth_headers).json()["rows"]
+    assert payout["id"] not in [row["id"] for row in rows]
+    balance_after = client.get("/cash/plate-rows/balance", headers=auth_headers).json()["balance"]
+    assert balance_after == pytest.approx(balance_before + payout["amount"])
+    plate_rows = client.get("/cash/plate-rows", headers=auth_headers).json()["rows"]
+    (cash_row,) = [row for row in plate_rows if row["client_name"] == marker]
+    assert cash_row["amount"] == payout["amount"] and cash_row["balance"] == pytest.approx(balance_after)
+
+    r = client.post("/cash/plate-payouts/pay", json={"ids": [payout["id"]]}, headers=auth_headers)
+    assert r.status_code == 400
+
+
+def test_plate_payout_empty_ids_rejected(client, auth_headers):
+    r = client.post("/cash/plate-payouts/pay", json={"ids": []}, headers=auth_headers)
+    assert r.status_code in (400, 403)
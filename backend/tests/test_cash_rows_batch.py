@@ -0,0 +1,62 @@
+"""Пакетное обновление ячеек кассы: один UPDATE ... CASE id, порядок ответа, 404 и лимит (без БД)."""
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api import cash
+from app.api.auth import UserInfo
+from app.models import CashRow
+from app.schemas.cash import CashRowBatchItem
+
+_USER = UserInfo(id=1, name="Анна", role="ROLE_OPERATOR", login="anna")
+
+
+def _row(row_id, **cells):
+    values = {c: Decimal("0") for c in ("application", "state_duty", "dkp", "insurance", "plates", "total")}
+    values.update(cells)
+    return CashRow(id=row_id, created_at=datetime(2026, 10, 19, 10, 0), client_name="Иванов", **values)
+
+
+def _item(row_id, **fields):
+    return CashRowBatchItem(id=row_id, fields=fields)
+
+
+def test_one_update_with_case_and_request_order(fake_db):
+    db = fake_db(results=[[_row(7, total=Decimal("900")), _row(3, dkp=Decimal("600"))]])
+    changes = [_item(3, dkp=600), _item(7, total=500), _item(7, total=900, client_name="Петров")]
+    out = asyncio.run(cash.update_cash_rows_batch(changes, db, _USER))
+    assert [r["id"] for r in out] == [3, 7] and out[1]["total"] == 900.0
+    (stmt,) = db.statements
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE cash_rows SET")
+    assert "CASE cash_rows.id WHEN" in sql and "RETURNING" in sql
+    # Повторы одной строки сливаются: последнее значение ячейки побеждает
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert Decimal("900") in params.values() and Decimal("500") not in params.values()
+
+
+def test_missing_row_is_404(fake_db):
+    db = fake_db(results=[[_row(3)]])
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(cash.update_cash_rows_batch([_item(3, dkp=1), _item(4, dkp=2)], db, _USER))
+    assert exc.value.status_code == 404 and exc.value.detail == "Строки не найдены: [4]"
+
+
+def test_empty_and_oversized_batches(fake_db):
+    db = fake_db()
+    assert asyncio.run(cash.update_cash_rows_batch([], db, _USER)) == []
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(cash.update_cash_rows_batch([_item(i) for i in range(cash._BATCH_MAX + 1)], db, _USER))
+    assert exc.value.status_code == 400
+    assert db.loads == 0
+
+
+def test_batch_without_changed_cells_reads_rows(fake_db):
+    db = fake_db(results=[[_row(5)]])
+    out = asyncio.run(cash.update_cash_rows_batch([_item(5)], db, _USER))
+    assert [r["id"] for r in out] == [5]
+    assert str(db.statements[0]).startswith("SELECT")
@@ -0,0 +1,60 @@
+"""Подсказки клиентов: префиксный индекс по ФИО и паспорту (без БД)."""
+from app.services.client_index import ClientIndex, people_from_form
+
+
+def _index(ready=True):
+    index = ClientIndex()
+    index.add_order(1, {
+        "client_fio": "Иванов Иван Иванович", "client_passport": "1804 123456",
+        "client_address": "Волгоград, ул. Мира, 1", "client_phone": "+79991234567",
+        "seller_fio": "Петров Пётр", "seller_passport": "1805 654321",
+    })
+    index.add_order(2, {"client_fio": "Иванова Мария", "client_passport": None})
+    index.add_order(3, {"client_is_legal": True, "client_fio": "Юрлицо", "seller_fio": "Сидоров Семён"})
+    if ready:
+        index.mark_ready()
+    return index
+
+
+def test_people_from_form_skips_legal_client_and_empty_fio():
+    people = people_from_form({"client_is_legal": True, "client_fio": "X", "seller_fio": " ", "seller_passport": "1"}, 5)
+    assert people == []
+    (seller,) = people_from_form({"seller_fio": "Петров", "seller_address": "Адрес"}, 6)
+    assert (seller.fio, seller.address, seller.phone, seller.order_id) == ("Петров", "Адрес", None, 6)
+
+
+def test_prefix_by_fio_newest_first():
+    index = _index()
+    assert [r.fio for r in index.suggest("иван", 10)] == ["Иванова Мария", "Иванов Иван Иванович"]
+    assert [r.fio for r in index.suggest("  ИВАНОВ  ИВ", 10)] == ["Иванов Иван Иванович"]
+    # ё и е не различаются
+    assert [r.fio for r in index.suggest("петров пет", 10)] == ["Петров Пётр"]
+    assert [r.fio for r in index.suggest("сидоров семен", 10)] == ["Сидоров Семён"]
+    assert index.suggest("и", 10) == []
+    assert len(index.suggest("иван", 1)) == 1
+
+
+def test_prefix_by_passport_digits():
+    index = _index()
+    (r,) = index.suggest("1804 12", 10)
+    assert r.fio == "Иванов Иван Иванович" and r.phone == "+79991234567"
+
+
+def test_same_passport_keeps_newest_details_and_fills_gaps():
+    index = _index()
+    index.add_order(10, {"client_fio": "Иванов Иван Иванович", "client_passport": "1804123456", "client_address": "Новый адрес"})
+    (r,) = index.suggest("1804", 10)
+    assert (r.address, r.phone, r.order_id) == ("Новый адрес", "+79991234567", 10)
+    # Более старый заказ (догрузка не по порядку) не перетирает свежие данные
+    index.add_order(0, {"client_fio": "Иванов И.", "client_passport": "1804 123456", "client_address": "Старый"})
+    (r,) = index.suggest("1804", 10)
+    assert (r.fio, r.address, r.order_id) == ("Иванов Иван Иванович", "Новый адрес", 10)
+
+
+def test_keys_added_while_loading_are_sorted_on_ready():
+    index = _index(ready=False)
+    index.add_order(4, {"client_fio": "Абрамов Антон"})
+    index.mark_ready()
+    assert [r.fio for r in index.suggest("аб", 10)] == ["Абрамов Антон"]
+    index.add_order(5, {"client_fio": "Яковлев Яков"})
+    assert [r.fio for r in index.suggest("яков", 10)] == ["Яковлев Яков"]
@@ -0,0 +1,58 @@
+"""Кеш активности и ролей сотрудников (без БД)."""
+import asyncio
+
+from app.config import settings
+from app.models.employee import EmployeeRole
+from app.services import employee_cache
+
+
+def test_cached_until_invalidated(monkeypatch, fake_db):
+    monkeypatch.setattr(settings, "employee_cache_ttl_seconds", 3600)
+    employee_cache.invalidate()
+    maker = fake_db([(1, "Анна", EmployeeRole.ROLE_OPERATOR, True)])
+
+    async def run():
+        first = await employee_cache.get_employee(maker, 1)
+        await employee_cache.get_employee(maker, 1)
+        assert maker.loads == 1 and first.is_active and first.role == "ROLE_OPERATOR"
+        maker.rows = [(1, "Анна", EmployeeRole.ROLE_OPERATOR, False)]
+        assert (await employee_cache.get_employee(maker, 1)).is_active
+        employee_cache.invalidate()
+        assert not (await employee_cache.get_employee(maker, 1)).is_active
+        assert maker.loads == 2
+
+    asyncio.run(run())
+    employee_cache.invalidate()
+
+
+def test_unknown_id_reloads_at_most_once_per_second(monkeypatch, fake_db):
+    monkeypatch.setattr(settings, "employee_cache_ttl_seconds", 3600)
+    employee_cache.invalidate()
+    maker = fake_db([(1, "Анна", EmployeeRole.ROLE_ADMIN, True)])
+
+    async def run():
+        assert await employee_cache.get_employee(maker, 1) is not None
+        assert await employee_cache.get_employee(maker, 2) is None
+        assert await employee_cache.get_employee(maker, 2) is None
+        assert maker.loads == 1
+
+    asyncio.run(run())
+    employee_cache.invalidate()
+
+
+def test_employee_names_in_one_load(monkeypatch, fake_db):
+    monkeypatch.setattr(settings, "employee_cache_ttl_seconds", 3600)
+    employee_cache.invalidate()
+    db = fake_db([
+        (1, "Анна", EmployeeRole.ROLE_OPERATOR, True),
+        (2, "Борис", EmployeeRole.ROLE_PLATE_OPERATOR, False),
+    ])
+
+    async def run():
+        names = await employee_cache.employee_names(db, [1, 2, None, 1])
+        assert names == {1: "Анна", 2: "Борис"}
+        assert await employee_cache.employee_names(db, [None]) == {}
+        assert db.loads == 1
+
+    asyncio.run(run())
+    employee_cache.invalidate()
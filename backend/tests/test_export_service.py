@@ -0,0 +1,71 @@
+"""Потоковая выгрузка CSV / XLSX (без БД)."""
+import asyncio
+import io
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from xml.dom import minidom
+
+from app.services.export_service import csv_lines, export_chunks, until_disconnected
+
+
+async def _batches():
+    yield [(datetime(2026, 10, 1, 9, 30), "Иванов & <Ко>", Decimal("1500.50"))]
+    yield [(datetime(2026, 10, 2, 10, 0), "Петров", Decimal("-200"))]
+
+
+async def _collect(fmt: str) -> bytes:
+    return b"".join([c async for c in export_chunks(fmt, ["Дата", "ФИО", "Сумма"], _batches(), sheet_name="Касса")])
+
+
+def test_csv_uses_semicolon_and_decimal_comma():
+    assert csv_lines([(datetime(2026, 10, 1, 9, 30), "Иванов", Decimal("1500.50"), None)]) == (
+        "01.10.2026 09:30:00;Иванов;1500,50;\r\n".encode("utf-8")
+    )
+
+
+def test_csv_export_has_bom_and_all_batches():
+    data = asyncio.run(_collect("csv"))
+    assert data.startswith(b"\xef\xbb\xbf")
+    lines = data.decode("utf-8-sig").splitlines()
+    assert lines == ["Дата;ФИО;Сумма", "01.10.2026 09:30:00;Иванов & <Ко>;1500,50", "02.10.2026 10:00:00;Петров;-200"]
+
+
+def test_xlsx_export_is_valid_workbook():
+    data = asyncio.run(_collect("xlsx"))
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    assert zf.testzip() is None
+    sheet = minidom.parseString(zf.read("xl/worksheets/sheet1.xml"))
+    rows = sheet.getElementsByTagName("row")
+    assert len(rows) == 3
+    assert rows[1].getElementsByTagName("t")[1].firstChild.data == "Иванов & <Ко>"
+    assert rows[2].getElementsByTagName("v")[0].firstChild.data == "-200"
+
+
+class _Request:
+    """Клиент отключается после первого куска."""
+
+    def __init__(self):
+        self.checks = 0
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.checks > 1
+
+
+def test_export_stops_and_closes_source_on_disconnect():
+    closed = []
+
+    async def batches():
+        try:
+            for i in range(100):
+                yield [(i, "x", Decimal("1"))]
+        finally:
+            closed.append(True)
+
+    async def run():
+        return [c async for c in until_disconnected(_Request(), export_chunks("csv", ["a", "b", "c"], batches()))]
+
+    chunks = asyncio.run(run())
+    assert len(chunks) == 1
+    assert closed == [True]
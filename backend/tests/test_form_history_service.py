@@ -0,0 +1,66 @@
+"""История заполнения формы: хеш содержимого, поля для поиска, перенос старых записей (без БД)."""
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.form_history_service import (
+    DEDUPLICATE_SQL,
+    backfill_values,
+    content_hash,
+    normalize_phone,
+    search_conditions,
+    summary_fields,
+)
+
+
+def test_content_hash_ignores_key_order():
+    a = {"client_fio": "Иванов", "vin": "X1", "documents": [{"template": "dkp.docx"}]}
+    b = {"vin": "X1", "documents": [{"template": "dkp.docx"}], "client_fio": "Иванов"}
+    assert content_hash(a) == content_hash(b)
+    assert content_hash(a) != content_hash({**a, "vin": "X2"})
+
+
+def test_summary_fields_normalized():
+    fields = summary_fields({
+        "client_fio": "  ",
+        "client_legal_name": "ООО Ромашка",
+        "vin": " xta 21099-0123 ",
+        "plate_number": "а 123 вс 34",
+        "client_phone": "8 (999) 123-45-67",
+    })
+    assert fields == {
+        "client_name": "ООО Ромашка",
+        "vin": "XTA210990123",
+        "plate_number": "А123ВС34",
+        "phone": "79991234567",
+    }
+    assert summary_fields({}) == {"client_name": None, "vin": None, "plate_number": None, "phone": None}
+
+
+def test_phone_prefix_8_and_plus7_match():
+    assert normalize_phone("+7 999") == normalize_phone("8999") == "7999"
+
+
+def test_search_conditions():
+    def sql(conds):
+        return [str(c.compile(dialect=postgresql.dialect())) for c in conds]
+
+    # Текст: ФИО и коды, телефон — нет
+    assert len(search_conditions("Иван")) == 3
+    # Номер телефона: ещё и по цифрам
+    conds = search_conditions("+7 999")
+    assert len(conds) == 4 and "form_history.phone LIKE" in sql(conds)[-1]
+    # Спецсимволы LIKE экранируются
+    cond = search_conditions("50%")[0]
+    assert cond.right.value == "50\\%%"
+
+
+def test_backfill_values_and_dedupe_keeps_newest():
+    t1, t3 = datetime(2026, 10, 1), datetime(2026, 10, 3)
+    values = backfill_values([(3, {"vin": "A", "client_fio": "Петров"}, t3), (1, {"client_fio": "Петров", "vin": "A"}, t1)])
+    by_id = {v["b_id"]: v for v in values}
+    # Порядок ключей не влияет на хеш: повтор удалит DEDUPLICATE_SQL (остаётся больший id)
+    assert by_id[1]["content_hash"] == by_id[3]["content_hash"] == content_hash({"vin": "A", "client_fio": "Петров"})
+    assert by_id[3]["used_at"] == t3 and by_id[3]["client_name"] == "Петров" and by_id[3]["vin"] == "A"
+    assert backfill_values([(2, None, t1)])[0]["content_hash"] == content_hash({})
+    assert "a.id < b.id" in DEDUPLICATE_SQL
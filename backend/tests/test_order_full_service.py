@@ -0,0 +1,57 @@
+"""Карточка заказа /orders/{id}/full: сборка ответа из строки запроса (без БД)."""
+from datetime import datetime
+from decimal import Decimal
+
+from app.services.order_full_service import build_order_full, employee_ids
+
+
+def _row(**over):
+    row = {
+        "id": 5, "public_id": "abc", "status": "PAID",
+        "total_amount": Decimal("4350.10"), "state_duty_amount": Decimal("2850.00"),
+        "income_pavilion1": Decimal("1500.10"), "income_pavilion2": Decimal("0"),
+        "need_plate": True, "service_type": "number.docx", "created_at": datetime(2026, 10, 1, 9, 30),
+        "form_data": {"client_fio": " Иванов "}, "employee_id": 1,
+        "paid_total": Decimal("4000.10"), "paid_state_duty": Decimal("2850.00"),
+        "paid_pavilion1": Decimal("1000.10"), "paid_pavilion2": Decimal("150.00"),
+        "items": [
+            {"amount": "2850.00", "type": "STATE_DUTY", "employee_id": 1, "created_at": "2026-10-01T09:31:00"},
+            {"amount": "1000.10", "type": "INCOME_PAVILION1", "employee_id": 1, "created_at": "2026-10-01T09:31:00"},
+            {"amount": "150.00", "type": "INCOME_PAVILION2", "employee_id": 2, "created_at": "2026-10-02T12:00:00"},
+        ],
+        "reserved": 2,
+        "payout_amount": None, "payout_paid_at": None, "payout_paid_by_id": None,
+    }
+    row.update(over)
+    return row
+
+
+def test_exact_debt_and_totals_by_type():
+    full = build_order_full(_row(), {1: "Анна", 2: "Борис"})
+    assert full.debt == Decimal("350.00")
+    assert full.paid_total == Decimal("4000.10")
+    assert full.paid_by_type == {
+        "STATE_DUTY": Decimal("2850.00"), "INCOME_PAVILION1": Decimal("1000.10"), "INCOME_PAVILION2": Decimal("150.00"),
+    }
+    assert full.client == "Иванов" and full.created_by_name == "Анна"
+    assert [(p.amount, p.employee_name) for p in full.payments] == [
+        (Decimal("2850.00"), "Анна"), (Decimal("1000.10"), "Анна"), (Decimal("150.00"), "Борис"),
+    ]
+    assert full.plates_reserved == 2 and full.plate_payout is None
+
+
+def test_payout_state_and_items_as_json_string():
+    row = _row(
+        items='[{"amount": "10.00", "type": "STATE_DUTY", "employee_id": null, "created_at": "2026-10-01T09:31:00"}]',
+        payout_amount=Decimal("1500.00"), payout_paid_at=datetime(2026, 10, 3, 18, 0), payout_paid_by_id=3,
+        reserved=None,
+    )
+    full = build_order_full(row, {3: "Вера"})
+    assert full.payments[0].employee_name is None
+    assert full.plate_payout.amount == Decimal("1500.00")
+    assert full.plate_payout.paid_at == "2026-10-03T18:00:00" and full.plate_payout.paid_by_name == "Вера"
+    assert full.plates_reserved == 0
+
+
+def test_employee_ids_cover_creator_payments_and_payout():
+    assert set(employee_ids(_row(payout_paid_by_id=3))) == {1, 2, 3}
@@ -0,0 +1,74 @@
+"""Поиск заказов: разбор запроса, курсор (rank, id), страница результатов (без БД)."""
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import order_search_service
+from app.services.order_search_service import decode_cursor, encode_cursor, search_orders, search_terms
+
+
+@pytest.fixture
+def with_trigram(monkeypatch):
+    monkeypatch.setattr(order_search_service, "_trigram", True)
+
+
+def test_search_terms():
+    assert search_terms("  Иванов   Иван ") == ("иванов иван", "ивановиван")
+    assert search_terms("XTA 2109-00") == ("xta 2109-00", "xta210900")
+    # Телефон: цифры без кода страны
+    assert search_terms("+7 (999) 123-45-67") == ("+7 (999) 123-45-67", "9991234567")
+    assert search_terms("8 999 123") == ("8 999 123", "8999123")
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(Decimal("0.6075"), 42)) == (Decimal("0.6075"), 42)
+    with pytest.raises(ValueError):
+        decode_cursor("abc|1")
+    with pytest.raises(ValueError):
+        decode_cursor("1.0")
+
+
+def test_search_orders_page_and_next_cursor(fake_db, with_trigram):
+    hits = [(9, Decimal("0.9000")), (4, Decimal("0.5000")), (7, Decimal("0.5000"))]
+    orders = [SimpleNamespace(id=4), SimpleNamespace(id=9)]
+    # Первый запрос — (id, rank) по рангу, второй — заказы по id
+    db = fake_db(results=[hits, orders])
+    rows, next_cursor = asyncio.run(search_orders(db, "Иванов 50%", None, limit=2))
+    assert [(o.id, rank) for o, rank in rows] == [(9, Decimal("0.9000")), (4, Decimal("0.5000"))]
+    assert next_cursor == "0.5000|4"
+    params = db.params[0]
+    assert params["limit"] == 3 and params["after_rank"] is None
+    assert params["q"] == "иванов 50%" and params["pattern"] == "%иванов 50\\%%"
+
+
+def test_search_orders_with_cursor_and_no_hits(fake_db, with_trigram):
+    db = fake_db(results=[[], []])
+    assert asyncio.run(search_orders(db, "xta", "0.5000|4", limit=20)) == ([], None)
+    assert db.params[0]["after_rank"] == Decimal("0.5000") and db.params[0]["after_id"] == 4
+
+
+def test_search_without_pg_trgm_falls_back_to_ts_rank(fake_db, monkeypatch):
+    """Наличие pg_trgm проверяется один раз; без него запрос без word_similarity."""
+    monkeypatch.setattr(order_search_service, "_trigram", None)
+    db = fake_db(results=[[False], [], [], []])
+
+    async def run():
+        await search_orders(db, "иванов", None, limit=20)
+        await search_orders(db, "петров", None, limit=20)
+
+    asyncio.run(run())
+    check, first, second = db.statements
+    assert "pg_extension" in str(check)
+    assert first is second is order_search_service._SEARCH_SQL_NO_TRGM
+    assert "word_similarity" not in str(first) and "ts_rank" in str(first)
+    assert "word_similarity" in str(order_search_service._SEARCH_SQL)
+
+
+def test_short_normalized_query_rejected(fake_db, with_trigram):
+    db = fake_db()
+    for q in ("+7 ", "a-b", "8 9"):
+        with pytest.raises(ValueError):
+            asyncio.run(search_orders(db, q, None, limit=20))
+    assert db.loads == 0
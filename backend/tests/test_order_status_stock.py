@@ -0,0 +1,85 @@
+"""Смена статуса заказа через PATCH и счётчики резерва склада."""
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.auth import UserInfo
+from app.api.orders import OrderStatusUpdate, update_order_status
+from app.models import Order, OrderStatus, PlateStock
+
+_USER = UserInfo(id=1, name="Анна", role="ROLE_ADMIN", login="anna")
+
+
+class _Warehouse:
+    """Ответы на запросы смены статуса: заказ, строка склада и разбивка резерва по сумме (upsert складывает)."""
+
+    def __init__(self, order: Order, stock: PlateStock):
+        self.order = order
+        self.stock = stock
+        self.amounts: dict[Decimal, int] = {}
+
+    def __call__(self, stmt, params):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        if sql.startswith("INSERT INTO plate_reserved_amounts"):
+            values = stmt.compile(dialect=postgresql.dialect()).params
+            total = values["total_amount"]
+            self.amounts[total] = self.amounts.get(total, 0) + values["quantity"]
+            return []
+        if "FROM orders" in sql:
+            return [self.order]
+        if "FROM plate_stock" in sql:
+            return [self.stock]
+        if "sum(payments.amount)" in sql:
+            return [Decimal("0")]
+        return []
+
+
+def test_patch_paid_then_completed_returns_counters_to_zero(fake_db):
+    order = Order(
+        id=1, public_id="A-1", status=OrderStatus.AWAITING_PAYMENT, need_plate=True,
+        total_amount=Decimal("3000"), form_data={"plate_quantity": 2},
+    )
+    stock = PlateStock(quantity=10, reserved=0, reserved_in_work=0, defects_month=0)
+    warehouse = _Warehouse(order, stock)
+    db = fake_db(respond=warehouse)
+
+    asyncio.run(update_order_status(1, OrderStatusUpdate(status=OrderStatus.PAID), db, _USER))
+    assert stock.reserved == 2 and warehouse.amounts == {Decimal("3000"): 2}
+
+    asyncio.run(update_order_status(1, OrderStatusUpdate(status=OrderStatus.COMPLETED), db, _USER))
+    assert order.status == OrderStatus.COMPLETED
+    assert stock.reserved == 0 and warehouse.amounts == {Decimal("3000"): 0}
+    assert stock.quantity == 8
+
+
+def test_patch_paid_then_completed_via_api(client, auth_headers):
+    """PATCH AWAITING_PAYMENT → PAID → COMPLETED: резерв и разбивка по суммам возвращаются к исходным (нужна БД)."""
+    r = client.post("/warehouse/plate-stock/add", json={"amount": 2}, headers=auth_headers)
+    if r.status_code in (401, 403):
+        pytest.skip("Нет доступа к складу заготовок")
+    assert r.status_code == 200, r.text
+    before = client.get("/warehouse/plate-stock", headers=auth_headers).json()
+
+    order_body = {
+        "state_duty": 0,
+        "extra_amount": 0,
+        "plate_amount": 1500,
+        "summa_dkp": 0,
+        "need_plate": True,
+        "plate_quantity": 2,
+        "documents": [],
+    }
+    r = client.post("/orders", json=order_body, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    order_id = r.json()["id"]
+
+    for status in ("PAID", "COMPLETED"):
+        r = client.patch(f"/orders/{order_id}/status", json={"status": status}, headers=auth_headers)
+        assert r.status_code == 200, r.text
+
+    after = client.get("/warehouse/plate-stock", headers=auth_headers).json()
+    assert after["reserved"] == before["reserved"]
+    assert after["reserved_breakdown"] == before["reserved_breakdown"]
+    assert after["quantity"] == before["quantity"] - 2
@@ -0,0 +1,72 @@
+"""API заказов на живой БД: поиск и карточка заказа. Без БД или без входа суперпользователя тесты пропускаются."""
+import uuid
+from decimal import Decimal
+
+import pytest
+
+
+def test_search_finds_order_by_vin_fragment(client, auth_headers, create_order):
+    """GET /orders/search находит заказ по части VIN, набранной с пробелами и дефисом."""
+    vin = "XTA" + uuid.uuid4().hex[:14].upper()
+    order = create_order(vin=vin, client_fio="Поисков Тест")
+    q = f"{vin[3:8]} - {vin[8:13]}"
+    r = client.get("/orders/search", params={"q": q}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    page = r.json()
+    assert order["id"] in [row["id"] for row in page["rows"]]
+    hit = next(row for row in page["rows"] if row["id"] == order["id"])
+    assert hit["vin"] == vin and hit["client"] == "Поисков Тест"
+
+
+def test_search_pages_by_cursor(client, auth_headers, create_order):
+    """Страницы по курсору не повторяют заказы."""
+    marker = "Курсоров" + uuid.uuid4().hex[:8]
+    ids = {create_order(client_fio=f"{marker} {i}")["id"] for i in range(3)}
+    seen, cursor = [], None
+    for _ in range(3):
+        params = {"q": marker, "limit": 1, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/orders/search", params=params, headers=auth_headers)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        seen += [row["id"] for row in page["rows"]]
+        cursor = page["next_cursor"]
+    assert set(seen) == ids and len(seen) == 3
+
+
+def test_search_rejects_short_normalized_query(client, auth_headers):
+    """«+7 » проходит min_length, но без кода страны остаётся одна цифра — 400."""
+    r = client.get("/orders/search", params={"q": "+7 "}, headers=auth_headers)
+    assert r.status_code == 400
+
+
+def test_order_full_card_totals_and_debt(client, auth_headers, create_order):
+    """GET /orders/{id}/full: платежи с итогами по типам, долг по ним, резерв заготовок в изготовлении."""
+    order = create_order(state_duty=1000, extra_amount=500, need_plate=True, plate_amount=1500, plate_quantity=2)
+    r = client.post(f"/orders/{order['id']}/pay", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    r = client.post(f"/orders/{order['id']}/pay-extra", json={"amount": 300}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    # В изготовление: заготовки резервируются под заказ
+    r = client.post("/warehouse/plate-stock/add", json={"amount": 2}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    r = client.patch(f"/orders/{order['id']}/status", json={"status": "PLATE_IN_PROGRESS"}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+
+    r = client.get(f"/orders/{order['id']}/full", headers=auth_headers)
+    if r.status_code == 403:
+        pytest.skip("Нет доступа к аналитике")
+    assert r.status_code == 200, r.text
+    card = r.json()
+    assert card["status"] == "PLATE_IN_PROGRESS" and card["public_id"] == order["public_id"]
+    paid = sum(Decimal(str(p["amount"])) for p in card["payments"])
+    assert Decimal(str(card["paid_total"])) == paid
+    assert sum(Decimal(str(v)) for v in card["paid_by_type"].values()) == paid
+    assert Decimal(str(card["paid_by_type"]["INCOME_PAVILION2"])) >= 300
+    assert Decimal(str(card["debt"])) == Decimal(str(card["total_amount"])) - paid
+    assert card["plates_reserved"] == 2
+    assert card["plate_payout"] is None
+
+
+def test_order_full_card_not_found(client, auth_headers):
+    r = client.get("/orders/2147483647/full", headers=auth_headers)
+    assert r.status_code in (403, 404)
@@ -0,0 +1,51 @@
+"""Разбор периодов и курсоров страниц (без БД)."""
+from datetime import date, datetime
+
+import pytest
+
+from app.core.periods import (
+    decode_cursor,
+    encode_cursor,
+    period_bounds,
+    period_range,
+    previous_range,
+    resolve_range,
+)
+
+
+def test_period_bounds_includes_date_to():
+    """date_to включительно: конец периода — начало следующего дня."""
+    start, end = period_bounds("2026-10-01", "2026-10-31")
+    assert start == datetime(2026, 10, 1)
+    assert end == datetime(2026, 11, 1)
+    assert period_bounds(None, None) == (None, None)
+
+
+def test_period_bounds_rejects_bad_input():
+    with pytest.raises(ValueError):
+        period_bounds("01.10.2026", None)
+    with pytest.raises(ValueError):
+        period_bounds("2026-10-02", "2026-10-01")
+
+
+def test_cursor_roundtrip():
+    ts = datetime(2026, 10, 19, 12, 30, 5, 123456)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("garbage")
+
+
+def test_calendar_period_and_previous():
+    today = date(2026, 10, 15)  # четверг
+    assert period_range("week", today) == (date(2026, 10, 12), today)
+    assert previous_range("week", date(2026, 10, 12), today) == (date(2026, 10, 5), date(2026, 10, 11))
+    assert previous_range("month", date(2026, 3, 1), date(2026, 3, 10)) == (date(2026, 2, 1), date(2026, 2, 28))
+    assert previous_range("day", today, today) == (date(2026, 10, 14), date(2026, 10, 14))
+
+
+def test_explicit_range_compares_with_same_length_before():
+    start, end, explicit = resolve_range("day", "2026-10-10", "2026-10-16", date(2026, 10, 19))
+    assert (start, end, explicit) == (date(2026, 10, 10), date(2026, 10, 16), True)
+    assert previous_range("day", start, end, explicit) == (date(2026, 10, 3), date(2026, 10, 9))
+    with pytest.raises(ValueError):
+        resolve_range("year", None, None, date(2026, 10, 19))
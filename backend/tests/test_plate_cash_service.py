@@ -0,0 +1,76 @@
+"""Касса номеров: накопительный остаток по строкам (без БД; пересчёт проверяется на SQLite в памяти)."""
+import asyncio
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.plate_cash_service import (
+    LEDGER_LOCK_KEY,
+    _RECOMPUTE_SQL,
+    balance_at,
+    lock_ledger,
+    recompute_balances,
+)
+
+
+def _ledger(rows):
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE plate_cash_rows (id INTEGER PRIMARY KEY, created_at TEXT, amount NUMERIC, balance NUMERIC)")
+    db.executemany("INSERT INTO plate_cash_rows VALUES (?, ?, ?, ?)", rows)
+    return db
+
+
+def _recompute(db, base, created_at, row_id) -> int:
+    return db.execute(_RECOMPUTE_SQL.text, {"base": base, "created_at": created_at, "row_id": row_id}).rowcount
+
+
+def _balances(db):
+    return [b for (b,) in db.execute("SELECT balance FROM plate_cash_rows ORDER BY created_at, id")]
+
+
+def test_recompute_running_balance_in_created_at_id_order():
+    db = _ledger([
+        (1, "2026-10-01", 100, None),
+        (3, "2026-10-02", 50, None),
+        (2, "2026-10-02", -30, None),
+        (4, "2026-10-03", 20, None),
+    ])
+    assert _recompute(db, 0, "2026-10-01", 1) == 4
+    # Одинаковое время — порядок по id
+    assert _balances(db) == [100, 70, 120, 140]
+
+
+def test_recompute_touches_only_rows_from_changed_position():
+    db = _ledger([
+        (1, "2026-10-01", 100, 100),
+        (2, "2026-10-02", -30, 70),
+        (3, "2026-10-02", 50, 120),
+        (4, "2026-10-03", 20, 140),
+    ])
+    db.execute("UPDATE plate_cash_rows SET amount = -40 WHERE id = 3")
+    # База — остаток предыдущей строки (id=2); строки до позиции не пересчитываются
+    assert _recompute(db, 70, "2026-10-02", 3) == 2
+    assert _balances(db) == [100, 70, 30, 50]
+    # Повторный пересчёт ничего не меняет (IS DISTINCT FROM)
+    assert _recompute(db, 70, "2026-10-02", 3) == 0
+
+
+def test_recompute_balances_starts_from_previous_row(fake_db):
+    at = datetime(2026, 10, 2, 12, 0)
+    db = fake_db(results=[[Decimal("70.00")], []])
+    asyncio.run(recompute_balances(db, at, 3))
+    assert db.params[1] == {"base": Decimal("70.00"), "created_at": at, "row_id": 3}
+    # Первая строка кассы: база 0
+    db = fake_db(results=[[], []])
+    asyncio.run(recompute_balances(db, at, 1))
+    assert db.params[1]["base"] == Decimal("0")
+
+
+def test_ledger_lock_and_empty_balance(fake_db):
+    db = fake_db()
+    asyncio.run(lock_ledger(db))
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert f"pg_advisory_xact_lock({LEDGER_LOCK_KEY})" in sql
+    assert asyncio.run(balance_at(fake_db(), datetime(2026, 10, 1))) == Decimal("0")
@@ -0,0 +1,25 @@
+"""Прогноз расхода заготовок (без БД)."""
+from datetime import date
+
+from app.services.plate_forecast_service import build_forecast, moving_average
+
+
+def test_moving_average_window():
+    """Скользящее среднее по последним window точкам."""
+    assert moving_average([2, 4, 6, 8], 2) == [2.0, 3.0, 5.0, 7.0]
+    assert moving_average([], 7) == []
+
+
+def test_forecast_days_and_reorder():
+    """2 шт/день, доступно 10: хватит на 5 дней, на 7+14 дней нужно 42 → заказать 32."""
+    f = build_forecast(2.0, 10, lead_time_days=7, cover_days=14, today=date(2026, 10, 1))
+    assert f["days_until_stockout"] == 5.0
+    assert f["stockout_date"] == "2026-10-06"
+    assert f["suggested_reorder"] == 32
+
+
+def test_forecast_without_consumption():
+    """Нет расхода — дата исчерпания не определена, заказывать нечего."""
+    f = build_forecast(0.0, 10, lead_time_days=7, cover_days=14, today=date(2026, 10, 1))
+    assert f["days_until_stockout"] is None
+    assert f["suggested_reorder"] == 0
@@ -0,0 +1,67 @@
+"""Выдача денег за номера: отметка одним UPDATE, строки кассы номеров одним INSERT ... SELECT, частичная выдача (без БД)."""
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.auth import UserInfo
+from app.api.cash import pay_plate_payouts
+from app.models import CashRow
+from app.schemas.cash import PlatePayoutSettle
+
+_USER = UserInfo(id=2, name="Анна", role="ROLE_OPERATOR", login="anna")
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_partial_settlement_marks_and_copies_rows(fake_db):
+    db = fake_db(results=[
+        [(11, Decimal("1500")), (12, Decimal("3000"))],  # UPDATE ... RETURNING
+        [7],  # смена павильона 2
+        [],  # advisory-блокировка кассы номеров
+        [40, 41],  # INSERT ... RETURNING id
+        [Decimal("500")],  # остаток перед первой новой строкой
+        [],  # пересчёт остатков
+        [3],  # смена павильона 1
+    ])
+    body = PlatePayoutSettle(ids=[11, 12, 13], date_from="2026-10-01", date_to="2026-10-19")
+    out = asyncio.run(pay_plate_payouts(body, db, _USER))
+    assert out == {"count": 2, "total": 4500.0}
+
+    settle = _sql(db.statements[0])
+    assert settle.startswith("UPDATE plate_payouts SET paid_at=")
+    assert "plate_payouts.paid_at IS NULL" in settle and "plate_payouts.id IN" in settle
+    assert "plate_payouts.created_at >= " in settle and "plate_payouts.created_at < " in settle
+    params = db.statements[0].compile(dialect=postgresql.dialect()).params
+    assert params["paid_by_id"] == 2 and params["created_at_2"] == datetime(2026, 10, 20)
+
+    copy = _sql(db.statements[3])
+    assert copy.startswith("INSERT INTO plate_cash_rows (created_at, client_name, amount, shift_id) SELECT")
+    assert "ORDER BY plate_payouts.created_at, plate_payouts.id" in copy
+    assert db.params[5]["row_id"] == 40 and db.params[5]["base"] == Decimal("500")
+
+    (cash_row,) = db.added
+    assert isinstance(cash_row, CashRow)
+    assert cash_row.total == cash_row.plates == Decimal("-4500") and cash_row.shift_id == 3
+
+
+def test_nothing_to_settle(fake_db):
+    db = fake_db(results=[[]])
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(pay_plate_payouts(None, db, _USER))
+    assert exc.value.detail == "Нет номеров к выдаче"
+    assert "plate_payouts.id IN" not in _sql(db.statements[0])
+
+
+def test_bad_selection_is_400_without_queries(fake_db):
+    db = fake_db()
+    for body in (PlatePayoutSettle(ids=[]), PlatePayoutSettle(date_from="2026-10-19", date_to="2026-10-01")):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(pay_plate_payouts(body, db, _USER))
+        assert exc.value.status_code == 400
+    assert db.loads == 0
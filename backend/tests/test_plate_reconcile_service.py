@@ -0,0 +1,64 @@
+"""Сверка резервов заготовок: пачка заказов и пересчёт счётчиков (без БД)."""
+import asyncio
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import OrderStatus, PlateReservation, PlateReservedAmount, PlateStock
+from app.services.plate_reconcile_service import _reconcile_batch, _reconcile_counters
+from app.services.plate_stock_service import month_start
+
+OrderRow = namedtuple("OrderRow", "id status plate_quantity")
+
+
+def test_batch_fixes_reservations_and_tolerates_bad_quantity(fake_db):
+    stock = PlateStock(quantity=20, reserved=0, reserved_in_work=5, defects_month=0)
+    orders = [
+        OrderRow(1, OrderStatus.PLATE_IN_PROGRESS, "2 шт"),  # не число — 1, резерв 1 верный
+        OrderRow(2, OrderStatus.PLATE_IN_PROGRESS, "3"),  # резерва нет
+        OrderRow(3, OrderStatus.PAID, "2"),  # ещё не в работе, резерв лишний
+        OrderRow(4, OrderStatus.PLATE_READY, " 2 "),  # резерв на 1 вместо 2
+    ]
+    reservations = [(1, 1, 1), (3, 2, 1), (4, 1, 1)]
+    db = fake_db(results=[[stock], orders, reservations])
+    drift = []
+    last_id, checked = asyncio.run(_reconcile_batch(db, 0, 10, drift))
+    assert (last_id, checked) == (4, 4)
+    assert [(d["kind"], d["order_id"], d["expected"], d["actual"]) for d in drift] == [
+        ("missing", 2, 3, 0), ("unexpected", 3, 0, 2), ("stale", 4, 2, 1),
+    ]
+    added = [(r.order_id, r.quantity) for r in db.added if isinstance(r, PlateReservation)]
+    assert added == [(2, 3), (4, 2)]
+    assert stock.reserved_in_work == 5 + 3 - 2 + 1
+
+
+def test_batch_without_orders(fake_db):
+    stock = PlateStock(quantity=0, reserved=0, reserved_in_work=0, defects_month=0)
+    db = fake_db(results=[[stock], []])
+    assert asyncio.run(_reconcile_batch(db, 7, 10, [])) == (7, 0)
+    assert db.loads == 2
+
+
+def test_counters_recomputed_with_guarded_quantity(fake_db):
+    now = datetime.utcnow()
+    stock = PlateStock(quantity=10, reserved=9, reserved_in_work=2, defects_month=1, defects_month_start=month_start(now))
+    stored = [PlateReservedAmount(total_amount=Decimal("1500"), quantity=9)]
+    db = fake_db(results=[
+        [stock],
+        [(11, 1)],  # резерв по выданному заказу
+        [(Decimal("1500"), 3), (Decimal("3000"), 2)],
+        [2],
+        [1],
+        stored,
+    ])
+    drift = []
+    asyncio.run(_reconcile_counters(db, drift))
+    assert [d["kind"] for d in drift] == ["orphan", "counter_reserved", "breakdown"]
+    assert (stock.reserved, stock.reserved_in_work, stock.defects_month) == (5, 2, 1)
+    amounts = {r.total_amount: r.quantity for r in db.added if isinstance(r, PlateReservedAmount)}
+    assert amounts == {Decimal("1500"): 3, Decimal("3000"): 2}
+    # Сумма резерва считается в SQL по тому же правилу: приведение к integer только для цифр
+    sql = str(db.statements[2].compile(dialect=postgresql.dialect()))
+    assert "~ '^[0-9]{1,6}$'" in sql and "ELSE 1 END" in sql
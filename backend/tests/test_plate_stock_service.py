@@ -0,0 +1,36 @@
+"""Счётчики склада заготовок (без БД)."""
+from datetime import date, datetime
+
+from app.models import Order, PlateStock
+from app.services.plate_stock_service import (
+    defects_this_month,
+    parse_plate_quantity,
+    plate_quantity_from_order,
+    plate_quantity_sql,
+)
+
+
+def test_plate_quantity_defaults_to_one():
+    """Без plate_quantity в form_data резервируется 1 заготовка."""
+    assert plate_quantity_from_order(Order(form_data=None)) == 1
+    assert plate_quantity_from_order(Order(form_data={"plate_quantity": 2})) == 2
+
+
+def test_plate_quantity_tolerates_garbage():
+    """Не число («2 шт», дробь, пустая строка) — 1, а не исключение; пробелы по краям допустимы."""
+    assert plate_quantity_from_order(Order(form_data={"plate_quantity": "2 шт"})) == 1
+    assert [parse_plate_quantity(v) for v in (" 3 ", "0", "", "2.0", 2.0, True, None, "1234567")] == [3, 1, 1, 1, 1, 1, 1, 1]
+
+
+def test_plate_quantity_sql_guards_cast():
+    """В SQL приведение к integer только для строки из цифр — то же правило, что в Python."""
+    sql = plate_quantity_sql("o.form_data")
+    assert sql.startswith("(CASE WHEN btrim(o.form_data->>'plate_quantity', ' ') ~ '^[0-9]{1,6}$' THEN")
+    assert sql.endswith("ELSE 1 END)")
+
+
+def test_defects_counter_resets_on_new_month():
+    """Счётчик браков прошлого месяца не показывается в текущем."""
+    stock = PlateStock(quantity=10, defects_month=3, defects_month_start=date(2026, 9, 1))
+    assert defects_this_month(stock, datetime(2026, 9, 30, 23, 0)) == 3
+    assert defects_this_month(stock, datetime(2026, 10, 1, 0, 5)) == 0
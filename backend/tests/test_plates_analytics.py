@@ -0,0 +1,62 @@
+"""Аналитика павильона 2 по дням (без БД)."""
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.services import plates_analytics_service
+from app.services.plates_analytics_service import PlatesDay, build_plates_analytics, defect_rate, plates_days
+
+
+def test_period_median_is_over_all_orders():
+    days = [
+        PlatesDay(date(2026, 10, 1), 2, (3600, 7200), 1, Decimal("3000")),
+        PlatesDay(date(2026, 10, 2), 0, (), 0, Decimal("0")),
+        PlatesDay(date(2026, 10, 3), 1, (36000,), 0, Decimal("1500")),
+    ]
+    result = build_plates_analytics(days)
+    assert result.plates_issued == 3 and result.defects == 1
+    assert result.defect_rate_percent == Decimal("33.33")
+    assert result.median_lead_time_hours == 2.0
+    assert result.revenue == Decimal("4500")
+    assert result.days[0].median_lead_time_hours == 1.5
+    assert result.days[1].median_lead_time_hours is None
+
+
+def test_defect_rate_without_issued_plates():
+    assert defect_rate(2, 0) is None
+    assert defect_rate(1, 8) == Decimal("12.50")
+
+
+def _daily_rows(stmt, params, first_issued=date(2026, 1, 1)):
+    """По строке на каждый день от params["start"] до params["last"]; first_issued — первая выдача в истории."""
+    day, last = params["start"].date(), params["last"].date()
+    rows = []
+    while day <= last:
+        rows.append((day, 1, [3600], 0, Decimal("1500"), first_issued))
+        day += timedelta(days=1)
+    return rows
+
+
+def test_closed_days_are_cached(fake_db):
+    plates_analytics_service._day_cache.clear()
+    db = fake_db(respond=_daily_rows)
+    today = date(2026, 10, 19)
+    days = asyncio.run(plates_days(db, date(2026, 10, 17), today, today))
+    assert [d.day for d in days] == [date(2026, 10, 17), date(2026, 10, 18), today]
+    asyncio.run(plates_days(db, date(2026, 10, 17), today, today))
+    # Второй запрос считает только сегодняшний день
+    assert [p["start"].date() for p in db.params] == [date(2026, 10, 17), today]
+    plates_analytics_service._day_cache.clear()
+
+
+def test_days_before_history_are_not_cached(fake_db):
+    """Дни до первой выдачи в истории статусов пересчитываются: история может быть перенесена позже."""
+    plates_analytics_service.invalidate()
+    db = fake_db(respond=lambda stmt, params: _daily_rows(stmt, params, first_issued=date(2026, 10, 18)))
+    today = date(2026, 10, 19)
+    asyncio.run(plates_days(db, date(2026, 10, 16), today, today))
+    asyncio.run(plates_days(db, date(2026, 10, 16), today, today))
+    assert [p["start"].date() for p in db.params] == [date(2026, 10, 16), date(2026, 10, 16)]
+    assert sorted(plates_analytics_service._day_cache) == [date(2026, 10, 18)]
+    plates_analytics_service.invalidate()
+    assert not plates_analytics_service._day_cache
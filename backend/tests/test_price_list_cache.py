@@ -0,0 +1,92 @@
+"""Прейскурант в памяти: версия, ETag и поиск по шаблону (без БД)."""
+import asyncio
+from decimal import Decimal
+
+from app.api.price_list import _etag_matches
+from app.config import settings
+from app.data.price_list import get_label_by_template, get_price_by_template
+from app.models import DocumentPrice
+from app.services import price_list_cache
+
+
+def _row(template, label, price, sort_order=0):
+    return DocumentPrice(id=sort_order + 1, template=template, label=label, price=Decimal(price), sort_order=sort_order)
+
+
+def test_loaded_once_until_update(fake_db, monkeypatch):
+    monkeypatch.setattr(settings, "price_list_cache_ttl_seconds", 3600)
+    price_list_cache.invalidate()
+    db = fake_db([_row("DKP.docx", "Договор купли-продажи", "600")])
+
+    async def run():
+        items, etag = await price_list_cache.get_items(db)
+        await price_list_cache.get_items(db)
+        assert db.loads == 1 and items[0]["price"] == 600
+        assert await price_list_cache.label_for(db, "DKP.docx") == "Договор купли-продажи"
+        # Нет в БД — название по умолчанию, неизвестный шаблон — сам шаблон
+        assert await price_list_cache.label_for(db, "mreo.docx") == "МРЭО (постановка/снятие)"
+        assert await price_list_cache.label_for(db, "new.docx") == "new.docx"
+        # Тот же список после сброса — тот же ETag (он зависит только от содержимого)
+        price_list_cache.invalidate()
+        assert (await price_list_cache.get_items(db))[1] == etag and db.loads == 2
+        db.rows = [_row("DKP.docx", "Договор купли-продажи", "700")]
+        price_list_cache.invalidate()
+        assert (await price_list_cache.get_items(db))[1] != etag
+
+    asyncio.run(run())
+    price_list_cache.invalidate()
+
+
+def test_reloaded_after_ttl(fake_db, monkeypatch):
+    """Изменение из другого воркера (без invalidate здесь) видно после истечения TTL."""
+    monkeypatch.setattr(settings, "price_list_cache_ttl_seconds", 0)
+    price_list_cache.invalidate()
+    db = fake_db([_row("DKP.docx", "Договор купли-продажи", "600")])
+
+    async def run():
+        await price_list_cache.get_items(db)
+        db.rows = [_row("DKP.docx", "Договор купли-продажи", "700")]
+        assert (await price_list_cache.get_items(db))[0][0]["price"] == 700
+        assert db.loads == 2
+
+    asyncio.run(run())
+    price_list_cache.invalidate()
+
+
+def test_invalidate_during_load_keeps_reply_consistent(fake_db, monkeypatch):
+    """Сброс во время SELECT: ответ — прочитанный список со своим ETag, в память он не попадает."""
+    monkeypatch.setattr(settings, "price_list_cache_ttl_seconds", 3600)
+    price_list_cache.invalidate()
+    old = [_row("DKP.docx", "Договор купли-продажи", "600")]
+    new = [_row("DKP.docx", "Договор (новый)", "700")]
+
+    def respond(stmt, params):
+        price_list_cache.invalidate()
+        return new
+
+    async def run():
+        _, old_etag = await price_list_cache.get_items(fake_db(old))
+        price_list_cache.invalidate()
+        db = fake_db(respond=respond)
+        items, etag = await price_list_cache.get_items(db)
+        assert items[0]["price"] == 700 and etag == price_list_cache._content_etag(items) != old_etag
+        assert await price_list_cache.label_for(db, "DKP.docx") == "Договор (новый)"
+        assert db.loads == 2
+
+    asyncio.run(run())
+    price_list_cache.invalidate()
+
+
+def test_if_none_match_tokens():
+    assert _etag_matches('"abc"', '"abc"')
+    assert _etag_matches('"x", W/"abc"', '"abc"')
+    assert _etag_matches("*", '"abc"')
+    assert not _etag_matches('"abcd"', '"abc"')
+    assert not _etag_matches('"xabc", "abcx"', '"abc"')
+    assert not _etag_matches("", '"abc"')
+
+
+def test_default_lookups():
+    assert get_price_by_template("number.docx") == Decimal("1500")
+    assert get_price_by_template("missing.docx") is None
+    assert get_label_by_template("missing.docx") == "missing.docx"
@@ -0,0 +1,107 @@
+"""Накопительные суммы смены, сверка с платежами и Z-отчёт (без БД)."""
+import asyncio
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.auth import UserInfo
+from app.api.cash import close_shift
+from app.models import CashShift, PaymentType, ShiftReport, ShiftStatus
+from app.schemas.cash import ShiftClose
+from app.services.shift_service import (
+    CASH_COLUMNS,
+    SHIFT_TOTAL_COLUMNS,
+    build_shift_report,
+    check_shift_totals,
+    shift_report_to_dict,
+    shift_totals_to_dict,
+)
+
+
+def test_every_payment_type_has_total_column():
+    """У каждого типа платежа есть колонка суммы на cash_shifts."""
+    assert set(SHIFT_TOTAL_COLUMNS) == set(PaymentType)
+    for col in SHIFT_TOTAL_COLUMNS.values():
+        assert hasattr(CashShift, col)
+
+
+def test_total_payments_sums_all_types():
+    shift = CashShift(
+        total_state_duty=Decimal("2850.00"),
+        total_income_pavilion1=Decimal("1500.50"),
+        total_income_pavilion2=Decimal("3000"),
+    )
+    assert shift.total_payments == Decimal("7350.50")
+    assert shift_totals_to_dict(shift) == {
+        "STATE_DUTY": 2850.0,
+        "INCOME_PAVILION1": 1500.5,
+        "INCOME_PAVILION2": 3000.0,
+    }
+
+
+def test_check_shift_totals_fixes_drift(fake_db):
+    """Сумма смены, разошедшаяся с платежами, исправляется и попадает в список расхождений."""
+    shift = CashShift(
+        id=5,
+        total_state_duty=Decimal("2850"),
+        total_income_pavilion1=Decimal("1000"),
+        total_income_pavilion2=Decimal("0"),
+    )
+    db = fake_db(results=[
+        [shift],
+        [(5, PaymentType.STATE_DUTY, Decimal("2850")), (5, PaymentType.INCOME_PAVILION1, Decimal("1500"))],
+    ])
+    drift = asyncio.run(check_shift_totals(db))
+    assert drift == [{"shift_id": 5, "type": "INCOME_PAVILION1", "expected": "1500", "actual": "1000"}]
+    assert shift.total_income_pavilion1 == Decimal("1500")
+    assert "FOR UPDATE" in str(db.statements[0].compile(dialect=postgresql.dialect()))
+
+
+def test_check_shift_totals_without_open_shifts(fake_db):
+    db = fake_db(results=[[]])
+    assert asyncio.run(check_shift_totals(db)) == []
+    assert db.loads == 1
+
+
+def test_z_report_expected_balance_and_discrepancy(fake_db):
+    """Ожидаемый остаток = начальный + итог строк кассы; расхождение = заявленный − ожидаемый."""
+    shift = CashShift(id=3, pavilion=1, opening_balance=Decimal("1000"), closing_balance=Decimal("5800"))
+    column_sums = (Decimal("500"), Decimal("2850"), Decimal("600"), Decimal("0"), Decimal("1000"), Decimal("4950"))
+    db = fake_db(results=[
+        [(4,) + column_sums],
+        [(PaymentType.STATE_DUTY, 2, Decimal("2850")), (PaymentType.INCOME_PAVILION1, 3, Decimal("2100"))],
+    ])
+    report = asyncio.run(build_shift_report(db, shift))
+    assert db.added == [report]
+    assert report.rows_count == 4
+    assert report.column_totals == {c: str(v) for c, v in zip(CASH_COLUMNS, column_sums)}
+    assert report.expected_balance == Decimal("5950")
+    assert report.discrepancy == Decimal("-150")
+    out = shift_report_to_dict(report)
+    assert out["payments"] == {
+        "STATE_DUTY": {"count": 2, "amount": 2850.0},
+        "INCOME_PAVILION1": {"count": 3, "amount": 2100.0},
+    }
+    assert out["declared_balance"] == 5800.0 and out["discrepancy"] == -150.0
+
+
+def test_z_report_plates_pavilion_without_declared_balance(fake_db):
+    shift = CashShift(id=4, pavilion=2, opening_balance=Decimal("0"), closing_balance=None)
+    db = fake_db(results=[[(2, Decimal("3000"))], []])
+    report = asyncio.run(build_shift_report(db, shift))
+    assert report.column_totals == {"amount": "3000"}
+    assert report.expected_balance == Decimal("3000") and report.discrepancy is None
+
+
+def test_close_shift_locks_row_and_rejects_second_close(fake_db):
+    """Смена читается FOR UPDATE; уже закрытая (параллельное закрытие) — 400 без второго Z-отчёта."""
+    shift = CashShift(id=3, pavilion=1, status=ShiftStatus.CLOSED)
+    db = fake_db(results=[[shift]])
+    user = UserInfo(id=1, name="Анна", role="ROLE_ADMIN", login="anna")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(close_shift(3, ShiftClose(closing_balance=Decimal("100")), db, user))
+    assert exc.value.status_code == 400 and exc.value.detail == "Смена уже закрыта"
+    assert "FOR UPDATE" in str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert not any(isinstance(obj, ShiftReport) for obj in db.added)
@@ -0,0 +1,37 @@
+"""Данные ТС по VIN: нормализация, поля из form_data, upsert без затирания полей (без БД)."""
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.vehicle_service import normalize_vin, remember_vehicle, vehicle_attributes
+
+
+def test_normalize_vin():
+    assert normalize_vin(" xta-2109 0012345 ") == "XTA21090012345"
+    assert normalize_vin("  ") is None
+    assert normalize_vin(None) is None
+
+
+def test_vehicle_attributes_only_filled_fields():
+    attrs = vehicle_attributes({
+        "vin": "X", "brand_model": " Лада Гранта ", "year": 2019, "engine": "", "color": None, "client_fio": "Иванов",
+    })
+    assert attrs == {"brand_model": "Лада Гранта", "year": "2019"}
+
+
+def test_remember_vehicle_upsert_merges_attributes(fake_db):
+    db = fake_db()
+    asyncio.run(remember_vehicle(db, 7, {"vin": "xta 123", "color": "белый"}))
+    (stmt,) = db.statements
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (vin) DO UPDATE" in sql
+    assert "vehicles.attributes || excluded.attributes" in sql
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert params["vin"] == "XTA123" and params["attributes"] == {"color": "белый"} and params["order_id"] == 7
+
+
+def test_remember_vehicle_without_vin_does_nothing(fake_db):
+    db = fake_db()
+    asyncio.run(remember_vehicle(db, 7, {"brand_model": "Лада"}))
+    asyncio.run(remember_vehicle(db, 8, None))
+    assert db.statements == []
@@ -1,28 +1,79 @@
 (function () {
   if (!window.requireAuth || !window.requireAuth()) return;
 
-  function initStub() {
-    var container =
-      document.getElementById('kpiPlatesContent') ||
-      document.getElementById('dynamicsPlatesContent') ||
-      document.getElementById('employeesPlatesContent') ||
-      document.querySelector('.admin') ||
-      document.body;
-
-    if (!container) return;
-
-    if (container.innerHTML && container.innerHTML.indexOf('временно отключ') !== -1) {
-      return;
-    }
-
-    container.innerHTML =
-      '<p class="text-muted">Аналитика по номерам временно отключена. Раздел в разработке.</p>';
+  var API = window.API_BASE_URL || '';
+  var fetchApi = window.fetchWithAuth || fetch;
+
+  var kpiEl = document.getElementById('kpiPlatesContent');
+  var bodyEl = document.getElementById('dynamicsPlatesContent');
+  var fromEl = document.getElementById('platesFrom');
+  var toEl = document.getElementById('platesTo');
+  var msgEl = document.getElementById('platesMsg');
+  var btnEl = document.getElementById('btnPlatesLoad');
+
+  if (!kpiEl || !bodyEl) return;
+
+  function formatMoney(n) {
+    var num = Number(n || 0);
+    if (!isFinite(num)) num = 0;
+    return new Intl.NumberFormat('ru-RU', {
+      minimumFractionDigits: 0,
+      maximumFractionDigits: 0,
+    }).format(num) + ' ₽';
   }
 
-  if (document.readyState === 'loading') {
-    document.addEventListener('DOMContentLoaded', initStub);
-  } else {
-    initStub();
+  function formatHours(h) {
+    return h == null ? '—' : String(h).replace('.', ',');
+  }
+
+  function kpi(label, value) {
+    return '<div class="kpi-card"><div class="kpi-card__label">' + label + '</div>' +
+      '<div class="kpi-card__value">' + value + '</div></div>';
   }
-})();
 
+  function render(d) {
+    kpiEl.innerHTML =
+      kpi('Выдано номеров', d.plates_issued) +
+      kpi('Срок оплата → выдача (медиана)', formatHours(d.median_lead_time_hours) + ' ч') +
+      kpi('Брак', d.defects + (d.defect_rate_percent != null ? ' (' + String(d.defect_rate_percent).replace('.', ',') + '%)' : '')) +
+      kpi('Выручка (номера)', formatMoney(d.revenue));
+
+    bodyEl.innerHTML = '';
+    (d.days || []).slice().reverse().forEach(function (p) {
+      var tr = document.createElement('tr');
+      tr.innerHTML =
+        '<td>' + p.date.split('-').reverse().join('.') + '</td>' +
+        '<td>' + p.plates_issued + '</td>' +
+        '<td>' + formatHours(p.median_lead_time_hours) + '</td>' +
+        '<td>' + p.defects + '</td>' +
+        '<td>' + formatMoney(p.revenue) + '</td>';
+      bodyEl.appendChild(tr);
+    });
+  }
+
+  function load() {
+    var params = ['period=month'];
+    if (fromEl && fromEl.value) params.push('date_from=' + fromEl.value);
+    if (toEl && toEl.value) params.push('date_to=' + toEl.value);
+    if (msgEl) msgEl.textContent = 'Загрузка…';
+    fetchApi(API + '/analytics/plates?' + params.join('&'))
+      .then(function (r) {
+        return r.json().then(function (j) {
+          if (!r.ok) throw new Error(j.detail || r.statusText);
+          return j;
+        });
+      })
+      .then(function (d) {
+        if (msgEl) msgEl.textContent = 'Период: ' + d.date_from.split('-').reverse().join('.') +
+          ' — ' + d.date_to.split('-').reverse().join('.');
+        render(d);
+      })
+      .catch(function (e) {
+        if (e && e.message === 'auth') return;
+        if (msgEl) msgEl.textContent = 'Ошибка: ' + (e && e.message ? e.message : 'не удалось загрузить');
+      });
+  }
+
+  if (btnEl) btnEl.addEventListener('click', load);
+  load();
+})();
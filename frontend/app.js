@@ -356,34 +356,54 @@
     updateDocList();
   }
 
+  var formHistoryTimer = null;
+
+  function formHistoryLabel(item) {
+    var parts = [item.client_name || 'Без имени'];
+    if (item.brand_model) parts.push(item.brand_model);
+    if (item.plate_number) parts.push(item.plate_number);
+    else if (item.vin) parts.push(item.vin);
+    var dt = item.used_at ? new Date(item.used_at).toLocaleString('ru-RU', { day: '2-digit', month: '2-digit', year: 'numeric', hour: '2-digit', minute: '2-digit' }) : '';
+    return String(parts.join(', ')).replace(/</g, '&lt;') + ' — ' + dt;
+  }
+
+  async function applyFormHistoryEntry(id) {
+    try {
+      var r = await fetchApi(API_BASE_URL + '/form-history/' + encodeURIComponent(id));
+      if (!r.ok) throw new Error(r.statusText);
+      var entry = await r.json();
+      applyFormData(entry.form_data || {});
+    } catch (e) {
+      alert('Не удалось загрузить запись истории');
+    }
+  }
+
   async function loadFormHistory() {
     var listEl = el('formHistoryList');
     var loadingEl = el('formHistoryLoading');
+    var searchEl = el('formHistorySearch');
     if (!listEl) return;
     if (loadingEl) loadingEl.textContent = 'Загрузка…';
+    var q = searchEl ? searchEl.value.trim() : '';
     try {
-      var r = await fetchApi(API_BASE_URL + '/form-history?limit=50');
+      var url = API_BASE_URL + '/form-history?limit=20' + (q ? '&q=' + encodeURIComponent(q) : '');
+      var r = await fetchApi(url);
       if (!r.ok) throw new Error(r.statusText);
       var items = await r.json();
       if (!Array.isArray(items)) items = [];
       if (loadingEl) loadingEl.remove();
       if (items.length === 0) {
-        listEl.innerHTML = '<li class="form-history-list__loading">Нет записей. Записи появляются после нажатия «Принять наличные».</li>';
+        listEl.innerHTML = q
+          ? '<li class="form-history-list__loading">Ничего не найдено</li>'
+          : '<li class="form-history-list__loading">Нет записей. Записи появляются после нажатия «Принять наличные».</li>';
         return;
       }
       listEl.innerHTML = items.map(function (item) {
-        var fd = item.form_data || {};
-        var label = fd.client_fio || fd.client_legal_name || 'Без имени';
-        var dt = item.created_at ? new Date(item.created_at).toLocaleString('ru-RU', { day: '2-digit', month: '2-digit', year: 'numeric', hour: '2-digit', minute: '2-digit' }) : '';
-        var dataAttr = 'data-form-data="' + (JSON.stringify(item.form_data || {}).replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/</g, '&lt;')) + '"';
-        return '<li class="form-history-list__item" ' + dataAttr + '>' + (String(label).replace(/</g, '&lt;')) + ' — ' + dt + '</li>';
+        return '<li class="form-history-list__item" data-id="' + item.id + '">' + formHistoryLabel(item) + '</li>';
       }).join('');
       listEl.querySelectorAll('.form-history-list__item').forEach(function (li) {
         li.addEventListener('click', function () {
-          try {
-            var data = this.getAttribute('data-form-data');
-            if (data) applyFormData(JSON.parse(data));
-          } catch (e) { }
+          applyFormHistoryEntry(this.getAttribute('data-id'));
         });
       });
     } catch (e) {
@@ -391,6 +411,92 @@
     }
   }
 
+  function initFormHistorySearch() {
+    var searchEl = el('formHistorySearch');
+    if (!searchEl) return;
+    searchEl.addEventListener('input', function () {
+      clearTimeout(formHistoryTimer);
+      formHistoryTimer = setTimeout(loadFormHistory, 300);
+    });
+  }
+
+  function escapeHtml(s) {
+    return String(s).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/"/g, '&quot;');
+  }
+
+  // Подсказки по прошлым заказам: ввод ФИО или паспорта → последние известные паспорт, адрес, телефон
+  function initClientSuggest(fioInput, fields) {
+    if (!fioInput || !fioInput.parentNode) return;
+    var listEl = document.createElement('ul');
+    listEl.className = 'suggest-list';
+    listEl.style.display = 'none';
+    fioInput.parentNode.classList.add('field--suggest');
+    fioInput.parentNode.appendChild(listEl);
+    var timer = null;
+    var items = [];
+
+    function hide() { listEl.style.display = 'none'; }
+
+    async function load() {
+      var q = fioInput.value.trim();
+      if (q.length < 2) { hide(); return; }
+      try {
+        var r = await fetchApi(API_BASE_URL + '/clients/suggest?q=' + encodeURIComponent(q));
+        if (!r.ok) throw new Error(r.statusText);
+        items = await r.json();
+      } catch (e) {
+        items = [];
+      }
+      if (!Array.isArray(items) || items.length === 0 || fioInput.value.trim() !== q) { hide(); return; }
+      listEl.innerHTML = items.map(function (item, i) {
+        var extra = [item.passport, item.address].filter(Boolean).join(', ');
+        return '<li class="suggest-list__item" data-index="' + i + '">' + escapeHtml(item.fio) +
+          (extra ? ' <span class="suggest-list__extra">' + escapeHtml(extra) + '</span>' : '') + '</li>';
+      }).join('');
+      listEl.style.display = '';
+    }
+
+    fioInput.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(load, 200);
+    });
+    fioInput.addEventListener('blur', function () { setTimeout(hide, 150); });
+    listEl.addEventListener('mousedown', function (e) {
+      var li = e.target.closest('.suggest-list__item');
+      if (!li) return;
+      e.preventDefault();
+      var item = items[Number(li.getAttribute('data-index'))];
+      if (!item) return;
+      setVal(fioInput, item.fio);
+      if (item.passport) setVal(fields.passport, item.passport);
+      if (item.address) setVal(fields.address, item.address);
+      if (item.phone) setVal(fields.phone, item.phone);
+      hide();
+      syncFromMainForm();
+    });
+  }
+
+  var VEHICLE_INPUTS = {
+    brand_model: 'brandModel', vehicle_type: 'vehicleType', year: 'year', engine: 'engine', chassis: 'chassis',
+    body: 'body', color: 'color', srts: 'srts', pts: 'pts', plate_number: 'plateNumber'
+  };
+
+  // VIN из прошлых заказов: подставить данные ТС в пустые поля
+  async function prefillVehicle() {
+    var vin = inputs.vin ? inputs.vin.value.trim() : '';
+    if (vin.length < 11) return;
+    try {
+      var r = await fetchApi(API_BASE_URL + '/vehicles/' + encodeURIComponent(vin));
+      if (!r.ok) return;
+      var vehicle = await r.json();
+      Object.keys(VEHICLE_INPUTS).forEach(function (key) {
+        var inp = inputs[VEHICLE_INPUTS[key]];
+        if (inp && !inp.value.trim() && vehicle[key]) setVal(inp, vehicle[key]);
+      });
+      syncFromMainForm();
+    } catch (e) { }
+  }
+
   function doPrint() {
     var orderId = window.lastOrderId;
     if (!orderId) {
@@ -533,6 +639,10 @@
     if (docSelect) docSelect.addEventListener('keydown', function (e) { if (e.key === 'Enter') { e.preventDefault(); addSelectedDocument(); } });
     if (btnAcceptCash) btnAcceptCash.addEventListener('click', acceptCash);
     if (btnPrint) btnPrint.addEventListener('click', doPrint);
+    initFormHistorySearch();
+    initClientSuggest(inputs.clientFio, { passport: inputs.clientPassport, address: inputs.clientAddress, phone: inputs.clientPhone });
+    if (inputs.vin) inputs.vin.addEventListener('change', prefillVehicle);
+    initClientSuggest(inputs.sellerFio, { passport: inputs.sellerPassport, address: inputs.sellerAddress });
     loadFormHistory();
   }
 
@@ -19,6 +19,12 @@
   }
 
   var rows = [];
+  // Итого за выбранный период считает сервер (SUM по всему периоду); загружены только страницы строк.
+  // Правки в загруженных строках учитываются как разница с их суммой на момент загрузки.
+  var serverTotal = 0;
+  var loadedBaseline = 0;
+  var nextCursor = null;
+  var period = '';
 
   function msg(text, type) {
     var el = document.getElementById('cashMsg');
@@ -68,19 +74,59 @@
     return 'cash-crm__row-total--positive';
   }
 
-  function patchRow(id, payload) {
-    return fetchApi(API + '/cash/rows/' + id, {
+  // Правки ячеек копятся и уходят одним PATCH /cash/rows:batch (вся колонка — один запрос)
+  var pending = {};
+  var pendingTimer = null;
+  var BATCH_DELAY_MS = 400;
+
+  function queuePatch(id, payload) {
+    var fields = pending[id] || (pending[id] = {});
+    Object.keys(payload).forEach(function (k) { fields[k] = payload[k]; });
+    if (pendingTimer) clearTimeout(pendingTimer);
+    pendingTimer = setTimeout(flushPatches, BATCH_DELAY_MS);
+  }
+
+  function flushPatches() {
+    pendingTimer = null;
+    var ids = Object.keys(pending);
+    if (!ids.length) return;
+    var changes = ids.map(function (id) {
+      return { id: parseInt(id, 10), fields: pending[id] };
+    });
+    pending = {};
+    fetchApi(API + '/cash/rows:batch', {
       method: 'PATCH',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify(payload),
-    }).then(function (r) {
-      if (!r.ok) {
-        return r.json().then(function (j) {
-          throw new Error(j.detail || r.statusText);
-        });
-      }
-      return r.json();
-    });
+      body: JSON.stringify(changes),
+    })
+      .then(function (r) {
+        if (!r.ok) {
+          return r.json().then(function (j) {
+            throw new Error(j.detail || r.statusText);
+          });
+        }
+        return r.json();
+      })
+      .then(function (updatedRows) {
+        updatedRows.forEach(applyUpdated);
+        renderTotal();
+        msg(updatedRows.length > 1 ? 'Сохранено строк: ' + updatedRows.length : 'Сохранено', 'ok');
+      })
+      .catch(function (e) {
+        msg('Ошибка: ' + (e.message || 'не удалось сохранить'), 'err');
+      });
+  }
+
+  /** Обновить строку из ответа сервера: данные и «Итого» в строке. */
+  function applyUpdated(updated) {
+    replaceRow(updated.id, updated);
+    var rowEl = document.querySelector('.cash-crm__grid-row[data-row-id="' + updated.id + '"]');
+    if (!rowEl) return;
+    var totalWrap = rowEl.querySelector('.cash-crm__row-total');
+    var totalInput = totalWrap && totalWrap.querySelector('.cash-crm__input--total');
+    var t = totalFromRow(updated);
+    if (totalWrap) totalWrap.className = 'cash-crm__row-total ' + rowTotalClass(t);
+    if (totalInput && document.activeElement !== totalInput) totalInput.value = t === 0 ? '' : toInputValue(t);
   }
 
   function replaceRow(id, updated) {
@@ -146,18 +192,9 @@
       row.total = v;
       this.value = raw.trim() === '' ? '' : toInputValue(v);
 
-      patchRow(id, { total: v })
-        .then(function (updated) {
-          replaceRow(id, updated);
-          var t = totalFromRow(updated);
-          input.value = t === 0 ? '' : toInputValue(t);
-          wrap.className = 'cash-crm__row-total ' + rowTotalClass(t);
-          renderTotal();
-          msg('Сохранено', 'ok');
-        })
-        .catch(function (e) {
-          msg('Ошибка: ' + (e.message || 'не удалось сохранить'), 'err');
-        });
+      wrap.className = 'cash-crm__row-total ' + rowTotalClass(v);
+      renderTotal();
+      queuePatch(id, { total: v });
     });
 
     input.addEventListener('keydown', function (e) {
@@ -213,33 +250,15 @@
       }
 
       var payload = {};
+      currentRow[field] = newValue;
+      payload[field] = newValue;
       if (isNumber) {
-        currentRow[field] = newValue;
-        var sum = recomputeTotal(currentRow);
-        payload[field] = newValue;
-        payload.total = sum;
-      } else {
-        payload[field] = newValue;
+        payload.total = recomputeTotal(currentRow);
+        // «Итого» в строке и общий итог — сразу, сохранение уйдёт пакетом
+        applyUpdated(currentRow);
+        renderTotal();
       }
-
-      patchRow(id, payload)
-        .then(function (updated) {
-          replaceRow(id, updated);
-          // Обновляем «Итого» в строке и общий итог
-          var rowEl = document.querySelector('.cash-crm__grid-row[data-row-id="' + id + '"]');
-          if (rowEl) {
-            var totalWrap = rowEl.querySelector('.cash-crm__row-total');
-            var totalInput = totalWrap && totalWrap.querySelector('.cash-crm__input--total');
-            var t = totalFromRow(updated);
-            if (totalWrap) totalWrap.className = 'cash-crm__row-total ' + rowTotalClass(t);
-            if (totalInput) totalInput.value = t === 0 ? '' : toInputValue(t);
-          }
-          renderTotal();
-          msg('Сохранено', 'ok');
-        })
-        .catch(function (e) {
-          msg('Ошибка: ' + (e.message || 'не удалось сохранить'), 'err');
-        });
+      queuePatch(id, payload);
     });
 
     input.addEventListener('keydown', function (e) {
@@ -249,10 +268,14 @@
     return input;
   }
 
-  function renderTotal() {
-    var total = rows.reduce(function (sum, r) {
+  function sumRows(list) {
+    return list.reduce(function (sum, r) {
       return sum + totalFromRow(r);
     }, 0);
+  }
+
+  function renderTotal() {
+    var total = serverTotal - loadedBaseline + sumRows(rows);
     var wrap = document.getElementById('cashTotalCell');
     if (!wrap) return;
     var numSpan = wrap.querySelector('.cash-crm__amount-num');
@@ -349,9 +372,36 @@
     renderTotal();
   }
 
-  function loadRows() {
+  function isoDay(d) {
+    var m = d.getMonth() + 1;
+    var day = d.getDate();
+    return d.getFullYear() + '-' + (m < 10 ? '0' : '') + m + '-' + (day < 10 ? '0' : '') + day;
+  }
+
+  /** Параметры периода: '' — вся касса, 'day' — сегодня, 'month' — текущий месяц. */
+  function periodQuery() {
+    var now = new Date();
+    if (period === 'day') {
+      return 'date_from=' + isoDay(now) + '&date_to=' + isoDay(now);
+    }
+    if (period === 'month') {
+      return 'date_from=' + isoDay(new Date(now.getFullYear(), now.getMonth(), 1)) + '&date_to=' + isoDay(now);
+    }
+    return '';
+  }
+
+  function renderMore() {
+    var btn = document.getElementById('btnMoreRows');
+    if (btn) btn.hidden = !nextCursor;
+  }
+
+  function loadRows(append) {
     var hint = ' Проверьте, что бэкенд запущен (systemctl restart eye_w).';
-    fetchApi(API + '/cash/rows')
+    var qs = periodQuery();
+    if (append && nextCursor) {
+      qs += (qs ? '&' : '') + 'cursor=' + encodeURIComponent(nextCursor);
+    }
+    fetchApi(API + '/cash/rows' + (qs ? '?' + qs : ''))
       .then(function (r) {
         return r.text().then(function (text) {
           var t = (text || '').trim();
@@ -378,8 +428,18 @@
         });
       })
       .then(function (data) {
-        rows = Array.isArray(data) ? data : [];
+        var page = (data && Array.isArray(data.rows)) ? data.rows : [];
+        if (append) {
+          rows = rows.concat(page);
+          loadedBaseline += sumRows(page);
+        } else {
+          rows = page;
+          loadedBaseline = sumRows(page);
+          serverTotal = data && data.totals ? Number(data.totals.total) || 0 : loadedBaseline;
+        }
+        nextCursor = data ? data.next_cursor || null : null;
         render();
+        renderMore();
       })
       .catch(function (e) {
         var bodyEl = document.getElementById('cashBody');
@@ -425,10 +485,49 @@
       });
   }
 
+  /** Выгрузка кассы за выбранный период (сервер отдаёт файл потоком). */
+  function exportRows(format) {
+    var qs = periodQuery();
+    msg('Готовится выгрузка…');
+    fetchApi(API + '/cash/rows/export?format=' + format + (qs ? '&' + qs : ''))
+      .then(function (r) {
+        if (!r.ok) return r.json().then(function (j) { throw new Error(j.detail || r.statusText); });
+        return r.blob();
+      })
+      .then(function (blob) {
+        var a = document.createElement('a');
+        a.href = URL.createObjectURL(blob);
+        a.download = 'kassa' + (period ? '_' + period : '') + '.' + format;
+        document.body.appendChild(a);
+        a.click();
+        setTimeout(function () { URL.revokeObjectURL(a.href); a.remove(); }, 1000);
+        msg('');
+      })
+      .catch(function (e) {
+        msg('Ошибка выгрузки: ' + (e.message || ''), 'err');
+      });
+  }
+
   function init() {
-    loadRows();
+    loadRows(false);
+    document.querySelectorAll('.cash-crm__btn-export').forEach(function (b) {
+      b.onclick = function () { exportRows(b.dataset.format); };
+    });
     var btn = document.getElementById('btnAddRow');
     if (btn) btn.onclick = addRow;
+    var more = document.getElementById('btnMoreRows');
+    if (more) more.onclick = function () { loadRows(true); };
+    var sel = document.getElementById('cashPeriod');
+    if (sel) {
+      sel.onchange = function () {
+        period = sel.value;
+        var label = document.getElementById('cashTotalLabel');
+        if (label) {
+          label.textContent = period === 'day' ? 'Итого за день' : period === 'month' ? 'Итого за месяц' : 'Итого в кассе';
+        }
+        loadRows(false);
+      };
+    }
   }
 
   if (document.readyState === 'loading') {
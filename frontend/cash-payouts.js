@@ -36,13 +36,14 @@
     bodyEl.innerHTML = '';
     if (!rows.length) {
       var tr = document.createElement('tr');
-      tr.innerHTML = '<td colspan="3" class="cash-payout__empty">Нет номеров к выдаче.</td>';
+      tr.innerHTML = '<td colspan="4" class="cash-payout__empty">Нет номеров к выдаче.</td>';
       bodyEl.appendChild(tr);
     } else {
       rows.forEach(function (r) {
         var tr = document.createElement('tr');
         var date = r.created_at ? r.created_at.substring(0, 10).split('-').reverse().join('.') : '';
         tr.innerHTML =
+          '<td><input type="checkbox" class="cash-payout__pick" value="' + r.id + '"></td>' +
           '<td>' + date + '</td>' +
           '<td>' + (r.client_name || '—') + '</td>' +
           '<td class="cash-payout__amount">' + formatMoney(r.amount) + '</td>';
@@ -64,7 +65,7 @@
   function load() {
     setMsg('', false);
     bodyEl.innerHTML =
-      '<tr><td colspan="3" class="cash-payout__empty">Загрузка…</td></tr>';
+      '<tr><td colspan="4" class="cash-payout__empty">Загрузка…</td></tr>';
     fetchApi(API + '/cash/plate-payouts')
       .then(function (r) {
         if (!r.ok) {
@@ -80,14 +81,32 @@
       .catch(function (e) {
         setMsg('Ошибка загрузки: ' + (e.message || ''), true);
         bodyEl.innerHTML =
-          '<tr><td colspan="3" class="cash-payout__empty">Ошибка загрузки</td></tr>';
+          '<tr><td colspan="4" class="cash-payout__empty">Ошибка загрузки</td></tr>';
       });
   }
 
+  function selectedIds() {
+    var ids = [];
+    bodyEl.querySelectorAll('.cash-payout__pick:checked').forEach(function (el) {
+      ids.push(Number(el.value));
+    });
+    return ids;
+  }
+
   function pay() {
-    if (!confirm('Выдать деньги оператору номеров за все невыплаченные номера?')) return;
+    // Отмечены строки — выдаём только их, иначе все невыплаченные
+    var ids = selectedIds();
+    var question = ids.length
+      ? 'Выдать деньги оператору номеров за отмеченные номера (' + ids.length + ')?'
+      : 'Выдать деньги оператору номеров за все невыплаченные номера?';
+    if (!confirm(question)) return;
     setMsg('', false);
-    fetchApi(API + '/cash/plate-payouts/pay', { method: 'POST' })
+    var opts = { method: 'POST' };
+    if (ids.length) {
+      opts.headers = { 'Content-Type': 'application/json' };
+      opts.body = JSON.stringify({ ids: ids });
+    }
+    fetchApi(API + '/cash/plate-payouts/pay', opts)
       .then(function (r) {
         if (!r.ok) {
           return r.json().then(function (j) {
@@ -101,6 +101,7 @@
         if (dd) { dd.classList.remove('header__dropdown--open'); dd.setAttribute('aria-hidden', 'true'); }
       }
     });
+    initOrderSearch();
     loadLast10Orders();
   }
 
@@ -210,34 +211,75 @@
     if (el) el.scrollIntoView({ behavior: 'smooth' });
   }
 
+  function renderOrderRows(orders, append) {
+    var loading = document.getElementById('lastOrdersLoading');
+    var table = document.getElementById('lastOrdersTable');
+    var body = document.getElementById('lastOrdersBody');
+    var empty = document.getElementById('lastOrdersEmpty');
+    if (!body) return;
+    loading.style.display = 'none';
+    var html = (orders || []).map(function (o) {
+      var client = (o.client && String(o.client).trim()) ? escapeHtml(o.client) : '—';
+      var sum = (o.total_amount != null) ? formatMoney(o.total_amount) : '—';
+      var date = (o.created_at || '').slice(0, 10);
+      return '<tr><td>' + (o.public_id || o.id) + '</td><td>' + client + '</td><td>' + sum + '</td><td>' + (o.status || '') + '</td><td>' + date + '</td></tr>';
+    }).join('');
+    body.innerHTML = append ? body.innerHTML + html : html;
+    var hasRows = body.children.length > 0;
+    empty.style.display = hasRows ? 'none' : 'block';
+    table.style.display = hasRows ? 'table' : 'none';
+  }
+
   function loadLast10Orders() {
     if (window.getCurrentPavilion() !== 1) return;
     fetchApi(API + '/orders?pavilion=1&limit=10')
       .then(function (r) { return r.ok ? r.json() : []; })
-      .then(function (orders) {
-        var loading = document.getElementById('lastOrdersLoading');
-        var table = document.getElementById('lastOrdersTable');
-        var body = document.getElementById('lastOrdersBody');
-        var empty = document.getElementById('lastOrdersEmpty');
-        if (!body) return;
-        loading.style.display = 'none';
-        if (!orders || orders.length === 0) {
-          empty.style.display = 'block';
-          return;
-        }
-        table.style.display = 'table';
-        body.innerHTML = orders.map(function (o) {
-          var client = (o.client && String(o.client).trim()) ? escapeHtml(o.client) : '—';
-          var sum = (o.total_amount != null) ? formatMoney(o.total_amount) : '—';
-          var date = (o.created_at || '').slice(0, 10);
-          return '<tr><td>' + (o.public_id || o.id) + '</td><td>' + client + '</td><td>' + sum + '</td><td>' + (o.status || '') + '</td><td>' + date + '</td></tr>';
-        }).join('');
-      })
+      .then(function (orders) { renderOrderRows(orders, false); })
       .catch(function () {
         document.getElementById('lastOrdersLoading').textContent = 'Ошибка загрузки';
       });
   }
 
+  // Поиск заказов: релевантные сверху, «Показать ещё» — следующая страница по курсору
+  var orderSearchCursor = null;
+  var orderSearchTimer = null;
+
+  function searchOrders(append) {
+    var input = document.getElementById('orderSearch');
+    var more = document.getElementById('orderSearchMore');
+    var q = input ? input.value.trim() : '';
+    if (q.length < 3) {
+      if (more) more.style.display = 'none';
+      if (!append) loadLast10Orders();
+      return;
+    }
+    var url = API + '/orders/search?limit=20&q=' + encodeURIComponent(q);
+    if (append && orderSearchCursor) url += '&cursor=' + encodeURIComponent(orderSearchCursor);
+    fetchApi(url)
+      .then(function (r) { return r.ok ? r.json() : { rows: [] }; })
+      .then(function (page) {
+        if (input.value.trim() !== q) return;
+        orderSearchCursor = page.next_cursor || null;
+        renderOrderRows(page.rows, append);
+        if (more) more.style.display = orderSearchCursor ? '' : 'none';
+      })
+      .catch(function () {
+        document.getElementById('lastOrdersLoading').textContent = 'Ошибка поиска';
+      });
+  }
+
+  function initOrderSearch() {
+    var input = document.getElementById('orderSearch');
+    var more = document.getElementById('orderSearchMore');
+    if (input) {
+      input.addEventListener('input', function () {
+        clearTimeout(orderSearchTimer);
+        orderSearchTimer = setTimeout(function () { searchOrders(false); }, 300);
+      });
+    }
+    if (more) more.addEventListener('click', function () { searchOrders(true); });
+  }
+
   function formatMoney(n) {
     return new Intl.NumberFormat('ru-RU', { minimumFractionDigits: 0 }).format(n) + ' ₽';
   }